@@ -1,37 +1,107 @@
-from flask import Flask, render_template, request, jsonify
+from dotenv import load_dotenv
+
+# Load environment variables before importing modules that read their settings from them
+load_dotenv()
+
+from flask import Flask, Response, g, redirect, render_template, request, jsonify, stream_with_context, url_for
+from flask.json.provider import DefaultJSONProvider
 from flask_wtf import FlaskForm
 from wtforms import StringField, SubmitField
 from wtforms.validators import DataRequired, URL
-from music_search import MusicPlatform
+from music_search import get_music_platform
+from metrics import CONTENT_TYPE as METRICS_CONTENT_TYPE, HTTP_REQUEST_SECONDS, render as render_metrics
+from track import Track, dumps
+from url_router import canonical_url
+import hashlib
 import os
-from dotenv import load_dotenv
 from flask_cors import CORS
 import logging
+import time
 
-# Configure logging
-logging.basicConfig(level=logging.DEBUG)
+# Configure logging; debug output formats whole results, so it is off by default
+logging.basicConfig(level=os.getenv('LOG_LEVEL', 'INFO').upper())
 logger = logging.getLogger(__name__)
 
-# Load environment variables
-load_dotenv()
+class TrackJSONProvider(DefaultJSONProvider):
+    """Serialize responses (tracks included) with track.dumps, which uses orjson when installed"""
+    def dumps(self, obj, **kwargs):
+        return dumps(obj)
 
 # Initialize Flask app once
 app = Flask(__name__)
 app.config['SECRET_KEY'] = os.getenv('FLASK_SECRET_KEY', 'dev')
+app.json = TrackJSONProvider(app)
+
+# Platforms offered as alternatives to the original link; only these are searched
+ALTERNATIVE_PLATFORMS = ['deezer', 'spotify', 'youtube_music']
+
+# Maximum number of URLs accepted by /api/convert/batch
+MAX_BATCH_SIZE = int(os.getenv('MAX_BATCH_SIZE', '100'))
+
+# Cache-Control sent with complete GET /api/convert results and canonical redirects
+API_CACHE_CONTROL = os.getenv('API_CACHE_CONTROL', 'public, max-age=3600, stale-while-revalidate=86400')
 
 # Configure CORS with specific options
 CORS(app, resources={
     r"/api/*": {
         "origins": ["chrome-extension://*", "http://localhost:*"],
-        "methods": ["POST", "OPTIONS"],
-        "allow_headers": ["Content-Type"]
+        "methods": ["GET", "POST", "OPTIONS"],
+        "allow_headers": ["Content-Type", "If-None-Match"],
+        "expose_headers": ["ETag"]
     }
 })
 
+@app.before_request
+def start_timer():
+    g.request_started = time.perf_counter()
+
+@app.after_request
+def record_request_latency(response):
+    """Observe request latency (up to the first byte for streamed responses)"""
+    started = g.get('request_started')
+    if started is not None:
+        HTTP_REQUEST_SECONDS.observe(time.perf_counter() - started, endpoint=request.endpoint or 'unknown',
+                                     method=request.method, status=response.status_code)
+    return response
+
 class MusicLinkForm(FlaskForm):
     url = StringField('Music URL', validators=[DataRequired(), URL()])
     submit = SubmitField('Convert')
 
+def format_original(song_info):
+    """The original track as the web page, the API and the extension show it"""
+    return {'platform': song_info.platform, 'song': song_info.title, 'artist': song_info.artist,
+            'url': song_info.url}
+
+def format_conversion(conversion):
+    """Shape a MusicPlatform.convert() result for the web page and API.
+
+    Alternatives are the Track records themselves; failed searches are left out.
+    """
+    song_info = conversion['original']
+    search_results = conversion['alternatives']
+    return {
+        'original': format_original(song_info),
+        'alternatives': {
+            platform: search_results[platform] for platform in ALTERNATIVE_PLATFORMS
+            if platform != song_info.platform and isinstance(search_results.get(platform), Track)
+        }
+    }
+
+def convert_link(url):
+    """Convert one track link for the web page and the API.
+
+    Returns (result, error, complete); complete is False when any platform's
+    search failed (an error other than not found, disabled or unconfigured,
+    timeouts and throttling included), so the result must not be cached.
+    """
+    music = get_music_platform()
+    conversion = music.convert(url, targets=ALTERNATIVE_PLATFORMS)
+    if 'error' in conversion:
+        return None, conversion['error'], False
+    logger.debug("Converted %s: %s", url, conversion)
+    return format_conversion(conversion), None, music.is_complete(conversion['alternatives'])
+
 @app.route('/', methods=['GET', 'POST'])
 def index():
     form = MusicLinkForm()
@@ -39,94 +109,166 @@ def index():
     error = None
     
     if form.validate_on_submit():
-        music = MusicPlatform()
-        url = form.url.data
-        
-        # Get song info from the provided URL
-        song_info = music.get_song_info(url)
-        
-        if 'error' in song_info:
-            error = song_info['error']
-        else:
-            # Search for the song on other platforms
-            search_results = music.search_track(
-                song_info['song'],
-                song_info['artist'],
-                platform="all"
-            )
-            
-            # Filter to include only Deezer, Spotify, and YouTube Music
-            result = {
-                'original': {
-                    'platform': song_info['platform'],
-                    'song': song_info['song'],
-                    'artist': song_info['artist'],
-                    'url': song_info['url']
-                },
-                'alternatives': {}
-            }
-            
-            # Add alternative platform links if they exist and aren't the original platform
-            for platform in ['deezer', 'spotify', 'youtube_music']:
-                if platform != song_info['platform'] and platform in search_results:
-                    platform_result = search_results[platform]
-                    if 'error' not in platform_result:
-                        result['alternatives'][platform] = platform_result
+        result, error, _ = convert_link(form.url.data)
     
     return render_template('index.html', form=form, result=result, error=error)
 
 @app.route('/api/convert', methods=['POST'])
 def convert_api():
     try:
-        logger.debug(f"Received request: {request.json}")
+        logger.debug("Received request: %s", request.json)
         
         url = request.json.get('url')
         if not url:
             return jsonify({'error': 'URL is required'}), 400
         
-        logger.debug(f"Processing URL: {url}")
-        music = MusicPlatform()
+        logger.debug("Processing URL: %s", url)
+        if get_music_platform().is_collection(url):
+            return jsonify({'error': 'Album and playlist links are converted through /api/convert/stream'}), 400
+        
+        result, error, _ = convert_link(url)
+        if error is not None:
+            logger.error("Error in song info: %s", error)
+            return jsonify({'error': error}), 400
+        return jsonify(result)
         
-        # Get song info from the provided URL
-        song_info = music.get_song_info(url)
-        logger.debug(f"Song info: {song_info}")
+    except Exception as e:
+        logger.error("Unexpected error: %s", e, exc_info=True)
+        return jsonify({'error': f'Server error: {str(e)}'}), 500
+
+def no_store(response, status):
+    """Mark an error or partial response as uncacheable"""
+    response.status_code = status
+    response.headers['Cache-Control'] = 'no-store'
+    return response
+
+@app.route('/api/convert', methods=['GET'])
+def convert_get_api():
+    """Cacheable conversion of one track link, keyed on the canonical track URL.
+
+    Other links to the same track are redirected to the canonical one, so
+    browsers and proxies keep a single entry per track. Complete results carry
+    a strong ETag and API_CACHE_CONTROL, and If-None-Match is answered with 304.
+    """
+    try:
+        url = request.args.get('url')
+        if not url:
+            return no_store(jsonify({'error': 'URL is required'}), 400)
+        if get_music_platform().is_collection(url):
+            return no_store(jsonify({'error': 'Album and playlist links are converted through /api/convert/stream'}), 400)
         
-        if 'error' in song_info:
-            logger.error(f"Error in song info: {song_info['error']}")
-            return jsonify({'error': song_info['error']}), 400
+        canonical = canonical_url(url)
+        if canonical is not None and canonical != url:
+            response = redirect(url_for('convert_get_api', url=canonical), code=308)
+            response.headers['Cache-Control'] = API_CACHE_CONTROL
+            return response
         
-        # Search for the song on other platforms
-        search_results = music.search_track(
-            song_info['song'],
-            song_info['artist'],
-            platform="all"
-        )
-        logger.debug(f"Search results: {search_results}")
+        result, error, complete = convert_link(url)
+        if error is not None:
+            logger.error("Error in song info: %s", error)
+            return no_store(jsonify({'error': error}), 400)
         
-        # Filter to include only Deezer, Spotify, and YouTube Music
-        result = {
-            'original': {
-                'platform': song_info['platform'],
-                'song': song_info['song'],
-                'artist': song_info['artist'],
-                'url': song_info['url']
-            },
-            'alternatives': {}
-        }
+        response = Response(dumps(result), mimetype='application/json')
+        # Short links have no canonical key, and a result missing a platform
+        # because of a transient failure must not be pinned by any cache
+        if canonical is None or not complete:
+            return no_store(response, 200)
+        response.set_etag(hashlib.sha256(response.get_data()).hexdigest()[:32])
+        response.headers['Cache-Control'] = API_CACHE_CONTROL
+        return response.make_conditional(request)
+        
+    except Exception as e:
+        logger.error("Unexpected error: %s", e, exc_info=True)
+        return no_store(jsonify({'error': f'Server error: {str(e)}'}), 500)
+
+def sse_event(event, data):
+    """Format one Server-Sent Events message"""
+    return f"event: {event}\ndata: {dumps(data)}\n\n"
+
+def collection_events(url):
+    """SSE messages for an album or playlist: the collection, album matches, then each track in order"""
+    for kind, info in get_music_platform().iter_convert_collection(url, targets=ALTERNATIVE_PLATFORMS):
+        if kind == 'collection':
+            if 'error' in info:
+                yield sse_event('conversion_error', {'error': info['error']})
+                return
+            yield sse_event('collection', info)
+        elif kind == 'album':
+            if 'error' not in info:
+                yield sse_event('album', info)
+        else:
+            yield sse_event('track', {'index': info['index'], **format_conversion(info)})
+    yield sse_event('done', {})
+
+@app.route('/api/convert/stream', methods=['GET'])
+def convert_stream_api():
+    """Stream the original track, then each alternative as its search resolves.
+
+    Album and playlist links stream the collection, then one event per track.
+    """
+    url = request.args.get('url')
+    if not url:
+        return jsonify({'error': 'URL is required'}), 400
+    
+    def generate():
+        try:
+            if get_music_platform().is_collection(url):
+                yield from collection_events(url)
+                return
+            music = get_music_platform()
+            source_platform = None
+            search_results = {}
+            for platform, info in music.iter_convert(url, targets=ALTERNATIVE_PLATFORMS):
+                if platform == 'original':
+                    if 'error' in info:
+                        yield sse_event('conversion_error', {'error': info['error']})
+                        return
+                    source_platform = info.platform
+                    yield sse_event('original', format_original(info))
+                else:
+                    search_results[platform] = info
+                    if platform in ALTERNATIVE_PLATFORMS and platform != source_platform and isinstance(info, Track):
+                        yield sse_event('alternative', info)
+            # Clients cache the streamed result only when no platform's search failed (an error
+            # other than not found, disabled or unconfigured, timeouts and throttling included)
+            yield sse_event('done', {'complete': music.is_complete(search_results)})
+        except Exception as e:
+            logger.error("Unexpected error: %s", e, exc_info=True)
+            yield sse_event('conversion_error', {'error': f'Server error: {str(e)}'})
+    
+    return Response(stream_with_context(generate()), mimetype='text/event-stream', headers={
+        'Cache-Control': 'no-cache',
+        'X-Accel-Buffering': 'no'  # keep reverse proxies from buffering the stream
+    })
+
+@app.route('/api/convert/batch', methods=['POST'])
+def convert_batch_api():
+    try:
+        urls = (request.json or {}).get('urls')
+        if not isinstance(urls, list) or not urls:
+            return jsonify({'error': 'A non-empty list of URLs is required'}), 400
+        if len(urls) > MAX_BATCH_SIZE:
+            return jsonify({'error': f'At most {MAX_BATCH_SIZE} URLs per batch'}), 400
+        if not all(isinstance(url, str) and url for url in urls):
+            return jsonify({'error': 'Every URL must be a non-empty string'}), 400
         
-        # Add alternative platform links if they exist and aren't the original platform
-        for platform in ['deezer', 'spotify', 'youtube_music']:
-            if platform != song_info['platform'] and platform in search_results:
-                platform_result = search_results[platform]
-                if 'error' not in platform_result:
-                    result['alternatives'][platform] = platform_result
+        logger.debug("Processing batch of %d URLs", len(urls))
+        conversions = get_music_platform().convert_many(urls, targets=ALTERNATIVE_PLATFORMS)
         
-        logger.debug(f"Sending response: {result}")
-        return jsonify(result)
+        results = [
+            {'error': conversion['error']} if 'error' in conversion else format_conversion(conversion)
+            for conversion in conversions
+        ]
+        return jsonify({'results': results})
         
     except Exception as e:
-        logger.error(f"Unexpected error: {str(e)}", exc_info=True)
+        logger.error("Unexpected error: %s", e, exc_info=True)
         return jsonify({'error': f'Server error: {str(e)}'}), 500
 
+@app.route('/metrics', methods=['GET'])
+def metrics():
+    """Prometheus scrape endpoint"""
+    return Response(render_metrics(), content_type=METRICS_CONTENT_TYPE)
+
 if __name__ == '__main__':
     app.run(debug=True) 
\ No newline at end of file
@@ -0,0 +1,91 @@
+"""Import-time benchmark for cold starts.
+
+Imports each module in a fresh interpreter several times and reports the
+median wall time, plus any platform SDKs that got imported along the way.
+Exits with status 1 when a module exceeds --budget-ms, so it can gate CI.
+
+Usage:
+    python benchmarks/bench_import.py
+    python benchmarks/bench_import.py --modules music_search,app --budget-ms 150
+    python benchmarks/bench_import.py --modules music_search --profile
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# SDKs that must only be imported once their platform is used
+PLATFORM_SDKS = ('spotipy', 'ytmusicapi', 'applemusicpy', 'yandex_music')
+
+PROBE = """
+import json, sys, time
+start = time.perf_counter()
+import {module}
+elapsed = time.perf_counter() - start
+print(json.dumps({{'ms': elapsed * 1000, 'sdks': [m for m in {sdks!r} if m in sys.modules]}}))
+"""
+
+
+def measure(module: str, runs: int) -> dict:
+    """Import ``module`` in ``runs`` fresh interpreters and summarise the timings"""
+    timings = []
+    sdks = set()
+    for _ in range(runs):
+        output = subprocess.run(
+            [sys.executable, '-c', PROBE.format(module=module, sdks=PLATFORM_SDKS)],
+            cwd=REPO_DIR, capture_output=True, text=True, check=True
+        ).stdout
+        sample = json.loads(output.strip().splitlines()[-1])
+        timings.append(sample['ms'])
+        sdks.update(sample['sdks'])
+    return {'median_ms': statistics.median(timings), 'min_ms': min(timings),
+            'max_ms': max(timings), 'sdks': sorted(sdks)}
+
+
+def profile(module: str, top: int) -> None:
+    """Print the slowest imports (cumulative) reported by ``python -X importtime``"""
+    stderr = subprocess.run([sys.executable, '-X', 'importtime', '-c', f'import {module}'],
+                            cwd=REPO_DIR, capture_output=True, text=True, check=True).stderr
+    rows = []
+    for line in stderr.splitlines():
+        if not line.startswith('import time:') or 'cumulative' in line:
+            continue
+        # "import time: <self us> | <cumulative us> | <indented module name>"
+        cumulative_us, name = line.split('|')[1:]
+        rows.append((int(cumulative_us), name.rstrip()))
+    for cumulative_us, name in sorted(rows, reverse=True)[:top]:
+        print(f"    {cumulative_us / 1000:8.1f} ms  {name}")
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description='Measure cold import time of the service modules.')
+    parser.add_argument('--modules', default='music_search,app,bulk_convert',
+                        help='Comma-separated modules to import (default: music_search,app,bulk_convert)')
+    parser.add_argument('--runs', type=int, default=7, help='Fresh interpreters per module (default: 7)')
+    parser.add_argument('--budget-ms', type=float,
+                        help='Fail if any module takes longer than this (median)')
+    parser.add_argument('--profile', action='store_true', help='Show the slowest nested imports')
+    parser.add_argument('--top', type=int, default=15, help='Imports shown with --profile (default: 15)')
+    args = parser.parse_args(argv)
+
+    ok = True
+    for module in args.modules.split(','):
+        result = measure(module, args.runs)
+        over_budget = args.budget_ms is not None and result['median_ms'] > args.budget_ms
+        ok = ok and not over_budget and not result['sdks']
+        print(f"{module:16} median {result['median_ms']:7.1f} ms  "
+              f"(min {result['min_ms']:.1f}, max {result['max_ms']:.1f})"
+              f"{'  OVER BUDGET' if over_budget else ''}")
+        if result['sdks']:
+            print(f"    platform SDKs imported eagerly: {', '.join(result['sdks'])}")
+        if args.profile:
+            profile(module, args.top)
+    return 0 if ok else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
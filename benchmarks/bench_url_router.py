@@ -0,0 +1,48 @@
+"""Micro-benchmark for url_router.parse_url throughput.
+
+Usage: python benchmarks/bench_url_router.py [--iterations N]
+"""
+import argparse
+import os
+import sys
+import timeit
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from url_router import UnsupportedUrlError, parse_url  # noqa: E402
+
+URLS = [
+    "https://www.deezer.com/track/3135556",
+    "https://www.deezer.com/fr/track/3135556?utm_source=share",
+    "https://deezer.page.link/4fBQKhtNHZvYS5bX6",
+    "https://open.spotify.com/track/6rPO02ozF3bM7NnOV4h6s2",
+    "https://open.spotify.com/intl-de/track/6rPO02ozF3bM7NnOV4h6s2?si=0a1b2c3d4e5f",
+    "https://music.apple.com/us/album/bohemian-rhapsody/1440806041?i=1440806768",
+    "https://music.apple.com/gb/song/bohemian-rhapsody/1440806768",
+    "https://music.youtube.com/watch?v=fJ9rUzIMcZQ&list=RDAMVMfJ9rUzIMcZQ",
+    "https://music.yandex.ru/album/297670/track/2867727",
+    "https://example.com/not/a/music/link",
+]
+
+
+def parse_all():
+    for url in URLS:
+        try:
+            parse_url(url)
+        except UnsupportedUrlError:
+            pass
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--iterations', type=int, default=20000)
+    args = parser.parse_args()
+
+    timings = timeit.repeat(parse_all, number=args.iterations, repeat=5)
+    best = min(timings)
+    parsed = args.iterations * len(URLS)
+    print(f"parse_url: {parsed / best:,.0f} URLs/s ({best / parsed * 1e6:.2f} us per URL, best of 5)")
+
+
+if __name__ == '__main__':
+    main()
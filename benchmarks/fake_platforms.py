@@ -0,0 +1,433 @@
+"""Local stand-in servers for the platform APIs used by the benchmarks.
+
+Each platform runs its own threaded HTTP server that answers the endpoints
+MusicPlatform calls with the fixture payloads in ``benchmarks/fixtures``.
+Latency, error rate and rate limiting are configurable per platform so load
+tests can reproduce slow, flaky or throttling upstreams without the network.
+
+Run standalone to poke at the servers by hand:
+    python benchmarks/fake_platforms.py --latency spotify=120
+"""
+import argparse
+import copy
+import json
+import os
+import random
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, Optional, Tuple
+from urllib.parse import parse_qs, urlsplit
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from throttle import TokenBucket  # noqa: E402
+
+FIXTURES_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'fixtures')
+PLATFORMS = ('deezer', 'spotify', 'youtube_music', 'yandex_music')
+# Tracks on every fake album and playlist, titled "Track 1" to "Track <n>"
+COLLECTION_TRACKS = 40
+
+
+def load_fixture(name: str) -> Dict[str, Any]:
+    with open(os.path.join(FIXTURES_DIR, name)) as f:
+        return json.load(f)
+
+
+class PlatformProfile:
+    """How a fake platform behaves: latency, failures and rate limiting"""
+
+    def __init__(self, latency_ms: float = 50.0, jitter: float = 0.5, error_rate: float = 0.0,
+                 rate_limit: Optional[Tuple[float, int]] = None):
+        self.latency_ms = latency_ms
+        # Sigma of the log-normal multiplier applied to latency_ms (0 = constant latency)
+        self.jitter = jitter
+        # Fraction of requests answered with HTTP 500
+        self.error_rate = error_rate
+        # (requests per second, burst) above which requests are rejected as throttled
+        self.rate_limit = rate_limit
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {'latency_ms': self.latency_ms, 'jitter': self.jitter,
+                'error_rate': self.error_rate, 'rate_limit': self.rate_limit}
+
+
+class FakePlatformHandler(BaseHTTPRequestHandler):
+    """Base handler: applies the server's profile, then dispatches to ``route``"""
+
+    protocol_version = 'HTTP/1.1'  # keep-alive, like the real APIs
+
+    def log_message(self, format, *args):
+        pass
+
+    def do_GET(self):
+        self._handle('GET')
+
+    def do_POST(self):
+        self._handle('POST')
+
+    def _handle(self, method: str):
+        parts = urlsplit(self.path)
+        query = {k: v[0] for k, v in parse_qs(parts.query).items()}
+        length = int(self.headers.get('Content-Length') or 0)
+        if length:
+            body = self.rfile.read(length).decode('utf-8')
+            query.update({k: v[0] for k, v in parse_qs(body).items()})
+
+        server = self.server
+        server.count_request()
+        profile = server.profile
+        if profile.latency_ms:
+            time.sleep(profile.latency_ms / 1000 * random.lognormvariate(0, profile.jitter))
+        if server.limiter is not None and not server.limiter.acquire():
+            return self.throttled()
+        if profile.error_rate and random.random() < profile.error_rate:
+            return self.send_json({'error': 'injected failure'}, status=500)
+
+        result = self.route(method, parts.path, query)
+        if result is None:
+            return self.send_json({'error': 'not found'}, status=404)
+        self.send_json(result)
+
+    def route(self, method: str, path: str, query: Dict[str, str]):
+        raise NotImplementedError
+
+    def throttled(self):
+        self.send_json({'error': 'rate limited'}, status=429, headers={'Retry-After': '1'})
+
+    def send_json(self, payload: Any, status: int = 200, headers: Optional[Dict[str, str]] = None):
+        body = json.dumps(payload).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+
+class DeezerHandler(FakePlatformHandler):
+    track = load_fixture('deezer_track.json')
+
+    def throttled(self):
+        # Deezer reports an exhausted quota as error code 4 in a 200 response
+        self.send_json({'error': {'type': 'Exception', 'message': 'Quota limit exceeded', 'code': 4}})
+
+    def make_track(self, track_id: str) -> Dict[str, Any]:
+        track = copy.deepcopy(self.track)
+        track['id'] = int(track_id)
+        track['link'] = f'https://www.deezer.com/track/{track_id}'
+        return track
+
+    def listed_tracks(self, kind: str, collection_id: str, index: int, limit: int = 25) -> Dict[str, Any]:
+        """One page of an album or playlist tracklist, linking to the next page"""
+        tracks = []
+        for n in range(index, min(index + limit, COLLECTION_TRACKS)):
+            track = self.make_track(str(self.track['id'] + n))
+            track['title'] = f'Track {n + 1}'
+            # Listings carry no ISRC, and album listings leave out the album
+            del track['isrc']
+            if kind == 'album':
+                del track['album']
+            tracks.append(track)
+        page = {'data': tracks, 'total': COLLECTION_TRACKS}
+        if index + limit < COLLECTION_TRACKS:
+            page['next'] = f'{self.server.url}/{kind}/{collection_id}/tracks?index={index + limit}'
+        return page
+
+    def make_collection(self, kind: str, collection_id: str) -> Dict[str, Any]:
+        collection = {'id': int(collection_id), 'link': f'https://www.deezer.com/{kind}/{collection_id}',
+                      'tracks': self.listed_tracks(kind, collection_id, 0)}
+        if kind == 'album':
+            collection.update(title=self.track['album']['title'], artist=self.track['artist'])
+        else:
+            collection.update(title='Benchmark playlist', creator={'id': 1, 'name': 'bench'})
+        return collection
+
+    def route(self, method, path, query):
+        parts = path.strip('/').split('/')
+        if parts[0] in ('album', 'playlist') and len(parts) == 2:
+            return self.make_collection(parts[0], parts[1])
+        if parts[0] in ('album', 'playlist') and len(parts) == 3 and parts[2] == 'tracks':
+            return self.listed_tracks(parts[0], parts[1], int(query.get('index', 0)))
+        if path == '/search/album':
+            album = self.track['album']
+            return {'data': [{'id': album['id'], 'title': album['title'], 'artist': self.track['artist']}],
+                    'total': 1}
+        if path.startswith('/track/isrc:'):
+            track = self.make_track(str(self.track['id']))
+            track['isrc'] = path.split('isrc:', 1)[1]
+            return track
+        if path.startswith('/track/'):
+            return self.make_track(path.split('/')[2])
+        if path == '/search/track':
+            return {'data': [self.make_track(str(self.track['id']))], 'total': 1}
+        return None
+
+
+class SpotifyHandler(FakePlatformHandler):
+    track = load_fixture('spotify_track.json')
+
+    def make_track(self, track_id: str) -> Dict[str, Any]:
+        track = copy.deepcopy(self.track)
+        track['id'] = track_id
+        track['uri'] = f'spotify:track:{track_id}'
+        track['external_urls'] = {'spotify': f'https://open.spotify.com/track/{track_id}'}
+        if track_id.startswith('bench'):
+            track['name'] = f'Track {int(track_id[5:]) + 1}'
+            del track['external_ids']
+        return track
+
+    def listed_tracks(self, kind: str, collection_id: str, offset: int, limit: int) -> Dict[str, Any]:
+        """One page of an album (simplified tracks) or playlist (items wrapping full tracks)"""
+        items = []
+        for n in range(offset, min(offset + limit, COLLECTION_TRACKS)):
+            track = self.make_track(f'bench{n:017d}')
+            if kind == 'albums':
+                items.append({k: track[k] for k in ('id', 'name', 'type', 'uri', 'artists', 'external_urls')})
+            else:
+                items.append({'added_at': '2024-01-01T00:00:00Z', 'track': track})
+        following = offset + limit
+        return {'items': items, 'total': COLLECTION_TRACKS, 'limit': limit, 'offset': offset,
+                'next': (f'{self.server.url}/v1/{kind}/{collection_id}/tracks?offset={following}&limit={limit}'
+                         if following < COLLECTION_TRACKS else None)}
+
+    def make_collection(self, kind: str, collection_id: str) -> Dict[str, Any]:
+        collection = {'id': collection_id,
+                      'external_urls': {'spotify': f'https://open.spotify.com/{kind[:-1]}/{collection_id}'}}
+        if kind == 'albums':
+            collection.update(name=self.track['album']['name'], artists=self.track['artists'],
+                              tracks=self.listed_tracks(kind, collection_id, 0, 50))
+        else:
+            collection.update(name='Benchmark playlist', owner={'id': 'bench', 'display_name': 'bench'},
+                              tracks=self.listed_tracks(kind, collection_id, 0, 100))
+        return collection
+
+    def route(self, method, path, query):
+        if path == '/api/token' and method == 'POST':
+            return {'access_token': 'bench-token', 'token_type': 'Bearer', 'expires_in': 3600}
+        parts = path.strip('/').split('/')
+        if len(parts) == 3 and parts[1] in ('albums', 'playlists'):
+            return self.make_collection(parts[1], parts[2])
+        if len(parts) == 4 and parts[1] in ('albums', 'playlists') and parts[3] == 'tracks':
+            return self.listed_tracks(parts[1], parts[2], int(query.get('offset', 0)), int(query.get('limit', 20)))
+        if path == '/v1/search' and query.get('type') == 'album':
+            album = self.make_collection('albums', self.track['album']['id'])
+            del album['tracks']
+            return {'albums': {'items': [album], 'total': 1, 'limit': 1, 'offset': 0}}
+        if path.rstrip('/') == '/v1/tracks':  # spotipy requests /v1/tracks/?ids=...
+            return {'tracks': [self.make_track(track_id) for track_id in query.get('ids', '').split(',')]}
+        if path.startswith('/v1/tracks/'):
+            return self.make_track(path.split('/')[3])
+        if path == '/v1/search':
+            return {'tracks': {'items': [self.make_track(self.track['id'])], 'total': 1,
+                               'limit': 1, 'offset': 0}}
+        return None
+
+
+class YouTubeMusicHandler(FakePlatformHandler):
+    """Serves already-parsed ytmusicapi results (see FakeYTMusic)"""
+    song = load_fixture('youtube_music_song.json')
+
+    def route(self, method, path, query):
+        if path.startswith('/song/'):
+            song = copy.deepcopy(self.song)
+            song['videoId'] = path.split('/')[2]
+            return song
+        if path == '/search' and query.get('filter') == 'albums':
+            return [{'resultType': 'album', 'browseId': self.song['album']['id'],
+                     'title': self.song['album']['name'], 'artists': self.song['artists']}]
+        if path == '/search':
+            return [self.song]
+        if path.startswith('/album/') or path.startswith('/playlist/'):
+            kind = path.split('/')[1]
+            tracks = []
+            for n in range(COLLECTION_TRACKS):
+                track = copy.deepcopy(self.song)
+                track.update(videoId=f'bench{n:06d}', title=f'Track {n + 1}')
+                if kind == 'album':
+                    # Album tracklists name the album as a plain string
+                    track['album'] = self.song['album']['name']
+                tracks.append(track)
+            if kind == 'album':
+                return {'title': self.song['album']['name'], 'artists': self.song['artists'], 'tracks': tracks}
+            return {'title': 'Benchmark playlist', 'author': {'name': 'bench', 'id': None}, 'tracks': tracks}
+        return None
+
+
+class YandexHandler(FakePlatformHandler):
+    track = load_fixture('yandex_track.json')
+
+    def make_track(self, track_id: str) -> Dict[str, Any]:
+        track = copy.deepcopy(self.track)
+        track['id'] = track['realId'] = track_id
+        return track
+
+    def route(self, method, path, query):
+        if path == '/account/status':
+            return {'result': {'account': {'uid': 1, 'login': 'bench', 'now': '2024-01-01T00:00:00+00:00',
+                                           'serviceAvailable': True},
+                               'permissions': {'until': '2100-01-01T00:00:00+00:00', 'values': [], 'default': []}}}
+        if path == '/tracks':
+            ids = query.get('track-ids', '').split(',')
+            return {'result': [self.make_track(track_id.split(':')[0]) for track_id in ids if track_id]}
+        if path == '/search':
+            return {'result': {'searchRequestId': 'bench', 'text': query.get('text', ''), 'type': 'track', 'page': 0,
+                               'tracks': {'total': 1, 'perPage': 10, 'order': 0,
+                                          'results': [self.make_track(self.track['id'])]}}}
+        return None
+
+
+HANDLERS = {
+    'deezer': DeezerHandler,
+    'spotify': SpotifyHandler,
+    'youtube_music': YouTubeMusicHandler,
+    'yandex_music': YandexHandler,
+}
+
+
+class FakePlatformServer(ThreadingHTTPServer):
+    daemon_threads = True
+    request_queue_size = 256
+
+    def __init__(self, platform: str, profile: PlatformProfile, port: int = 0):
+        super().__init__(('127.0.0.1', port), HANDLERS[platform])
+        self.platform = platform
+        self.profile = profile
+        self.limiter = TokenBucket(*profile.rate_limit) if profile.rate_limit else None
+        self.requests = 0
+        self._count_lock = threading.Lock()
+
+    @property
+    def url(self) -> str:
+        return f'http://127.0.0.1:{self.server_address[1]}'
+
+    def count_request(self):
+        with self._count_lock:
+            self.requests += 1
+
+
+class FakePlatforms:
+    """Start one fake server per platform and expose their base URLs"""
+
+    def __init__(self, profiles: Dict[str, PlatformProfile]):
+        self.servers = {platform: FakePlatformServer(platform, profiles.get(platform, PlatformProfile()))
+                        for platform in PLATFORMS}
+        self._threads = []
+
+    def __enter__(self) -> 'FakePlatforms':
+        for server in self.servers.values():
+            thread = threading.Thread(target=server.serve_forever, daemon=True,
+                                      name=f'fake-{server.platform}')
+            thread.start()
+            self._threads.append(thread)
+        return self
+
+    def __exit__(self, *exc):
+        for server in self.servers.values():
+            server.shutdown()
+            server.server_close()
+
+    def url(self, platform: str) -> str:
+        return self.servers[platform].url
+
+    def request_counts(self) -> Dict[str, int]:
+        return {platform: server.requests for platform, server in self.servers.items()}
+
+    def environment(self) -> Dict[str, str]:
+        """Environment variables that point MusicPlatform at these servers"""
+        return {
+            'DEEZER_API_URL': self.url('deezer'),
+            'SPOTIFY_CLIENT_ID': 'bench',
+            'SPOTIFY_CLIENT_SECRET': 'bench',
+            'SPOTIFY_API_URL': self.url('spotify') + '/v1/',
+            'SPOTIFY_TOKEN_URL': self.url('spotify') + '/api/token',
+            'YANDEX_MUSIC_TOKEN': 'bench',
+            'YANDEX_MUSIC_API_URL': self.url('yandex_music'),
+        }
+
+
+class FakeYTMusic:
+    """Stand-in for ytmusicapi.YTMusic backed by the fake YouTube Music server.
+
+    YouTube Music's internal API returns deeply nested page payloads, so the
+    fake server serves the shapes ytmusicapi returns after parsing instead.
+    """
+
+    def __init__(self, base_url: str, session):
+        self.base_url = base_url
+        self.session = session
+
+    def _get(self, path: str, **params) -> Any:
+        response = self.session.get(self.base_url + path, params=params)
+        response.raise_for_status()
+        return response.json()
+
+    def get_song(self, video_id: str) -> Dict[str, Any]:
+        return self._get(f'/song/{video_id}')
+
+    def search(self, query: str, filter: Optional[str] = None, limit: int = 20):
+        return self._get('/search', q=query, filter=filter, limit=limit)
+
+    def get_album(self, browseId: str) -> Dict[str, Any]:
+        return self._get(f'/album/{browseId}')
+
+    def get_playlist(self, playlistId: str, limit: Optional[int] = 100) -> Dict[str, Any]:
+        return self._get(f'/playlist/{playlistId}')
+
+
+def parse_profiles(latency: Dict[str, float], error_rate: Dict[str, float],
+                   rate_limit: Dict[str, Tuple[float, int]], jitter: float) -> Dict[str, PlatformProfile]:
+    """Build per-platform profiles from ``{platform: value}`` overrides ('all' applies to every platform)"""
+    def pick(values, platform, default):
+        return values.get(platform, values.get('all', default))
+    return {
+        platform: PlatformProfile(
+            latency_ms=pick(latency, platform, 50.0),
+            jitter=jitter,
+            error_rate=pick(error_rate, platform, 0.0),
+            rate_limit=pick(rate_limit, platform, None),
+        )
+        for platform in PLATFORMS
+    }
+
+
+def parse_platform_values(spec: Optional[str], cast=float) -> Dict[str, Any]:
+    """Parse ``"spotify=120,all=40"`` into ``{'spotify': 120.0, 'all': 40.0}``"""
+    values = {}
+    for item in (spec or '').split(','):
+        if item.strip():
+            platform, _, value = item.partition('=')
+            values[platform.strip()] = cast(value)
+    return values
+
+
+def parse_rate(value: str) -> Tuple[float, int]:
+    """Parse ``"10:20"`` (requests per second, burst) into a tuple"""
+    rate, _, burst = value.partition(':')
+    return (float(rate), int(burst) if burst else max(1, int(float(rate))))
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Run the fake platform servers until interrupted.')
+    parser.add_argument('--latency', help='Mean latency in ms per platform, e.g. "all=50,spotify=120"')
+    parser.add_argument('--error-rate', help='Fraction of HTTP 500 responses, e.g. "deezer=0.05"')
+    parser.add_argument('--rate-limit', help='Requests per second:burst, e.g. "spotify=20:40"')
+    parser.add_argument('--jitter', type=float, default=0.5)
+    args = parser.parse_args()
+
+    profiles = parse_profiles(parse_platform_values(args.latency), parse_platform_values(args.error_rate),
+                              parse_platform_values(args.rate_limit, parse_rate), args.jitter)
+    with FakePlatforms(profiles) as fakes:
+        for name, value in fakes.environment().items():
+            print(f'{name}={value}')
+        print(f'# youtube_music: {fakes.url("youtube_music")} (use FakeYTMusic)')
+        try:
+            threading.Event().wait()
+        except KeyboardInterrupt:
+            pass
+
+
+if __name__ == '__main__':
+    main()
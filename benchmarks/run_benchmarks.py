@@ -0,0 +1,331 @@
+"""Load-test MusicPlatform and the Flask API against local fake platform servers.
+
+Starts the stand-in servers from fake_platforms.py, points the platform clients
+at them, then drives the library and the HTTP API with concurrent requests and
+reports throughput and p50/p95/p99 latency per scenario. Results are written
+as JSON; pass --compare to check them against an earlier run.
+
+Usage:
+    python benchmarks/run_benchmarks.py --requests 500 --concurrency 32
+    python benchmarks/run_benchmarks.py --latency all=40,spotify=150 --error-rate youtube_music=0.05
+    python benchmarks/run_benchmarks.py --compare benchmarks/results/baseline.json
+"""
+import argparse
+import json
+import logging
+import os
+import platform as platform_info
+import subprocess
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+from typing import Any, Callable, Dict, List, Optional
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+REPO_DIR = os.path.dirname(BENCH_DIR)
+sys.path.insert(0, BENCH_DIR)
+sys.path.insert(0, REPO_DIR)
+
+from fake_platforms import (COLLECTION_TRACKS, FakePlatforms, FakeYTMusic,  # noqa: E402
+                            parse_platform_values, parse_profiles, parse_rate)
+
+SCENARIOS = ('library_convert', 'library_convert_hedged', 'library_convert_cached', 'library_convert_album',
+             'library_playlist_first_track', 'api_convert', 'api_convert_batch')
+BATCH_SIZE = 20
+# Conversions run before library_convert_hedged is measured, to learn each platform's p95
+HEDGE_WARM_UP = 40
+
+
+def percentile(sorted_values: List[float], fraction: float) -> float:
+    """Nearest-rank percentile of an already sorted list"""
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, max(0, int(round(fraction * len(sorted_values) + 0.5)) - 1))
+    return sorted_values[index]
+
+
+def track_urls(count: int, offset: int = 0) -> List[str]:
+    """Distinct track URLs spread across the fake platforms"""
+    urls = []
+    for i in range(offset, offset + count):
+        kind = i % 3
+        if kind == 0:
+            urls.append(f'https://www.deezer.com/track/{1000000 + i}')
+        elif kind == 1:
+            urls.append(f'https://open.spotify.com/track/{i:022d}')
+        else:
+            urls.append(f'https://music.yandex.ru/album/297670/track/{3000000 + i}')
+    return urls
+
+
+def measure(name: str, calls: List[Callable[[], bool]], concurrency: int,
+            fakes: FakePlatforms, items_per_call: int = 1) -> Dict[str, Any]:
+    """Run ``calls`` on ``concurrency`` threads; each call returns True on success"""
+    latencies: List[float] = []
+    errors = 0
+    lock = threading.Lock()
+    upstream_before = fakes.request_counts()
+
+    def timed(call):
+        nonlocal errors
+        start = time.perf_counter()
+        try:
+            ok = call()
+        except Exception:
+            ok = False
+        elapsed = time.perf_counter() - start
+        with lock:
+            latencies.append(elapsed * 1000)
+            if not ok:
+                errors += 1
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        list(executor.map(timed, calls))
+    wall = time.perf_counter() - started
+
+    latencies.sort()
+    upstream_after = fakes.request_counts()
+    result = {
+        'requests': len(calls),
+        'items': len(calls) * items_per_call,
+        'errors': errors,
+        'wall_s': round(wall, 4),
+        'throughput_rps': round(len(calls) / wall, 2) if wall else 0.0,
+        'items_per_s': round(len(calls) * items_per_call / wall, 2) if wall else 0.0,
+        'mean_ms': round(sum(latencies) / len(latencies), 3) if latencies else 0.0,
+        'p50_ms': round(percentile(latencies, 0.50), 3),
+        'p95_ms': round(percentile(latencies, 0.95), 3),
+        'p99_ms': round(percentile(latencies, 0.99), 3),
+        'upstream_requests': {p: upstream_after[p] - upstream_before[p] for p in upstream_after},
+    }
+    print(f"{name:24} {result['throughput_rps']:9.1f} req/s  p50 {result['p50_ms']:8.2f} ms  "
+          f"p95 {result['p95_ms']:8.2f} ms  p99 {result['p99_ms']:8.2f} ms  errors {errors}")
+    return result
+
+
+def run_scenarios(args, fakes: FakePlatforms) -> Dict[str, Dict[str, Any]]:
+    # Imported only now: the platform modules read their endpoints from the environment
+    import music_search
+    from cache import ConversionCache
+    from catalog import TrackCatalog
+    from http_client import get_session
+    from isrc_index import ISRCIndex
+    from throttle import parse_rate_limits
+
+    class BenchMusicPlatform(music_search.MusicPlatform):
+        def _init_ytmusic(self):
+            return FakeYTMusic(fakes.url('youtube_music'), get_session('youtube_music'))
+
+    def make_platform(cached: bool, hedged: bool = False) -> music_search.MusicPlatform:
+        # Cold runs disable the caches so every request reaches the fake upstreams
+        music = BenchMusicPlatform(
+            hedge_platforms=tuple(music_search.PLATFORM_NAMES) if hedged else (),
+            cache=ConversionCache() if cached else ConversionCache(maxsize=0),
+            isrc_index=ISRCIndex() if cached else ISRCIndex(maxsize=0),
+            catalog=TrackCatalog() if cached else TrackCatalog(maxsize=0),
+            rate_limits=parse_rate_limits(args.client_rate_limits),
+        )
+        # Keep SDK imports and client setup out of the measured requests
+        music.warm_up()
+        return music
+
+    def converted(result: Dict[str, Any]) -> bool:
+        return 'error' not in result
+
+    results = {}
+    selected = args.scenarios.split(',') if args.scenarios else SCENARIOS
+    offset = 0
+
+    if 'library_convert' in selected:
+        music = make_platform(cached=False)
+        urls = track_urls(args.requests, offset)
+        offset += args.requests
+        results['library_convert'] = measure(
+            'library_convert', [lambda url=url: converted(music.convert(url)) for url in urls],
+            args.concurrency, fakes)
+
+    if 'library_convert_hedged' in selected:
+        # library_convert with every platform hedged; compare p95 and upstream requests
+        music = make_platform(cached=False, hedged=True)
+        for url in track_urls(HEDGE_WARM_UP, offset):
+            music.convert(url)
+        offset += HEDGE_WARM_UP
+        urls = track_urls(args.requests, offset)
+        offset += args.requests
+        results['library_convert_hedged'] = measure(
+            'library_convert_hedged', [lambda url=url: converted(music.convert(url)) for url in urls],
+            args.concurrency, fakes)
+
+    if 'library_convert_cached' in selected:
+        music = make_platform(cached=True)
+        hot = track_urls(10, offset)
+        offset += 10
+        for url in hot:
+            music.convert(url)
+        results['library_convert_cached'] = measure(
+            'library_convert_cached',
+            [lambda url=hot[i % len(hot)]: converted(music.convert(url)) for i in range(args.requests)],
+            args.concurrency, fakes)
+
+    if 'library_convert_album' in selected:
+        # Album-level matching: one album search per target instead of one search per track
+        music = make_platform(cached=False)
+        albums = max(1, args.requests // 10)
+        calls = [
+            lambda album_id=i: converted(music.convert_collection(f'https://www.deezer.com/album/{album_id}',
+                                                                  targets=['spotify', 'youtube_music']))
+            for i in range(offset, offset + albums)
+        ]
+        offset += albums
+        results['library_convert_album'] = measure(
+            'library_convert_album', calls, max(1, args.concurrency // 4), fakes, COLLECTION_TRACKS)
+
+    if 'library_playlist_first_track' in selected:
+        # Streaming: time until the first converted track of a playlist is available
+        music = make_platform(cached=False)
+
+        def first_track(playlist_id: str) -> bool:
+            events = music.iter_convert_collection(f'https://open.spotify.com/playlist/{playlist_id}',
+                                                   targets=['deezer', 'youtube_music'])
+            try:
+                return any(kind == 'track' for kind, _ in events)
+            finally:
+                events.close()
+
+        playlists = max(1, args.requests // 10)
+        results['library_playlist_first_track'] = measure(
+            'library_playlist_first_track',
+            [lambda playlist_id=f'{i:022d}': first_track(playlist_id) for i in range(offset, offset + playlists)],
+            max(1, args.concurrency // 4), fakes)
+        offset += playlists
+
+    if 'api_convert' in selected or 'api_convert_batch' in selected:
+        import requests
+        from werkzeug.serving import make_server
+        import app as web_app
+
+        # werkzeug logs every request at INFO (app.py's default LOG_LEVEL); those lines would dominate the timings
+        logging.disable(logging.INFO)
+        # The Flask routes use the process-wide platform; swap in the benchmark one
+        music_search._shared_platform = make_platform(cached=False)
+        server = make_server('127.0.0.1', 0, web_app.app, threaded=True)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        base_url = f'http://127.0.0.1:{server.server_port}'
+        local = threading.local()
+
+        def session():
+            if not hasattr(local, 'session'):
+                local.session = requests.Session()
+            return local.session
+
+        def post(path: str, payload: Dict[str, Any]) -> bool:
+            response = session().post(base_url + path, json=payload, timeout=60)
+            return response.status_code == 200
+
+        try:
+            if 'api_convert' in selected:
+                urls = track_urls(args.requests, offset)
+                offset += args.requests
+                results['api_convert'] = measure(
+                    'api_convert', [lambda url=url: post('/api/convert', {'url': url}) for url in urls],
+                    args.concurrency, fakes)
+
+            if 'api_convert_batch' in selected:
+                batches = max(1, args.requests // BATCH_SIZE)
+                urls = track_urls(batches * BATCH_SIZE, offset)
+                offset += len(urls)
+                calls = [
+                    lambda chunk=urls[i:i + BATCH_SIZE]: post('/api/convert/batch', {'urls': chunk})
+                    for i in range(0, len(urls), BATCH_SIZE)
+                ]
+                results['api_convert_batch'] = measure(
+                    'api_convert_batch', calls, max(1, args.concurrency // 4), fakes, BATCH_SIZE)
+        finally:
+            server.shutdown()
+
+    return results
+
+
+def git_revision() -> Optional[str]:
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=REPO_DIR,
+                              capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def compare(current: Dict[str, Any], baseline: Dict[str, Any], threshold: float) -> bool:
+    """Print per-scenario changes against a baseline run; return True if nothing regressed"""
+    ok = True
+    print(f"\nCompared with {baseline['meta'].get('revision') or 'baseline'} "
+          f"({baseline['meta'].get('timestamp')}), threshold {threshold:.0%}:")
+    for name, result in current['scenarios'].items():
+        before = baseline['scenarios'].get(name)
+        if not before:
+            continue
+        p95_change = (result['p95_ms'] - before['p95_ms']) / before['p95_ms'] if before['p95_ms'] else 0.0
+        rps_change = ((result['throughput_rps'] - before['throughput_rps']) / before['throughput_rps']
+                      if before['throughput_rps'] else 0.0)
+        regressed = p95_change > threshold or rps_change < -threshold
+        ok = ok and not regressed
+        print(f"  {name:24} p95 {p95_change:+7.1%}  throughput {rps_change:+7.1%}"
+              f"{'  REGRESSION' if regressed else ''}")
+    return ok
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description='Benchmark MusicPlatform and the API against fake platforms.')
+    parser.add_argument('--requests', type=int, default=200, help='Requests per scenario (default: 200)')
+    parser.add_argument('--concurrency', type=int, default=16, help='Concurrent clients (default: 16)')
+    parser.add_argument('--scenarios', help=f"Comma-separated subset of: {', '.join(SCENARIOS)}")
+    parser.add_argument('--latency', default='all=50', help='Mean upstream latency in ms, e.g. "all=40,spotify=150"')
+    parser.add_argument('--jitter', type=float, default=0.5, help='Log-normal sigma applied to latency')
+    parser.add_argument('--error-rate', help='Fraction of upstream HTTP 500s, e.g. "youtube_music=0.05"')
+    parser.add_argument('--rate-limit', help='Upstream limits as rate:burst, e.g. "spotify=50:100"')
+    parser.add_argument('--client-rate-limits',
+                        help='MusicPlatform rate limits (MUSIC_RATE_LIMITS syntax); default: disabled')
+    parser.add_argument('--output', help='Result file (default: benchmarks/results/bench-<timestamp>.json)')
+    parser.add_argument('--compare', help='Earlier result file to check for regressions')
+    parser.add_argument('--threshold', type=float, default=0.10,
+                        help='Allowed relative p95/throughput change before flagging a regression')
+    args = parser.parse_args(argv)
+
+    profiles = parse_profiles(parse_platform_values(args.latency), parse_platform_values(args.error_rate),
+                              parse_platform_values(args.rate_limit, parse_rate), args.jitter)
+
+    with FakePlatforms(profiles) as fakes:
+        os.environ.update(fakes.environment())
+        scenarios = run_scenarios(args, fakes)
+
+    timestamp = datetime.now(timezone.utc)
+    report = {
+        'meta': {
+            'timestamp': timestamp.isoformat(),
+            'revision': git_revision(),
+            'python': platform_info.python_version(),
+            'requests': args.requests,
+            'concurrency': args.concurrency,
+            'profiles': {name: profile.to_dict() for name, profile in profiles.items()},
+        },
+        'scenarios': scenarios,
+    }
+
+    output = args.output or os.path.join(BENCH_DIR, 'results', f"bench-{timestamp:%Y%m%dT%H%M%SZ}.json")
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, 'w') as f:
+        json.dump(report, f, indent=2)
+    print(f"\nResults written to {output}")
+
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+        if not compare(report, baseline, args.threshold):
+            return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
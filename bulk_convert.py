@@ -0,0 +1,228 @@
+"""Offline bulk conversion of music links.
+
+Reads URLs (or song/artist pairs) from a file or stdin, converts them with
+configurable parallelism and writes one JSON result per line, in input order.
+Progress is checkpointed so an interrupted run resumes where it stopped.
+Memory use is bounded by the number of rows in flight, not the input size.
+
+Usage:
+    python bulk_convert.py links.csv -o results.jsonl --workers 8
+    cat links.txt | python bulk_convert.py - -o results.jsonl
+"""
+import argparse
+import csv
+import io
+import json
+import os
+import sys
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from itertools import islice
+from typing import Any, Dict, Iterator, Optional, TextIO
+
+from dotenv import load_dotenv
+
+# Load environment variables before importing modules that read their settings from them
+load_dotenv()
+
+from music_search import MusicPlatform, get_music_platform  # noqa: E402
+from track import dumps  # noqa: E402
+
+INPUT_FORMATS = ('auto', 'text', 'csv', 'jsonl')
+
+
+def detect_format(path: str, first_line: str) -> str:
+    """Guess the input format from the file extension or the first line"""
+    extension = os.path.splitext(path)[1].lower()
+    if extension in ('.jsonl', '.ndjson'):
+        return 'jsonl'
+    if extension == '.csv':
+        return 'csv'
+    stripped = first_line.strip()
+    if stripped.startswith('{'):
+        return 'jsonl'
+    if ',' in stripped:
+        return 'csv'
+    return 'text'
+
+
+def _row_from_record(record: Dict[str, Any]) -> Dict[str, str]:
+    """Keep the fields the converter understands from a CSV/JSONL record"""
+    record = {str(k).strip().lower(): v for k, v in record.items() if v not in (None, '')}
+    if 'url' in record:
+        return {'url': str(record['url']).strip()}
+    song = record.get('song') or record.get('title')
+    if song and record.get('artist'):
+        return {'song': str(song).strip(), 'artist': str(record['artist']).strip()}
+    return {'error': 'Row needs a url, or song and artist'}
+
+
+def read_rows(stream: TextIO, input_format: str) -> Iterator[Dict[str, str]]:
+    """Yield one input row at a time; blank lines are skipped"""
+    if input_format == 'csv':
+        for record in csv.DictReader(stream):
+            yield _row_from_record(record)
+    elif input_format == 'jsonl':
+        for line in stream:
+            if not line.strip():
+                continue
+            try:
+                record = json.loads(line)
+            except ValueError as e:
+                yield {'error': f'Invalid JSON: {e}'}
+                continue
+            yield _row_from_record(record) if isinstance(record, dict) else {'url': str(record)}
+    else:
+        for line in stream:
+            if line.strip():
+                yield {'url': line.strip()}
+
+
+def convert_row(music: MusicPlatform, row: Dict[str, str]) -> Dict[str, Any]:
+    """Convert one input row"""
+    if 'error' in row:
+        return {'error': row['error']}
+    if 'url' in row:
+        return music.convert(row['url'])
+    return {'alternatives': music.search_track(row['song'], row['artist'])}
+
+
+def load_checkpoint(path: str) -> Dict[str, int]:
+    """Return the saved progress, or a fresh start if there is none"""
+    try:
+        with open(path) as f:
+            checkpoint = json.load(f)
+        return {'rows': int(checkpoint['rows']), 'offset': int(checkpoint['offset'])}
+    except FileNotFoundError:
+        return {'rows': 0, 'offset': 0}
+
+
+def save_checkpoint(path: str, rows: int, offset: int) -> None:
+    """Atomically record how many rows (and output bytes) are complete"""
+    tmp_path = f'{path}.tmp'
+    with open(tmp_path, 'w') as f:
+        json.dump({'rows': rows, 'offset': offset}, f)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, path)
+
+
+def run(stream: TextIO, output_path: str, input_format: str = 'text', workers: int = 4,
+        checkpoint_path: Optional[str] = None, checkpoint_every: int = 100,
+        music: Optional[MusicPlatform] = None) -> int:
+    """Convert every row of ``stream`` into ``output_path``; return the rows processed"""
+    music = music or get_music_platform()
+    checkpoint_path = checkpoint_path or f'{output_path}.checkpoint'
+    progress = load_checkpoint(checkpoint_path)
+    if progress['offset'] and (not os.path.exists(output_path)
+                               or os.path.getsize(output_path) < progress['offset']):
+        # The output the checkpoint refers to is gone: start over instead of skipping rows
+        print(f"{output_path} is missing or shorter than its checkpoint, converting from the start",
+              file=sys.stderr)
+        progress = {'rows': 0, 'offset': 0}
+
+    rows = read_rows(stream, input_format)
+    # Skip rows finished by a previous run, streaming so nothing is held in memory
+    done = sum(1 for _ in islice(rows, progress['rows']))
+    if done < progress['rows']:
+        return 0
+
+    mode = 'r+b' if progress['offset'] else 'wb'
+    with open(output_path, mode) as output, \
+            ThreadPoolExecutor(max_workers=workers, thread_name_prefix='bulk-convert') as executor:
+        # Drop anything written after the last checkpoint so rows are never duplicated
+        output.seek(progress['offset'])
+        output.truncate()
+
+        in_flight = deque()
+        row_number = done
+        processed = 0
+
+        def write_next():
+            nonlocal processed
+            number, row, future = in_flight.popleft()
+            try:
+                result = future.result()
+            except Exception as e:
+                result = {'error': f'Conversion failed: {str(e)}'}
+            line = dumps({'row': number, 'input': row, 'result': result}) + '\n'
+            output.write(line.encode('utf-8'))
+            processed += 1
+            if processed % checkpoint_every == 0:
+                output.flush()
+                save_checkpoint(checkpoint_path, number + 1, output.tell())
+
+        for row in rows:
+            in_flight.append((row_number, row, executor.submit(convert_row, music, row)))
+            row_number += 1
+            # Keep a bounded window of rows in flight; results are written in input order
+            if len(in_flight) >= workers * 2:
+                write_next()
+        while in_flight:
+            write_next()
+
+        output.flush()
+        save_checkpoint(checkpoint_path, row_number, output.tell())
+    return processed
+
+
+class _Chain(io.TextIOBase):
+    """Read-only text stream that yields a peeked first line, then the rest of a stream"""
+
+    def __init__(self, first_line: str, rest: TextIO):
+        self._first_line = first_line
+        self._rest = rest
+
+    def readable(self) -> bool:
+        return True
+
+    def readline(self, size: int = -1) -> str:
+        if self._first_line is not None:
+            line, self._first_line = self._first_line, None
+            return line
+        return self._rest.readline(size)
+
+    def __next__(self) -> str:
+        line = self.readline()
+        if not line:
+            raise StopIteration
+        return line
+
+    def read(self, size: int = -1) -> str:
+        head = self._first_line or ''
+        self._first_line = None
+        return head + self._rest.read(size)
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description='Convert music links in bulk to JSONL.')
+    parser.add_argument('input', help="Input file of URLs or song/artist rows ('-' for stdin)")
+    parser.add_argument('-o', '--output', required=True, help='JSONL file to write results to')
+    parser.add_argument('-f', '--format', choices=INPUT_FORMATS, default='auto',
+                        help='Input format (default: detect from extension or first line)')
+    parser.add_argument('-w', '--workers', type=int, default=4,
+                        help='Rows converted in parallel (default: 4)')
+    parser.add_argument('--checkpoint', help='Checkpoint file (default: <output>.checkpoint)')
+    parser.add_argument('--checkpoint-every', type=int, default=100,
+                        help='Rows between checkpoints (default: 100)')
+    args = parser.parse_args(argv)
+
+    if args.input == '-':
+        stream = io.TextIOWrapper(sys.stdin.buffer, encoding='utf-8')
+    else:
+        stream = open(args.input, encoding='utf-8', newline='')
+    with stream:
+        input_format = args.format
+        if input_format == 'auto':
+            first_line = stream.readline()
+            input_format = detect_format(args.input, first_line)
+            # Put the peeked line back in front of the rest of the stream
+            stream = _Chain(first_line, stream)
+        processed = run(stream, args.output, input_format, args.workers,
+                        args.checkpoint, args.checkpoint_every)
+    print(f"Converted {processed} rows into {args.output}", file=sys.stderr)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,142 @@
+"""Two-tier cache for conversion results.
+
+Entries are keyed by ``(platform, track_id)`` where ``track_id`` is the
+platform's canonical track ID. The first tier is an in-process LRU with a TTL;
+the optional second tier is a SQLite database in WAL mode, so results survive
+restarts and are shared between worker processes on the same host.
+"""
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Optional, Tuple
+
+from sqlite_local import LocalConnection
+from track import dumps, loads
+
+Key = Tuple[str, str]
+
+
+class ConversionCache:
+    def __init__(self, maxsize: int = 1024, ttl: float = 3600,
+                 db_path: Optional[str] = None, db_ttl: Optional[float] = None):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.db_path = db_path
+        self.db_ttl = ttl if db_ttl is None else db_ttl
+
+        self._entries: 'OrderedDict[Key, Tuple[float, Any]]' = OrderedDict()
+        self._lock = threading.Lock()
+        self._db = LocalConnection(db_path) if db_path else None
+        self._counters = {'memory_hits': 0, 'disk_hits': 0, 'misses': 0}
+
+        if self.db_path:
+            self._db.get().execute(
+                'CREATE TABLE IF NOT EXISTS conversions ('
+                ' platform TEXT NOT NULL,'
+                ' track_id TEXT NOT NULL,'
+                ' value TEXT NOT NULL,'
+                ' expires_at REAL NOT NULL,'
+                ' PRIMARY KEY (platform, track_id)'
+                ') WITHOUT ROWID'
+            )
+
+    @classmethod
+    def from_env(cls) -> 'ConversionCache':
+        """Build a cache configured through MUSIC_CACHE_* environment variables"""
+        db_ttl = os.getenv('MUSIC_CACHE_DB_TTL')
+        return cls(
+            maxsize=int(os.getenv('MUSIC_CACHE_SIZE', '1024')),
+            ttl=float(os.getenv('MUSIC_CACHE_TTL', '3600')),
+            db_path=os.getenv('MUSIC_CACHE_DB') or None,
+            db_ttl=float(db_ttl) if db_ttl else None,
+        )
+
+    def get(self, platform: str, track_id: str) -> Optional[Any]:
+        """Return the cached value for a track, or None on a miss.
+
+        Returned values are shared with the cache and must not be mutated.
+        """
+        key = (platform, track_id)
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                if entry[0] > now:
+                    self._entries.move_to_end(key)
+                    self._counters['memory_hits'] += 1
+                    return entry[1]
+                del self._entries[key]
+
+        if self.db_path:
+            row = self._db.get().execute(
+                'SELECT value FROM conversions WHERE platform = ? AND track_id = ? AND expires_at > ?',
+                (platform, track_id, time.time())
+            ).fetchone()
+            if row is not None:
+                value = loads(row[0])
+                self._remember(key, value)
+                with self._lock:
+                    self._counters['disk_hits'] += 1
+                return value
+
+        with self._lock:
+            self._counters['misses'] += 1
+        return None
+
+    def set(self, platform: str, track_id: str, value: Any) -> None:
+        """Store a JSON-serializable value (which may contain tracks) for a track in both tiers"""
+        self._remember((platform, track_id), value)
+        if self.db_path:
+            self._db.get().execute(
+                'INSERT OR REPLACE INTO conversions (platform, track_id, value, expires_at) '
+                'VALUES (?, ?, ?, ?)',
+                (platform, track_id, dumps(value), time.time() + self.db_ttl)
+            )
+
+    def _remember(self, key: Key, value: Any) -> None:
+        """Insert into the in-memory tier, evicting the least recently used entry"""
+        if self.maxsize <= 0:
+            return
+        with self._lock:
+            self._entries[key] = (time.monotonic() + self.ttl, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, platform: str, track_id: Optional[str] = None) -> None:
+        """Drop one track, or every track of a platform when track_id is None"""
+        with self._lock:
+            if track_id is None:
+                for key in [k for k in self._entries if k[0] == platform]:
+                    del self._entries[key]
+            else:
+                self._entries.pop((platform, track_id), None)
+        if self.db_path:
+            if track_id is None:
+                self._db.get().execute('DELETE FROM conversions WHERE platform = ?', (platform,))
+            else:
+                self._db.get().execute(
+                    'DELETE FROM conversions WHERE platform = ? AND track_id = ?',
+                    (platform, track_id)
+                )
+
+    def clear(self) -> None:
+        """Drop every entry from both tiers"""
+        with self._lock:
+            self._entries.clear()
+        if self.db_path:
+            self._db.get().execute('DELETE FROM conversions')
+
+    def purge_expired(self) -> None:
+        """Remove expired rows from the SQLite tier"""
+        if self.db_path:
+            self._db.get().execute('DELETE FROM conversions WHERE expires_at <= ?', (time.time(),))
+
+    def stats(self) -> Dict[str, int]:
+        """Return hit/miss counters and the in-memory size"""
+        with self._lock:
+            stats = dict(self._counters)
+            stats['hits'] = stats['memory_hits'] + stats['disk_hits']
+            stats['size'] = len(self._entries)
+        return stats
@@ -0,0 +1,263 @@
+"""Local catalog of tracks seen on each platform.
+
+Every track resolved from a link or found by a search is recorded under its
+normalized title and artist, together with the matching track on each
+platform. A search for a recording that is already in the catalog can then be
+answered without any upstream call. Records are indexed with SQLite FTS5, so
+titles and artists that differ from the query only in punctuation, case,
+accents or word order still match.
+
+The catalog lives in an in-memory SQLite database unless ``db_path`` is set,
+in which case it is stored in WAL mode, survives restarts and is shared by
+workers on the same host. An in-memory catalog is private to its process: a
+forked worker starts with an empty one.
+"""
+import json
+import os
+import re
+import sqlite3
+import threading
+import time
+import unicodedata
+from contextlib import contextmanager
+from typing import Dict, Iterator, List, Optional, Set
+
+from sqlite_local import LocalConnection
+from track import Track, dumps
+
+_WORD = re.compile(r'\w+')
+# Candidates fetched from the full-text index before scoring
+CANDIDATES = 20
+# Records are pruned to maxsize once every this many writes
+PRUNE_EVERY = 1000
+# Serializes opening a worker's in-memory database after a fork
+_reopen_lock = threading.Lock()
+
+
+def tokens(text: str) -> List[str]:
+    """Split text into lower-case word tokens with accents removed"""
+    text = unicodedata.normalize('NFKD', text.casefold().replace('&', ' and '))
+    return _WORD.findall(''.join(c for c in text if not unicodedata.combining(c)))
+
+
+def similarity(a: Set[str], b: Set[str]) -> float:
+    """Jaccard similarity of two token sets"""
+    if not a and not b:
+        return 1.0
+    return len(a & b) / len(a | b)
+
+
+class TrackCatalog:
+    def __init__(self, maxsize: int = 100000, ttl: float = 30 * 86400,
+                 min_score: float = 0.8, db_path: Optional[str] = None):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.min_score = min_score
+        self.db_path = db_path
+
+        self._db = LocalConnection(db_path) if db_path else None
+        # Without a file every thread of a process shares one in-memory database
+        self._memory_lock = threading.Lock()
+        self._memory: Optional[sqlite3.Connection] = None
+        self._memory_pid: Optional[int] = None
+        self._fts = True
+        self._writes = 0
+
+        if self.maxsize > 0:
+            with self._transaction() as conn:
+                self._create_tables(conn)
+
+    @classmethod
+    def from_env(cls) -> 'TrackCatalog':
+        """Build a catalog configured through MUSIC_CATALOG_* environment variables"""
+        return cls(
+            maxsize=int(os.getenv('MUSIC_CATALOG_SIZE', '100000')),
+            ttl=float(os.getenv('MUSIC_CATALOG_TTL', str(30 * 86400))),
+            min_score=float(os.getenv('MUSIC_CATALOG_MIN_SCORE', '0.8')),
+            db_path=os.getenv('MUSIC_CATALOG_DB') or None,
+        )
+
+    def _create_tables(self, conn: sqlite3.Connection) -> None:
+        conn.execute(
+            'CREATE TABLE IF NOT EXISTS catalog_tracks ('
+            ' id INTEGER PRIMARY KEY,'
+            ' title_key TEXT NOT NULL,'
+            ' artist_key TEXT NOT NULL,'
+            ' title TEXT NOT NULL,'
+            ' artist TEXT NOT NULL,'
+            ' album TEXT,'
+            ' updated_at REAL NOT NULL,'
+            ' UNIQUE (title_key, artist_key)'
+            ')'
+        )
+        conn.execute(
+            'CREATE TABLE IF NOT EXISTS catalog_links ('
+            ' track_id INTEGER NOT NULL,'
+            ' platform TEXT NOT NULL,'
+            ' track TEXT NOT NULL,'
+            ' updated_at REAL NOT NULL,'
+            ' PRIMARY KEY (track_id, platform)'
+            ') WITHOUT ROWID'
+        )
+        try:
+            conn.execute('CREATE VIRTUAL TABLE IF NOT EXISTS catalog_fts USING fts5(title, artist)')
+        except sqlite3.OperationalError:
+            # SQLite built without FTS5: only exact (normalized) matches are answered
+            self._fts = False
+
+    def _memory_db(self) -> sqlite3.Connection:
+        """Return the in-memory database (a new, empty one in a forked worker)"""
+        if self._memory_pid != os.getpid():
+            with _reopen_lock:
+                if self._memory_pid != os.getpid():
+                    # The parent's lock may have been held when the worker was forked
+                    self._memory_lock = threading.Lock()
+                    conn = sqlite3.connect(':memory:', check_same_thread=False, isolation_level=None)
+                    with self._in_transaction(conn):
+                        self._create_tables(conn)
+                    self._memory, self._memory_pid = conn, os.getpid()
+        return self._memory
+
+    @contextmanager
+    def _transaction(self) -> Iterator[sqlite3.Connection]:
+        """Run statements in one transaction on the right connection"""
+        if not self.db_path:
+            memory = self._memory_db()
+            with self._memory_lock:
+                with self._in_transaction(memory) as conn:
+                    yield conn
+        else:
+            with self._in_transaction(self._db.get()) as conn:
+                yield conn
+
+    @staticmethod
+    @contextmanager
+    def _in_transaction(conn: sqlite3.Connection) -> Iterator[sqlite3.Connection]:
+        conn.execute('BEGIN')
+        try:
+            yield conn
+        except BaseException:
+            conn.execute('ROLLBACK')
+            raise
+        conn.execute('COMMIT')
+
+    def add(self, title: str, artist: str, platform: str, track: Track,
+            album: Optional[str] = None) -> None:
+        """Record ``track`` as the recording ``title`` by ``artist`` on a platform"""
+        if self.maxsize <= 0:
+            return
+        title_key, artist_key = ' '.join(tokens(title)), ' '.join(tokens(artist))
+        if not title_key or not artist_key:
+            return
+        now = time.time()
+        with self._transaction() as conn:
+            row = conn.execute(
+                'SELECT id FROM catalog_tracks WHERE title_key = ? AND artist_key = ?',
+                (title_key, artist_key)
+            ).fetchone()
+            if row is None:
+                record_id = conn.execute(
+                    'INSERT INTO catalog_tracks (title_key, artist_key, title, artist, album, updated_at) '
+                    'VALUES (?, ?, ?, ?, ?, ?)',
+                    (title_key, artist_key, title, artist, album, now)
+                ).lastrowid
+                if self._fts:
+                    conn.execute('INSERT INTO catalog_fts (rowid, title, artist) VALUES (?, ?, ?)',
+                                 (record_id, title_key, artist_key))
+            else:
+                record_id = row[0]
+                conn.execute('UPDATE catalog_tracks SET updated_at = ?, album = COALESCE(album, ?) '
+                             'WHERE id = ?', (now, album, record_id))
+            conn.execute(
+                'INSERT OR REPLACE INTO catalog_links (track_id, platform, track, updated_at) '
+                'VALUES (?, ?, ?, ?)',
+                (record_id, platform, dumps(track), now)
+            )
+            self._writes += 1
+            if self._writes % PRUNE_EVERY == 0:
+                self._prune(conn)
+
+    def lookup(self, title: str, artist: str) -> Dict[str, Track]:
+        """Return ``{platform: track}`` for the best confident match of a recording.
+
+        A record matches when its normalized title and artist are equal to the
+        query's, or when both token sets are at least ``min_score`` similar.
+        """
+        if self.maxsize <= 0:
+            return {}
+        title_tokens, artist_tokens = tokens(title), tokens(artist)
+        if not title_tokens or not artist_tokens:
+            return {}
+        with self._transaction() as conn:
+            row = conn.execute(
+                'SELECT id FROM catalog_tracks WHERE title_key = ? AND artist_key = ?',
+                (' '.join(title_tokens), ' '.join(artist_tokens))
+            ).fetchone()
+            record_id = row[0] if row is not None else None
+            if record_id is None and self._fts:
+                record_id = self._best_match(conn, title_tokens, artist_tokens)
+            if record_id is None:
+                return {}
+            rows = conn.execute(
+                'SELECT platform, track FROM catalog_links WHERE track_id = ? AND updated_at > ?',
+                (record_id, time.time() - self.ttl)
+            ).fetchall()
+        # Rows written before tracks were records have no platform key
+        return {platform: Track.from_dict(json.loads(track), platform) for platform, track in rows}
+
+    def get(self, title: str, artist: str, platform: str) -> Optional[Track]:
+        """Return the known track for a recording on one platform, if any"""
+        return self.lookup(title, artist).get(platform)
+
+    def _best_match(self, conn: sqlite3.Connection, title_tokens: List[str],
+                    artist_tokens: List[str]) -> Optional[int]:
+        """Find the most similar record through the full-text index"""
+        query = 'title : ({}) AND artist : ({})'.format(
+            ' OR '.join(f'"{token}"' for token in title_tokens),
+            ' OR '.join(f'"{token}"' for token in artist_tokens),
+        )
+        rows = conn.execute(
+            'SELECT rowid, title, artist FROM catalog_fts WHERE catalog_fts MATCH ? ORDER BY rank LIMIT ?',
+            (query, CANDIDATES)
+        ).fetchall()
+        title_set, artist_set = set(title_tokens), set(artist_tokens)
+        best_id, best_score = None, self.min_score
+        for record_id, title_key, artist_key in rows:
+            score = min(similarity(title_set, set(title_key.split())),
+                        similarity(artist_set, set(artist_key.split())))
+            if score >= best_score:
+                best_id, best_score = record_id, score
+        return best_id
+
+    def _prune(self, conn: sqlite3.Connection) -> None:
+        """Drop expired links, then the least recently updated records beyond maxsize"""
+        conn.execute('DELETE FROM catalog_links WHERE updated_at <= ?', (time.time() - self.ttl,))
+        conn.execute(
+            'DELETE FROM catalog_tracks WHERE id NOT IN (SELECT track_id FROM catalog_links) '
+            'OR id IN (SELECT id FROM catalog_tracks ORDER BY updated_at DESC LIMIT -1 OFFSET ?)',
+            (self.maxsize,)
+        )
+        conn.execute('DELETE FROM catalog_links WHERE track_id NOT IN (SELECT id FROM catalog_tracks)')
+        if self._fts:
+            conn.execute('DELETE FROM catalog_fts WHERE rowid NOT IN (SELECT id FROM catalog_tracks)')
+
+    def prune(self) -> None:
+        """Remove expired entries and records beyond maxsize"""
+        if self.maxsize > 0:
+            with self._transaction() as conn:
+                self._prune(conn)
+
+    def clear(self) -> None:
+        """Drop every record"""
+        if self.maxsize > 0:
+            with self._transaction() as conn:
+                conn.execute('DELETE FROM catalog_links')
+                conn.execute('DELETE FROM catalog_tracks')
+                if self._fts:
+                    conn.execute('DELETE FROM catalog_fts')
+
+    def __len__(self) -> int:
+        if self.maxsize <= 0:
+            return 0
+        with self._transaction() as conn:
+            return conn.execute('SELECT COUNT(*) FROM catalog_tracks').fetchone()[0]
@@ -0,0 +1,45 @@
+importScripts('conversion_cache.js');
+
+// Prefetches in progress, by track key, so a popup opened meanwhile can wait for them
+const pending = new Map();
+
+async function fetchConversion(url) {
+  const response = await fetch(`${API_BASE}/api/convert?url=${encodeURIComponent(url)}`);
+  const data = await response.json();
+  if (!response.ok || data.error) {
+    throw new Error(data.error || `HTTP ${response.status}`);
+  }
+  // Results where any platform's search failed (timeouts and throttling included) are sent with no-store
+  if (!(response.headers.get('Cache-Control') || '').includes('no-store')) {
+    await cacheConversion(url, data);
+  }
+  return data;
+}
+
+function prefetchConversion(url) {
+  const key = trackKey(url);
+  if (!key || pending.has(key)) {
+    return;
+  }
+  const prefetch = getCachedConversion(url)
+    .then((cached) => cached || fetchConversion(url))
+    .catch((error) => {
+      console.error('Prefetch failed:', url, error);
+      return null;
+    })
+    .finally(() => pending.delete(key));
+  pending.set(key, prefetch);
+}
+
+chrome.runtime.onMessage.addListener((message, sender, sendResponse) => {
+  if (message.type === 'VALID_MUSIC_PAGE') {
+    // A track page was opened: convert it before the popup asks for it
+    prefetchConversion(message.url);
+  } else if (message.type === 'CACHED_CONVERSION') {
+    // The cached result, or the one being prefetched; null when neither exists
+    const key = trackKey(message.url);
+    const prefetch = key && pending.get(key);
+    (prefetch || getCachedConversion(message.url)).then(sendResponse);
+    return true;  // respond asynchronously
+  }
+});
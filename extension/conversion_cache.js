@@ -0,0 +1,67 @@
+// Conversion results kept in chrome.storage.local, shared by the background
+// worker (which prefetches them for track pages) and the popup
+
+const API_BASE = 'http://127.0.0.1:5000';
+const CACHE_PREFIX = 'conversion:';
+// Same lifetime as the server's default Cache-Control max-age
+const CACHE_TTL_MS = 60 * 60 * 1000;
+const CACHE_MAX_ENTRIES = 200;
+
+// One key per track, whatever the locale prefix or query parameters of the link
+function trackKey(url) {
+  let match = url.match(/open\.spotify\.com\/(?:intl-[a-z-]+\/)?track\/([a-zA-Z0-9]+)/);
+  if (match) {
+    return `spotify:${match[1]}`;
+  }
+  match = url.match(/deezer\.com\/(?:[a-z]{2}(?:-[a-z]{2})?\/)?track\/([0-9]+)/);
+  if (match) {
+    return `deezer:${match[1]}`;
+  }
+  match = url.match(/music\.youtube\.com\/watch\?(?:.*&)?v=([a-zA-Z0-9_-]+)/);
+  if (match) {
+    return `youtube_music:${match[1]}`;
+  }
+  return null;
+}
+
+function isTrackPage(url) {
+  return trackKey(url) !== null;
+}
+
+async function getCachedConversion(url) {
+  const key = trackKey(url);
+  if (!key) {
+    return null;
+  }
+  const storageKey = CACHE_PREFIX + key;
+  const entry = (await chrome.storage.local.get(storageKey))[storageKey];
+  if (!entry) {
+    return null;
+  }
+  if (Date.now() - entry.storedAt > CACHE_TTL_MS) {
+    await chrome.storage.local.remove(storageKey);
+    return null;
+  }
+  return entry.result;
+}
+
+async function cacheConversion(url, result) {
+  const key = trackKey(url);
+  if (!key) {
+    return;
+  }
+  await chrome.storage.local.set({[CACHE_PREFIX + key]: {result, storedAt: Date.now()}});
+
+  // Drop expired entries, then the oldest ones beyond the size limit
+  const items = await chrome.storage.local.get(null);
+  const entries = Object.entries(items)
+    .filter(([name]) => name.startsWith(CACHE_PREFIX))
+    .sort(([, a], [, b]) => b.storedAt - a.storedAt);
+  const now = Date.now();
+  const stale = entries
+    .filter(([, entry], index) => index >= CACHE_MAX_ENTRIES || now - entry.storedAt > CACHE_TTL_MS)
+    .map(([name]) => name);
+  if (stale.length) {
+    await chrome.storage.local.remove(stale);
+  }
+}
@@ -1,71 +1,115 @@
 document.addEventListener('DOMContentLoaded', () => {
   console.log('Extension popup opened');
   // Get current active tab
-  chrome.tabs.query({active: true, currentWindow: true}, async (tabs) => {
+  chrome.tabs.query({active: true, currentWindow: true}, (tabs) => {
     const currentUrl = tabs[0].url;
     console.log('Current URL:', currentUrl);
-    
-    try {
-      console.log('Sending request to API...');
-      // Call your API endpoint
-      const response = await fetch('http://127.0.0.1:5000/api/convert', {
-        method: 'POST',
-        headers: {
-          'Content-Type': 'application/json',
-        },
-        body: JSON.stringify({ url: currentUrl })
-      });
-      
-      console.log('API Response status:', response.status);
-      
-      if (!response.ok) {
-        throw new Error(`HTTP error! status: ${response.status}`);
-      }
-      
-      const data = await response.json();
-      console.log('API Response data:', data);
-      
-      if (data.error) {
-        console.error('API returned error:', data.error);
-        showError(`Error: ${data.error}`);
-        return;
-      }
-      
-      // Update UI with results
-      updateUI(data);
-    } catch (error) {
-      console.error('Error details:', error);
-      if (error.message.includes('Failed to fetch')) {
-        showError('Cannot connect to the server. Make sure the application is running on localhost:5000');
+
+    // Tracks prefetched by the background worker (or converted before) render
+    // straight from the cache
+    chrome.runtime.sendMessage({type: 'CACHED_CONVERSION', url: currentUrl}, (cached) => {
+      if (cached) {
+        console.log('Cached conversion:', cached);
+        updateUI(cached);
       } else {
-        showError(`Error: ${error.message}`);
+        streamConversion(currentUrl);
       }
-    }
+    });
   });
 });
 
+function streamConversion(currentUrl) {
+  console.log('Opening conversion stream...');
+  // Results arrive as Server-Sent Events: the original track first,
+  // then one event per platform as soon as its search resolves
+  const streamUrl = `${API_BASE}/api/convert/stream?url=${encodeURIComponent(currentUrl)}`;
+  const source = new EventSource(streamUrl);
+  let received = false;
+  // Collected as it streams in, and cached once the conversion is done
+  const result = {original: null, alternatives: {}};
+
+  source.addEventListener('original', (event) => {
+    received = true;
+    const original = JSON.parse(event.data);
+    console.log('Original track:', original);
+    result.original = original;
+    showOriginal(original);
+  });
+
+  source.addEventListener('alternative', (event) => {
+    const alternative = JSON.parse(event.data);
+    console.log('Alternative found:', alternative);
+    result.alternatives[alternative.platform] = alternative;
+    addAlternative(alternative.platform, alternative);
+  });
+
+  source.addEventListener('conversion_error', (event) => {
+    received = true;
+    const data = JSON.parse(event.data);
+    console.error('API returned error:', data.error);
+    source.close();
+    showError(`Error: ${data.error}`);
+  });
+
+  source.addEventListener('done', (event) => {
+    console.log('Conversion complete');
+    source.close();
+    // Results where any platform's search failed (timeouts and throttling included) are not cached
+    if (result.original && JSON.parse(event.data).complete !== false) {
+      cacheConversion(currentUrl, result);
+    }
+    finishUI();
+  });
+
+  source.onerror = (error) => {
+    console.error('Error details:', error);
+    source.close();
+    if (!received) {
+      showError('Cannot connect to the server. Make sure the application is running on localhost:5000');
+    } else {
+      finishUI();
+    }
+  };
+}
+
 function updateUI(data) {
-  // Hide loading, show content
+  // Render a complete (non-streamed) conversion result
+  showOriginal(data.original);
+  Object.entries(data.alternatives).forEach(([platform, info]) => {
+    addAlternative(platform, info);
+  });
+  finishUI();
+}
+
+function showOriginal(original) {
+  // Show content while alternatives are still being looked up
   document.getElementById('loading').style.display = 'none';
   document.getElementById('content').style.display = 'block';
-  
+
   // Update song info
-  document.getElementById('songTitle').textContent = data.original.song;
-  document.getElementById('artistName').textContent = data.original.artist;
-  
+  document.getElementById('songTitle').textContent = original.song;
+  document.getElementById('artistName').textContent = original.artist;
+
   // Clear existing links
+  document.getElementById('links').innerHTML = '';
+  document.getElementById('searching').style.display = 'block';
+}
+
+function addAlternative(platform, info) {
+  const link = document.createElement('a');
+  link.href = info.url;
+  link.className = `platform-link ${platform}`;
+  link.textContent = `Open in ${formatPlatformName(platform)}`;
+  link.target = '_blank';
+  document.getElementById('links').appendChild(link);
+}
+
+function finishUI() {
+  document.getElementById('searching').style.display = 'none';
   const linksContainer = document.getElementById('links');
-  linksContainer.innerHTML = '';
-  
-  // Add alternative platform links
-  Object.entries(data.alternatives).forEach(([platform, info]) => {
-    const link = document.createElement('a');
-    link.href = info.url;
-    link.className = `platform-link ${platform}`;
-    link.textContent = `Open in ${formatPlatformName(platform)}`;
-    link.target = '_blank';
-    linksContainer.appendChild(link);
-  });
+  if (!linksContainer.hasChildNodes() && document.getElementById('content').style.display === 'block') {
+    linksContainer.textContent = 'No other platforms found for this track.';
+  }
 }
 
 function showError(message) {
@@ -83,4 +127,4 @@ function formatPlatformName(platform) {
     'youtube_music': 'YouTube Music'
   };
   return names[platform] || platform;
-} 
\ No newline at end of file
+}
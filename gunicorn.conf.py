@@ -0,0 +1,30 @@
+"""Gunicorn settings for serving the app in production (see wsgi.py)"""
+import glob
+import os
+import tempfile
+
+from dotenv import load_dotenv
+
+# Read .env first, so the defaults below do not override it
+load_dotenv()
+
+bind = os.getenv('GUNICORN_BIND', '0.0.0.0:8000')
+workers = int(os.getenv('WEB_CONCURRENCY', '4'))
+# Requests mostly wait on upstream APIs, so each worker serves several at once
+worker_class = 'gthread'
+threads = int(os.getenv('GUNICORN_THREADS', '8'))
+# Long enough for a conversion that waits out MUSIC_SEARCH_TIMEOUT
+timeout = int(os.getenv('GUNICORN_TIMEOUT', '60'))
+# Import the app and warm up its clients once, before the workers are forked
+preload_app = True
+
+# Let /metrics add up the counters of every worker (see metrics.py)
+os.environ.setdefault('MUSIC_METRICS_DIR', os.path.join(tempfile.gettempdir(), 'music-metrics'))
+
+
+def on_starting(server):
+    """Forget the metrics saved by a previous run of the server"""
+    directory = os.environ['MUSIC_METRICS_DIR']
+    if directory:
+        for path in glob.glob(os.path.join(directory, '*.json')):
+            os.remove(path)
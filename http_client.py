@@ -0,0 +1,131 @@
+"""Shared HTTP transport used by the platform handlers.
+
+Every platform gets its own ``requests.Session`` built from the same settings:
+keep-alive connection pools sized per host, connect/read timeouts applied to
+every request, and retries with exponential backoff for idempotent calls.
+All settings can be overridden through environment variables.
+"""
+import os
+import threading
+from typing import Dict, Optional, Tuple
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+CONNECT_TIMEOUT = float(os.getenv('HTTP_CONNECT_TIMEOUT', '3.05'))
+READ_TIMEOUT = float(os.getenv('HTTP_READ_TIMEOUT', '10'))
+# Number of distinct hosts whose pools are kept alive per session
+POOL_CONNECTIONS = int(os.getenv('HTTP_POOL_CONNECTIONS', '10'))
+# Maximum number of keep-alive connections kept per host
+POOL_MAXSIZE = int(os.getenv('HTTP_POOL_MAXSIZE', '20'))
+MAX_RETRIES = int(os.getenv('HTTP_MAX_RETRIES', '3'))
+BACKOFF_FACTOR = float(os.getenv('HTTP_BACKOFF_FACTOR', '0.3'))
+# 429s are not retried: they go straight back to the caller, which reports the platform as throttled
+RETRY_STATUSES = (500, 502, 503, 504)
+# Longest wait (seconds) honoured from a Retry-After header; well below MUSIC_SEARCH_TIMEOUT
+MAX_RETRY_AFTER = float(os.getenv('HTTP_MAX_RETRY_AFTER', '1'))
+
+# Per-host pool sizes for hosts that need more than POOL_MAXSIZE connections
+HOST_POOL_SIZES: Dict[str, int] = {
+    'https://api.deezer.com': int(os.getenv('HTTP_POOL_MAXSIZE_DEEZER', str(POOL_MAXSIZE))),
+}
+
+
+def default_timeout() -> Tuple[float, float]:
+    """Return the (connect, read) timeout applied to every request"""
+    return (CONNECT_TIMEOUT, READ_TIMEOUT)
+
+
+class TimeoutSession(requests.Session):
+    """Session that applies a default timeout to requests that do not set one"""
+
+    def __init__(self, timeout: Tuple[float, float]):
+        super().__init__()
+        self.timeout = timeout
+
+    def request(self, method, url, **kwargs):
+        kwargs.setdefault('timeout', self.timeout)
+        return super().request(method, url, **kwargs)
+
+
+class CappedRetry(Retry):
+    """Retry that leaves 429s alone and waits at most MAX_RETRY_AFTER for a Retry-After"""
+
+    # urllib3 otherwise retries any 429 that has a Retry-After header, whatever the status list says
+    RETRY_AFTER_STATUS_CODES = frozenset({503})
+
+    def get_retry_after(self, response):
+        retry_after = super().get_retry_after(response)
+        return min(retry_after, MAX_RETRY_AFTER) if retry_after is not None else None
+
+
+def create_session(timeout: Optional[Tuple[float, float]] = None,
+                   pool_connections: int = POOL_CONNECTIONS,
+                   pool_maxsize: int = POOL_MAXSIZE,
+                   max_retries: int = MAX_RETRIES,
+                   backoff_factor: float = BACKOFF_FACTOR,
+                   host_pool_sizes: Optional[Dict[str, int]] = None) -> requests.Session:
+    """Build a pooled keep-alive session with timeouts and retries"""
+    retry = CappedRetry(
+        total=max_retries,
+        connect=max_retries,
+        read=max_retries,
+        status=max_retries,
+        backoff_factor=backoff_factor,
+        status_forcelist=RETRY_STATUSES,
+        allowed_methods=frozenset(['GET', 'HEAD', 'OPTIONS']),
+        respect_retry_after_header=True,
+        raise_on_status=False,
+    )
+    session = TimeoutSession(timeout or default_timeout())
+    adapter = HTTPAdapter(pool_connections=pool_connections, pool_maxsize=pool_maxsize,
+                          max_retries=retry)
+    session.mount('https://', adapter)
+    session.mount('http://', adapter)
+
+    sizes = HOST_POOL_SIZES if host_pool_sizes is None else host_pool_sizes
+    for prefix, size in sizes.items():
+        if size != pool_maxsize:
+            session.mount(prefix, HTTPAdapter(pool_connections=1, pool_maxsize=size,
+                                              max_retries=retry))
+    return session
+
+
+_sessions: Dict[str, requests.Session] = {}
+_sessions_lock = threading.Lock()
+
+
+def get_session(name: str = 'default', **options) -> requests.Session:
+    """Return the process-wide session for ``name``, creating it on first use.
+
+    ``options`` are passed to :func:`create_session` when the session is built.
+    """
+    try:
+        return _sessions[name]
+    except KeyError:
+        pass
+    with _sessions_lock:
+        if name not in _sessions:
+            _sessions[name] = create_session(**options)
+        return _sessions[name]
+
+
+def _forget_connections() -> None:
+    """Drop the pooled connections a forked worker inherited from its parent"""
+    global _sessions_lock
+    _sessions_lock = threading.Lock()
+    for session in _sessions.values():
+        session.close()
+
+
+# Clients built before a fork keep their sessions, but not the parent's sockets
+os.register_at_fork(after_in_child=_forget_connections)
+
+
+def close_sessions() -> None:
+    """Close all shared sessions and drop their pooled connections"""
+    with _sessions_lock:
+        for session in _sessions.values():
+            session.close()
+        _sessions.clear()
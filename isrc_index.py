@@ -0,0 +1,122 @@
+"""Local ISRC index of known platform tracks.
+
+Maps an ISRC (International Standard Recording Code) to the track found for
+that recording on each platform. Entries are added as conversions happen, so
+repeat conversions of a recording can skip the platform searches entirely.
+The index lives in memory, optionally backed by a SQLite database in WAL mode
+that survives restarts and is shared by workers on the same host.
+"""
+import json
+import os
+import threading
+from collections import OrderedDict
+from typing import Dict, Iterable, Optional
+
+from sqlite_local import LocalConnection
+from track import Track, dumps
+
+
+class ISRCIndex:
+    def __init__(self, maxsize: int = 100000, db_path: Optional[str] = None):
+        self.maxsize = maxsize
+        self.db_path = db_path
+
+        self._entries: 'OrderedDict[str, Dict[str, Track]]' = OrderedDict()
+        self._lock = threading.Lock()
+        self._db = LocalConnection(db_path) if db_path else None
+
+        if self.db_path:
+            self._db.get().execute(
+                'CREATE TABLE IF NOT EXISTS isrc_tracks ('
+                ' isrc TEXT NOT NULL,'
+                ' platform TEXT NOT NULL,'
+                ' track TEXT NOT NULL,'
+                ' PRIMARY KEY (isrc, platform)'
+                ') WITHOUT ROWID'
+            )
+
+    @classmethod
+    def from_env(cls) -> 'ISRCIndex':
+        """Build an index configured through MUSIC_ISRC_* environment variables"""
+        return cls(
+            maxsize=int(os.getenv('MUSIC_ISRC_INDEX_SIZE', '100000')),
+            db_path=os.getenv('MUSIC_ISRC_DB') or None,
+        )
+
+    @staticmethod
+    def normalize(isrc: str) -> str:
+        """Return the canonical form of an ISRC (upper case, no dashes or spaces)"""
+        return isrc.replace('-', '').replace(' ', '').upper()
+
+    def lookup(self, isrc: str, platforms: Optional[Iterable[str]] = None) -> Dict[str, Track]:
+        """Return every known ``{platform: track}`` for a recording.
+
+        When the in-memory entry lacks any of ``platforms`` (default: any
+        platform at all), the database is read as well, since other workers
+        may have indexed them, and its rows are merged into the entry.
+        """
+        isrc = self.normalize(isrc)
+        with self._lock:
+            tracks = dict(self._entries.get(isrc) or {})
+            if tracks:
+                self._entries.move_to_end(isrc)
+        if not self.db_path or (platforms is not None and all(p in tracks for p in platforms)):
+            return tracks
+
+        rows = self._db.get().execute(
+            'SELECT platform, track FROM isrc_tracks WHERE isrc = ?', (isrc,)
+        ).fetchall()
+        # Rows written before tracks named their platform get it from the row
+        stored = {platform: Track.from_dict(json.loads(track), platform)
+                  for platform, track in rows if platform not in tracks}
+        if stored:
+            with self._lock:
+                entry = self._entries.setdefault(isrc, {})
+                for platform, track in stored.items():
+                    entry.setdefault(platform, track)
+                self._entries.move_to_end(isrc)
+                self._evict()
+            tracks.update(stored)
+        return tracks
+
+    def get(self, isrc: str, platform: str) -> Optional[Track]:
+        """Return the known track for a recording on one platform, if any"""
+        return self.lookup(isrc, (platform,)).get(platform)
+
+    def add(self, isrc: str, platform: str, track: Track) -> None:
+        """Record the track that represents a recording on a platform"""
+        isrc = self.normalize(isrc)
+        with self._lock:
+            self._entries.setdefault(isrc, {})[platform] = track
+            self._entries.move_to_end(isrc)
+            self._evict()
+        if self.db_path:
+            self._db.get().execute(
+                'INSERT OR REPLACE INTO isrc_tracks (isrc, platform, track) VALUES (?, ?, ?)',
+                (isrc, platform, dumps(track))
+            )
+
+    def _evict(self) -> None:
+        """Drop least recently used recordings beyond maxsize (caller holds the lock)"""
+        while len(self._entries) > self.maxsize:
+            self._entries.popitem(last=False)
+
+    def remove(self, isrc: str, platform: Optional[str] = None) -> None:
+        """Forget one platform's track for a recording, or the whole recording"""
+        isrc = self.normalize(isrc)
+        with self._lock:
+            if platform is None:
+                self._entries.pop(isrc, None)
+            else:
+                self._entries.get(isrc, {}).pop(platform, None)
+        if self.db_path:
+            if platform is None:
+                self._db.get().execute('DELETE FROM isrc_tracks WHERE isrc = ?', (isrc,))
+            else:
+                self._db.get().execute(
+                    'DELETE FROM isrc_tracks WHERE isrc = ? AND platform = ?', (isrc, platform)
+                )
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._entries)
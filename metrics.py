@@ -0,0 +1,316 @@
+"""In-process metrics exposed in the Prometheus text format.
+
+Counters and histograms are kept in memory per process and rendered by the
+``/metrics`` endpoint. Platform calls are also reported to timing hooks, so
+other code can observe every upstream call without patching MusicPlatform.
+
+Behind a pre-forking server each worker has its own counters, and a scrape
+reaches a random worker. With ``MUSIC_METRICS_DIR`` set, every forked worker
+saves its metrics to ``<pid>.json`` in that directory every
+``MUSIC_METRICS_INTERVAL`` seconds, and ``render()`` adds the saved metrics of
+the other processes to its own. Files of exited workers are kept, so the
+totals never go backwards while the server runs.
+"""
+import atexit
+import json
+import logging
+import os
+import threading
+import time
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+logger = logging.getLogger(__name__)
+
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+# Directory shared by the worker processes of one server (see render)
+METRICS_DIR = os.getenv('MUSIC_METRICS_DIR') or None
+# Seconds between two saves of a worker's metrics
+SNAPSHOT_INTERVAL = float(os.getenv('MUSIC_METRICS_INTERVAL', '5'))
+
+# Upper bounds (seconds) of the latency histogram buckets
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+def _escape(value: Any) -> str:
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _format_labels(names: Sequence[str], values: Sequence[Any], extra: str = '') -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return '{' + ','.join(pairs) + '}' if pairs else ''
+
+
+def _format_value(value: float) -> str:
+    return repr(float(value)) if value != int(value) else str(int(value))
+
+
+class Counter:
+    """Monotonically increasing count per label combination"""
+    type = 'counter'
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._values: Dict[Tuple, float] = {}
+        self._lock = threading.Lock()
+
+    def inc(self, amount: float = 1, **labels: Any) -> None:
+        key = tuple(labels[name] for name in self.labelnames)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def value(self, **labels: Any) -> float:
+        return self._values.get(tuple(labels[name] for name in self.labelnames), 0)
+
+    def snapshot(self) -> List[list]:
+        with self._lock:
+            return [[list(key), value] for key, value in self._values.items()]
+
+    def reset(self) -> None:
+        self._lock = threading.Lock()
+        self._values = {}
+
+    def samples(self, snapshots: Sequence[List[list]] = ()) -> List[str]:
+        with self._lock:
+            values = dict(self._values)
+        for snapshot in snapshots:
+            for key, value in snapshot:
+                key = tuple(key)
+                values[key] = values.get(key, 0) + value
+        return [f'{self.name}{_format_labels(self.labelnames, key)} {_format_value(value)}'
+                for key, value in sorted(values.items())]
+
+
+class Histogram:
+    """Distribution of observed values (e.g. latencies) per label combination"""
+    type = 'histogram'
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = (),
+                 buckets: Sequence[float] = DEFAULT_BUCKETS):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(sorted(buckets))
+        # Label values -> [per-bucket counts..., +Inf count, sum]
+        self._values: Dict[Tuple, List[float]] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, **labels: Any) -> None:
+        key = tuple(labels[name] for name in self.labelnames)
+        with self._lock:
+            counts = self._values.get(key)
+            if counts is None:
+                counts = self._values[key] = [0] * (len(self.buckets) + 2)
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    counts[i] += 1
+            counts[-2] += 1
+            counts[-1] += value
+
+    def count(self, **labels: Any) -> int:
+        counts = self._values.get(tuple(labels[name] for name in self.labelnames))
+        return int(counts[-2]) if counts else 0
+
+    def snapshot(self) -> List[list]:
+        with self._lock:
+            return [[list(key), list(counts)] for key, counts in self._values.items()]
+
+    def reset(self) -> None:
+        self._lock = threading.Lock()
+        self._values = {}
+
+    def samples(self, snapshots: Sequence[List[list]] = ()) -> List[str]:
+        with self._lock:
+            values = {key: list(counts) for key, counts in self._values.items()}
+        for snapshot in snapshots:
+            for key, counts in snapshot:
+                key = tuple(key)
+                if key not in values:
+                    values[key] = list(counts)
+                elif len(counts) == len(values[key]):
+                    values[key] = [a + b for a, b in zip(values[key], counts)]
+        lines = []
+        for key, counts in sorted(values.items()):
+            for bound, count in zip(self.buckets, counts):
+                labels = _format_labels(self.labelnames, key, f'le="{_format_value(bound)}"')
+                lines.append(f'{self.name}_bucket{labels} {int(count)}')
+            labels = _format_labels(self.labelnames, key, 'le="+Inf"')
+            lines.append(f'{self.name}_bucket{labels} {int(counts[-2])}')
+            labels = _format_labels(self.labelnames, key)
+            lines.append(f'{self.name}_sum{labels} {_format_value(counts[-1])}')
+            lines.append(f'{self.name}_count{labels} {int(counts[-2])}')
+        return lines
+
+
+class Registry:
+    """Collection of metrics rendered together"""
+
+    def __init__(self):
+        self._metrics: Dict[str, Any] = {}
+        self._lock = threading.Lock()
+
+    def _register(self, metric: Any) -> Any:
+        with self._lock:
+            existing = self._metrics.get(metric.name)
+            if existing is not None:
+                return existing
+            self._metrics[metric.name] = metric
+            return metric
+
+    def counter(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> Counter:
+        return self._register(Counter(name, documentation, labelnames))
+
+    def histogram(self, name: str, documentation: str, labelnames: Sequence[str] = (),
+                  buckets: Sequence[float] = DEFAULT_BUCKETS) -> Histogram:
+        return self._register(Histogram(name, documentation, labelnames, buckets))
+
+    def snapshot(self) -> Dict[str, List[list]]:
+        """Return every metric's values in a JSON-serializable form"""
+        with self._lock:
+            metrics = list(self._metrics.values())
+        return {metric.name: metric.snapshot() for metric in metrics}
+
+    def reset(self) -> None:
+        """Drop every recorded value (e.g. the parent's, in a forked worker)"""
+        self._lock = threading.Lock()
+        for metric in list(self._metrics.values()):
+            metric.reset()
+
+    def render(self, snapshots: Sequence[Dict[str, List[list]]] = ()) -> str:
+        """Return every metric in the Prometheus text exposition format.
+
+        Values from ``snapshots`` (other processes' ``snapshot()``) are added
+        to this registry's own.
+        """
+        with self._lock:
+            metrics = list(self._metrics.values())
+        lines = []
+        for metric in metrics:
+            lines.append(f'# HELP {metric.name} {metric.documentation}')
+            lines.append(f'# TYPE {metric.name} {metric.type}')
+            lines.extend(metric.samples([snapshot.get(metric.name, []) for snapshot in snapshots]))
+        return '\n'.join(lines) + '\n'
+
+
+REGISTRY = Registry()
+
+PLATFORM_CALL_SECONDS = REGISTRY.histogram(
+    'music_platform_call_seconds', 'Latency of upstream platform calls',
+    ('platform', 'operation', 'outcome'))
+CACHE_LOOKUPS = REGISTRY.counter(
+    'music_cache_lookups_total', 'Conversion cache and ISRC index lookups', ('cache', 'result'))
+RATE_LIMITED = REGISTRY.counter(
+    'music_rate_limited_total', 'Platform calls refused by the local rate limiter', ('platform',))
+CIRCUIT_OPENED = REGISTRY.counter(
+    'music_circuit_opened_total', 'Times a platform circuit breaker opened after repeated failures', ('platform',))
+CIRCUIT_REJECTED = REGISTRY.counter(
+    'music_circuit_rejected_total', 'Platform calls skipped while the circuit breaker was open', ('platform',))
+SEARCH_TIMEOUTS = REGISTRY.counter(
+    'music_search_timeouts_total', 'Platform searches abandoned after the search deadline', ('platform',))
+HEDGED_CALLS = REGISTRY.counter(
+    'music_hedged_calls_total', 'Platform calls slower than the platform p95 that got a duplicate request',
+    ('platform', 'operation'))
+HEDGE_WINS = REGISTRY.counter(
+    'music_hedge_wins_total', 'Hedged platform calls answered first by the duplicate request',
+    ('platform', 'operation'))
+HTTP_REQUEST_SECONDS = REGISTRY.histogram(
+    'music_http_request_seconds', 'Latency of API requests', ('endpoint', 'method', 'status'))
+
+# Callables invoked as hook(platform, operation, outcome, seconds) after every platform call
+_timing_hooks: List[Callable[[str, str, str, float], None]] = []
+
+
+def add_timing_hook(hook: Callable[[str, str, str, float], None]) -> None:
+    """Register a callable to be told about every upstream platform call"""
+    _timing_hooks.append(hook)
+
+
+def remove_timing_hook(hook: Callable[[str, str, str, float], None]) -> None:
+    _timing_hooks.remove(hook)
+
+
+def outcome(result: Dict[str, Any]) -> str:
+    """Classify a platform result as ok, not_found, throttled or error"""
+    if 'error' not in result:
+        return 'ok'
+    if result.get('status'):
+        return result['status']
+    if result['error'] == 'No results found':
+        return 'not_found'
+    return 'error'
+
+
+def record_platform_call(platform: str, operation: str, result_outcome: str, seconds: float) -> None:
+    """Record the latency and outcome of one upstream platform call"""
+    PLATFORM_CALL_SECONDS.observe(seconds, platform=platform, operation=operation, outcome=result_outcome)
+    logger.debug("%s %s finished in %.3fs: %s", platform, operation, seconds, result_outcome)
+    for hook in list(_timing_hooks):
+        try:
+            hook(platform, operation, result_outcome, seconds)
+        except Exception:
+            logger.exception("Timing hook %r failed", hook)
+
+
+def record_cache_lookup(cache: str, hit: bool) -> None:
+    CACHE_LOOKUPS.inc(cache=cache, result='hit' if hit else 'miss')
+
+
+def save_snapshot(directory: Optional[str] = None) -> None:
+    """Write this process's metrics to ``<directory>/<pid>.json``"""
+    directory = directory or METRICS_DIR
+    path = os.path.join(directory, f'{os.getpid()}.json')
+    with open(path + '.tmp', 'w') as f:
+        json.dump(REGISTRY.snapshot(), f)
+    os.replace(path + '.tmp', path)
+
+
+def load_snapshots(directory: Optional[str] = None) -> List[Dict[str, List[list]]]:
+    """Read the metrics saved by every other process"""
+    directory = directory or METRICS_DIR
+    own = f'{os.getpid()}.json'
+    snapshots = []
+    for name in os.listdir(directory):
+        if not name.endswith('.json') or name == own:
+            continue
+        try:
+            with open(os.path.join(directory, name)) as f:
+                snapshots.append(json.load(f))
+        except (OSError, ValueError):
+            logger.warning("Skipping unreadable metrics file %s", name)
+    return snapshots
+
+
+def render() -> str:
+    """Render this process's metrics, plus the other workers' when MUSIC_METRICS_DIR is set"""
+    if METRICS_DIR is None:
+        return REGISTRY.render()
+    return REGISTRY.render(load_snapshots(METRICS_DIR))
+
+
+def _save() -> None:
+    try:
+        save_snapshot()
+    except OSError as e:
+        logger.warning("Could not save metrics to %s: %s", METRICS_DIR, e)
+
+
+def _save_periodically() -> None:
+    while True:
+        time.sleep(SNAPSHOT_INTERVAL)
+        _save()
+
+
+def _after_fork_in_child() -> None:
+    # The parent saved its own values before forking, so the worker starts from zero
+    REGISTRY.reset()
+    threading.Thread(target=_save_periodically, name='metrics-snapshots', daemon=True).start()
+
+
+if METRICS_DIR is not None:
+    os.makedirs(METRICS_DIR, exist_ok=True)
+    os.register_at_fork(before=_save, after_in_child=_after_fork_in_child)
+    atexit.register(_save)
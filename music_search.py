@@ -1,345 +1,1043 @@
 import os
-import requests
-from urllib.parse import urlparse, quote
-import re
-from typing import Dict, Optional, Any
-import spotipy
-from spotipy.oauth2 import SpotifyClientCredentials
-from ytmusicapi import YTMusic
-import applemusicpy
-from yandex_music import Client as YandexMusicClient
-from dotenv import load_dotenv
-
-load_dotenv()  # Load environment variables from .env file
+import logging
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, as_completed, TimeoutError as FuturesTimeoutError
+from types import ModuleType
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Any, Tuple, Union
+import platforms
+from platforms import PLATFORM_NAMES
+from cache import ConversionCache
+from catalog import TrackCatalog, similarity, tokens
+from isrc_index import ISRCIndex
+from metrics import (CIRCUIT_OPENED, CIRCUIT_REJECTED, HEDGE_WINS, HEDGED_CALLS, RATE_LIMITED, SEARCH_TIMEOUTS,
+                     outcome, record_cache_lookup, record_platform_call)
+from track import Result, Track
+from throttle import CircuitBreaker, Hedger, SingleFlight, TokenBucket, rate_limits_from_env
+from url_router import UnsupportedUrlError, canonical_key, parse_url
+
+logger = logging.getLogger(__name__)
+
+# Total deadline (seconds) for a concurrent search_track fan-out
+DEFAULT_SEARCH_TIMEOUT = float(os.getenv('MUSIC_SEARCH_TIMEOUT', '10'))
+# Upper bound on platform searches running at the same time per MusicPlatform
+DEFAULT_SEARCH_WORKERS = int(os.getenv('MUSIC_SEARCH_WORKERS', '16'))
+# Upper bound on batch items being looked up / searched at the same time
+DEFAULT_BATCH_WORKERS = int(os.getenv('MUSIC_BATCH_WORKERS', '4'))
+# Maximum number of IDs accepted by Spotify's multi-track endpoint
+SPOTIFY_BATCH_SIZE = 50
+# Longest a call waits (seconds) for its platform's rate limiter before giving up
+DEFAULT_RATE_LIMIT_WAIT = float(os.getenv('MUSIC_RATE_LIMIT_WAIT', '1.0'))
+# Consecutive failures after which a platform is skipped, and for how long (seconds)
+DEFAULT_BREAKER_FAILURES = int(os.getenv('MUSIC_BREAKER_FAILURES', '5'))
+DEFAULT_BREAKER_COOLDOWN = float(os.getenv('MUSIC_BREAKER_COOLDOWN', '30'))
+# Seconds before building a client is tried again after it failed
+DEFAULT_CLIENT_RETRY_BACKOFF = float(os.getenv('MUSIC_CLIENT_RETRY_BACKOFF', '30'))
+# Call outcomes that count against / reset a platform's circuit breaker
+BREAKER_FAILURES = ('error', 'throttled', 'timeout')
+BREAKER_SUCCESSES = ('ok', 'not_found')
+# Search outcomes a conversion may be cached with; any other error is transient
+CACHEABLE_OUTCOMES = ('ok', 'not_found', 'disabled', 'unconfigured')
+# Album and playlist tracks being resolved ahead of the one streamed next
+DEFAULT_COLLECTION_WINDOW = int(os.getenv('MUSIC_COLLECTION_WINDOW', '16'))
+# Title similarity a target album's track needs to stand in for a source track
+ALBUM_MATCH_MIN_SCORE = float(os.getenv('MUSIC_ALBUM_MATCH_MIN_SCORE', '0.8'))
+# Platforms whose slow calls get one duplicate request, and the extra load allowed (fraction of calls)
+DEFAULT_HEDGE_PLATFORMS = tuple(name.strip() for name in os.getenv('MUSIC_HEDGE_PLATFORMS', '').split(',')
+                                if name.strip())
+DEFAULT_HEDGE_BUDGET = float(os.getenv('MUSIC_HEDGE_BUDGET', '0.1'))
+# Single-track calls, which are cheap to duplicate; paged collection calls are never hedged
+HEDGED_OPERATIONS = ('lookup', 'isrc', 'search')
 
 class MusicPlatform:
-    def __init__(self):
-        # Initialize API clients
-        self._init_spotify()
-        self._init_ytmusic()
-        self._init_apple_music()
-        self._init_yandex_music()
+    # Client attribute name -> method that builds it on first use
+    _client_factories = {
+        'spotify': '_init_spotify',
+        'ytmusic': '_init_ytmusic',
+        'apple_music': '_init_apple_music',
+        'yandex': '_init_yandex_music',
+    }
+    # Platform name -> client attribute name (Deezer needs no client)
+    _client_names = {
+        'spotify': 'spotify',
+        'apple_music': 'apple_music',
+        'youtube_music': 'ytmusic',
+        'yandex_music': 'yandex',
+    }
+
+    def __init__(self, search_timeout: float = DEFAULT_SEARCH_TIMEOUT,
+                 max_workers: int = DEFAULT_SEARCH_WORKERS,
+                 batch_workers: int = DEFAULT_BATCH_WORKERS,
+                 cache: Optional[ConversionCache] = None,
+                 isrc_index: Optional[ISRCIndex] = None,
+                 catalog: Optional[TrackCatalog] = None,
+                 rate_limits: Optional[Dict[str, Tuple[float, int]]] = None,
+                 rate_limit_wait: float = DEFAULT_RATE_LIMIT_WAIT,
+                 enabled_platforms: Optional[Iterable[str]] = None,
+                 breaker_failures: int = DEFAULT_BREAKER_FAILURES,
+                 breaker_cooldown: float = DEFAULT_BREAKER_COOLDOWN,
+                 collection_window: int = DEFAULT_COLLECTION_WINDOW,
+                 hedge_platforms: Iterable[str] = DEFAULT_HEDGE_PLATFORMS,
+                 hedge_budget: float = DEFAULT_HEDGE_BUDGET,
+                 client_retry_backoff: float = DEFAULT_CLIENT_RETRY_BACKOFF):
+        # Platforms that may be called; adapters (and their SDKs) are imported on first use
+        self.enabled_platforms = frozenset(
+            enabled_platforms if enabled_platforms is not None else platforms.enabled_from_env()
+        )
+
+        # API clients are built lazily on first access and reused afterwards
+        self._clients: Dict[str, Any] = {}
+        self._client_locks = {name: threading.Lock() for name in self._client_factories}
+        # Client name -> when building it last failed; failed builds are retried after the backoff
+        self._client_failures: Dict[str, float] = {}
+        self.client_retry_backoff = client_retry_backoff
+
+        # Bounded pool shared by all concurrent search_track calls
+        self.search_timeout = search_timeout
+        self._search_executor = ThreadPoolExecutor(
+            max_workers=max_workers, thread_name_prefix='music-search'
+        )
+        # Separate pool for batch items, which themselves fan out on the search pool
+        self._batch_executor = ThreadPoolExecutor(
+            max_workers=batch_workers, thread_name_prefix='music-batch'
+        )
+        self.collection_window = max(1, collection_window)
+
+        # Calls to these platforms that outlast their p95 get one duplicate request
+        unknown = set(hedge_platforms) - set(PLATFORM_NAMES)
+        if unknown:
+            raise ValueError(f"Unknown platforms to hedge: {', '.join(sorted(unknown))}")
+        self._hedgers = {platform: Hedger(hedge_budget) for platform in hedge_platforms}
+        # Room for every search's first attempt and its hedge
+        self._hedge_executor = ThreadPoolExecutor(
+            max_workers=2 * max_workers, thread_name_prefix='music-hedge'
+        )
+
+        # Conversion results keyed by (platform, canonical track id)
+        self.cache = cache if cache is not None else ConversionCache.from_env()
+        # Known platform tracks per recording, filled as conversions happen
+        self.isrc_index = isrc_index if isrc_index is not None else ISRCIndex.from_env()
+        # Known platform tracks per (title, artist), used to answer searches locally
+        self.catalog = catalog if catalog is not None else TrackCatalog.from_env()
+
+        # Per-platform token buckets ({platform: (requests per second, burst)})
+        # and coalescing of identical in-flight upstream calls
+        if rate_limits is None:
+            rate_limits = rate_limits_from_env()
+        self._rate_limiters = {
+            platform: TokenBucket(rate, burst) for platform, (rate, burst) in rate_limits.items() if rate > 0
+        }
+        self.rate_limit_wait = rate_limit_wait
+        self._single_flight = SingleFlight()
+        # Platforms that keep failing are skipped for a cool-down instead of called
+        self._breakers = {
+            platform: CircuitBreaker(breaker_failures, breaker_cooldown) for platform in PLATFORM_NAMES
+        }
         
         # Platform URL patterns
+        # Platform name (as returned by url_router.parse_url) -> track handler
         self.platforms = {
-            'deezer.page.link': self.handle_deezer,
-            'deezer.com': self.handle_deezer,         # https://www.deezer.com/track/12345
-            'open.spotify.com': self.handle_spotify,   # https://open.spotify.com/track/12345
-            'music.apple.com': self.handle_apple_music,# https://music.apple.com/us/album/song/12345
-            'music.youtube.com': self.handle_youtube_music, # https://music.youtube.com/watch?v=12345
-            'music.yandex.com': self.handle_yandex_music,  # https://music.yandex.com/album/12345/track/67890
-            'music.yandex.ru': self.handle_yandex_music    # https://music.yandex.ru/album/12345/track/67890
+            'deezer': self.handle_deezer,                # https://www.deezer.com/track/12345
+            'spotify': self.handle_spotify,              # https://open.spotify.com/track/12345
+            'apple_music': self.handle_apple_music,      # https://music.apple.com/us/album/name/123?i=456
+            'youtube_music': self.handle_youtube_music,  # https://music.youtube.com/watch?v=12345
+            'yandex_music': self.handle_yandex_music     # https://music.yandex.ru/album/12345/track/67890
         }
 
+    def _get_client(self, name: str) -> Any:
+        """Return the named API client, building it on first use.
+
+        A build that raises is not cached: None is returned until
+        ``client_retry_backoff`` seconds have passed, then the build is retried.
+        """
+        try:
+            return self._clients[name]
+        except KeyError:
+            pass
+        with self._client_locks[name]:
+            if name in self._clients:
+                return self._clients[name]
+            failed_at = self._client_failures.get(name)
+            if failed_at is not None and time.monotonic() - failed_at < self.client_retry_backoff:
+                return None
+            try:
+                client = getattr(self, self._client_factories[name])()
+            except Exception:
+                logger.warning("Could not initialize the %s client, retrying in %ss",
+                               name, self.client_retry_backoff, exc_info=True)
+                self._client_failures[name] = time.monotonic()
+                return None
+            self._client_failures.pop(name, None)
+            self._clients[name] = client
+            return client
+
+    def reset_client(self, name: Optional[str] = None) -> None:
+        """Drop a cached API client (or all of them) so it is rebuilt on next use.
+
+        Use this when a client's credentials or token have expired.
+        """
+        names = [name] if name else list(self._client_factories)
+        for client_name in names:
+            if client_name not in self._client_factories:
+                raise ValueError(f"Unknown client: {client_name}")
+            with self._client_locks[client_name]:
+                self._clients.pop(client_name, None)
+                self._client_failures.pop(client_name, None)
+
+    def _reset_on_auth_error(self, name: str, error: Exception) -> None:
+        """Rebuild a client on its next use if the upstream rejected its credentials"""
+        if getattr(error, 'http_status', None) == 401 or type(error).__name__ == 'UnauthorizedError':
+            self.reset_client(name)
+
+    def _upstream_error(self, platform: str, message: str, error: Exception) -> Dict[str, Any]:
+        """Build the error result for a failed upstream call to ``platform``"""
+        client = self._client_names.get(platform)
+        if client is not None:
+            self._reset_on_auth_error(client, error)
+        status = getattr(error, 'http_status', None)
+        if status is None:
+            status = getattr(getattr(error, 'response', None), 'status_code', None)
+        return {"error": f"{message}: {str(error)}", "status": 'throttled' if status == 429 else 'error'}
+
+    def _throttled(self, platform: str) -> Dict[str, Any]:
+        """Error result for a call refused by the local rate limiter"""
+        name = PLATFORM_NAMES.get(platform, platform)
+        return {"error": f"{name} is being rate limited, try again later", "status": "throttled"}
+
+    def _unavailable(self, platform: str) -> Dict[str, Any]:
+        """Error result for a call skipped because the platform's circuit breaker is open"""
+        name = PLATFORM_NAMES.get(platform, platform)
+        return {"error": f"{name} is temporarily unavailable, try again later", "status": "unavailable"}
+
+    def _call_platform(self, platform: str, key: Tuple, call: Callable[..., Dict[str, Any]],
+                       *args: Any) -> Dict[str, Any]:
+        """Make an upstream call through the platform's circuit breaker and rate limiter.
+
+        Concurrent calls with the same ``key`` share one upstream request and
+        its result, which must therefore not be mutated. Each upstream call is
+        timed and recorded under an operation named after the key's first
+        element (``lookup`` for track links). Calls to platforms with hedging
+        on may send a duplicate request; see ``_hedged_call``.
+        """
+        operation = 'lookup' if key[0] in ('track', 'shortlink') else key[0]
+
+        def limited():
+            if not self._breakers[platform].allow():
+                CIRCUIT_REJECTED.inc(platform=platform)
+                return self._unavailable(platform)
+            if not self._acquire(platform):
+                return self._throttled(platform)
+            start = time.perf_counter()
+            try:
+                result = self._hedged_call(platform, operation, call, *args)
+            except Exception:
+                self._record_call(platform, operation, 'error', time.perf_counter() - start)
+                raise
+            self._record_call(platform, operation, outcome(result), time.perf_counter() - start)
+            return result
+        return self._single_flight.do((platform,) + key, limited)
+
+    def _hedged_call(self, platform: str, operation: str, call: Callable[..., Dict[str, Any]],
+                     *args: Any) -> Dict[str, Any]:
+        """Make an upstream call, sending a duplicate if it outlasts the platform's observed p95.
+
+        Hedges are sent only for platforms with hedging on, for single-track
+        operations, within the platform's hedge budget and rate limit. The
+        first attempt to answer with a track (or "not found") wins. The other
+        one is cancelled if it has not started yet; otherwise it finishes in
+        the background and its result is dropped.
+        """
+        hedger = self._hedgers.get(platform)
+        if hedger is None or operation not in HEDGED_OPERATIONS:
+            return call(*args)
+
+        def attempt():
+            started = time.perf_counter()
+            result = call(*args)
+            if outcome(result) in BREAKER_SUCCESSES:
+                hedger.record(time.perf_counter() - started)
+            return result
+
+        delay = hedger.start()
+        if delay is None:
+            return attempt()
+        first = self._hedge_executor.submit(attempt)
+        try:
+            return first.result(timeout=delay)
+        except FuturesTimeoutError:
+            pass
+        limiter = self._rate_limiters.get(platform)
+        if not hedger.take() or (limiter is not None and not limiter.acquire()):
+            return first.result()
+
+        HEDGED_CALLS.inc(platform=platform, operation=operation)
+        hedge = self._hedge_executor.submit(attempt)
+        result, error = None, None
+        for future in as_completed((first, hedge)):
+            try:
+                result = future.result()
+            except Exception as e:
+                error = e
+                continue
+            if outcome(result) in BREAKER_SUCCESSES:
+                if future is hedge:
+                    HEDGE_WINS.inc(platform=platform, operation=operation)
+                (hedge if future is first else first).cancel()
+                return result
+        if result is None:
+            raise error
+        return result
+
+    def _record_call(self, platform: str, operation: str, result_outcome: str, seconds: float) -> None:
+        """Record an upstream call in the metrics and the platform's circuit breaker"""
+        record_platform_call(platform, operation, result_outcome, seconds)
+        self._record_outcome(platform, result_outcome, seconds)
+
+    def _record_outcome(self, platform: str, result_outcome: str, seconds: float) -> None:
+        """Feed a call's outcome to the platform's circuit breaker"""
+        # An answer that arrives after the search deadline already counted as a timeout
+        if result_outcome in BREAKER_SUCCESSES and seconds <= self.search_timeout:
+            self._breakers[platform].record_success()
+        elif result_outcome in BREAKER_FAILURES and self._breakers[platform].record_failure():
+            CIRCUIT_OPENED.inc(platform=platform)
+            logger.warning("%s keeps failing, skipping it for %ss",
+                           PLATFORM_NAMES[platform], self._breakers[platform].cooldown)
+
+    def _acquire(self, platform: str) -> bool:
+        """Wait (briefly) for the platform's rate limiter; False means we are throttled"""
+        limiter = self._rate_limiters.get(platform)
+        if limiter is None or limiter.acquire(self.rate_limit_wait):
+            return True
+        RATE_LIMITED.inc(platform=platform)
+        return False
+
+    @property
+    def spotify(self):
+        return self._get_client('spotify')
+
+    @property
+    def ytmusic(self):
+        return self._get_client('ytmusic')
+
+    @property
+    def apple_music(self):
+        return self._get_client('apple_music')
+
+    @property
+    def yandex(self):
+        return self._get_client('yandex')
+
     def _init_spotify(self):
         """Initialize Spotify client"""
-        try:
-            client_id = os.getenv('SPOTIFY_CLIENT_ID')
-            client_secret = os.getenv('SPOTIFY_CLIENT_SECRET')
-            if client_id and client_secret:
-                self.spotify = spotipy.Spotify(
-                    client_credentials_manager=SpotifyClientCredentials(
-                        client_id=client_id,
-                        client_secret=client_secret
-                    )
-                )
-            else:
-                self.spotify = None
-        except Exception:
-            self.spotify = None
+        return self._create_client('spotify')
 
     def _init_ytmusic(self):
         """Initialize YouTube Music client"""
-        try:
-            print("Initializing YouTube Music client...")
-            self.ytmusic = YTMusic()
-            print("YouTube Music client initialized successfully")
-        except Exception as e:
-            print(f"Error initializing YouTube Music client: {str(e)}")
-            self.ytmusic = None
+        return self._create_client('youtube_music')
 
     def _init_apple_music(self):
         """Initialize Apple Music client"""
-        try:
-            key_id = os.getenv('APPLE_KEY_ID')
-            team_id = os.getenv('APPLE_TEAM_ID')
-            secret_key = os.getenv('APPLE_SECRET_KEY')
-            if all([key_id, team_id, secret_key]):
-                self.apple_music = applemusicpy.AppleMusic(secret_key, key_id, team_id)
-            else:
-                self.apple_music = None
-        except Exception:
-            self.apple_music = None
+        return self._create_client('apple_music')
 
     def _init_yandex_music(self):
         """Initialize Yandex Music client"""
+        return self._create_client('yandex_music')
+
+    def _adapter(self, platform: str) -> ModuleType:
+        """Return the platform's adapter module, importing it (and its SDK) on first use"""
+        return platforms.load(platform)
+
+    def _create_client(self, platform: str) -> Any:
+        """Build a platform's API client; disabled or unconfigured platforms are never imported.
+
+        Raises when the SDK fails to build the client; see ``_get_client``.
+        """
+        if platform not in self.enabled_platforms or not platforms.is_configured(platform):
+            return None
+        client = self._adapter(platform).create_client()
+        logger.debug("%s client initialized", PLATFORM_NAMES[platform])
+        return client
+
+    def warm_up(self) -> None:
+        """Import the adapters and build the clients of every usable platform ahead of the first request.
+
+        A pre-forking server should call this before its workers start, so
+        they inherit the imported SDKs, the clients and their access tokens.
+        """
+        for platform in self.enabled_platforms:
+            if platforms.is_configured(platform):
+                adapter = self._adapter(platform)
+                client = self._platform_client(platform)
+                if client is not None and hasattr(adapter, 'warm_up'):
+                    try:
+                        adapter.warm_up(client)
+                    except Exception:
+                        logger.warning("Could not warm up the %s client", PLATFORM_NAMES[platform], exc_info=True)
+
+    def _platform_client(self, platform: str) -> Any:
+        """Return the API client a platform's adapter calls with (None for Deezer)"""
+        client = self._client_names.get(platform)
+        return self._get_client(client) if client is not None else None
+
+    def _configuration_error(self, platform: str) -> Optional[Dict[str, Any]]:
+        """Return the error result if a platform is disabled or lacks credentials, else None"""
+        name = PLATFORM_NAMES[platform]
+        if platform not in self.enabled_platforms:
+            return {"error": f"{name} is disabled", "status": "disabled"}
+        if not platforms.is_configured(platform):
+            return {"error": f"{name} API credentials not configured", "status": "unconfigured"}
+        return None
+
+    def _client_error(self, platform: str) -> Optional[Dict[str, Any]]:
+        """Return the error result if a platform cannot be called, else None"""
+        error = self._configuration_error(platform)
+        if error is None and platform in self._client_names and not self._platform_client(platform):
+            # Configured but the client failed to build: transient, retried after the backoff
+            error = {"error": f"{PLATFORM_NAMES[platform]} API client could not be initialized, try again later",
+                     "status": "unavailable"}
+        return error
+
+    def _skip_reason(self, platform: str) -> Optional[Dict[str, Any]]:
+        """Return the result to use instead of calling a platform that cannot answer now, else None"""
+        error = self._configuration_error(platform)
+        if error is None and self._breakers[platform].is_open:
+            CIRCUIT_REJECTED.inc(platform=platform)
+            error = self._unavailable(platform)
+        return error
+
+    def _adapter_call(self, platform: str, function: str, failure: str, *args: Any) -> Any:
+        """Call an adapter function with the platform's client, turning failures into error results"""
+        error = self._client_error(platform)
+        if error is not None:
+            return error
         try:
-            token = os.getenv('YANDEX_MUSIC_TOKEN')
-            if token:
-                self.yandex = YandexMusicClient(token).init()
-            else:
-                self.yandex = None
-        except Exception:
-            self.yandex = None
+            result = getattr(self._adapter(platform), function)(self._platform_client(platform), *args)
+        except Exception as e:
+            return self._upstream_error(platform, failure, e)
+        return result if result is not None else {"error": "No results found"}
 
-    def get_song_info(self, url: str) -> Dict[str, Any]:
+    def get_song_info(self, url: str) -> Result:
         """Extract song information from any supported music platform URL"""
+        # Reject malformed and unsupported links before any outbound call
         try:
-            domain = urlparse(url).netloc.replace('www.', '')
-            base_domain = next((k for k in self.platforms.keys() if k in domain), None)
-            
-            if base_domain:
-                return self.platforms[base_domain](url)
-            else:
-                return {"error": "Unsupported platform"}
+            parsed = parse_url(url)
+        except UnsupportedUrlError as e:
+            return {"error": str(e)}
+        if parsed.kind not in ('track', 'shortlink'):
+            return {"error": f"{parsed.kind.capitalize()} links are not supported"}
+
+        try:
+            song_info = self._call_platform(parsed.platform, (parsed.kind, parsed.id),
+                                            self.platforms[parsed.platform], url)
         except Exception as e:
             return {"error": f"Failed to process URL: {str(e)}"}
+        if 'error' not in song_info:
+            self._index_song_info(song_info)
+        return song_info
+
+    def canonical_track_key(self, url: str) -> Optional[Tuple[str, str]]:
+        """Return (platform, track id) for a track URL without any network access.
+
+        Returns None for URLs whose track ID is not in the URL itself, such as
+        Deezer short links.
+        """
+        return canonical_key(url)
+
+    def convert(self, url: str, targets: Optional[Iterable[str]] = None) -> Dict[str, Any]:
+        """Look up a track URL and search for it on the ``targets`` platforms (default: all).
+
+        The source platform itself is never searched. Returns
+        ``{'original': song_info, 'alternatives': search_results}`` or an
+        error dict. Complete results are cached by canonical track ID; the
+        returned dicts may be shared with the cache and must not be mutated.
+        """
+        result: Dict[str, Any] = {'alternatives': {}}
+        for name, info in self.iter_convert(url, targets):
+            if name == 'original':
+                if 'error' in info:
+                    return info
+                result['original'] = info
+            else:
+                result['alternatives'][name] = info
+        # Keep the platform order stable regardless of which search finished first
+        result['alternatives'] = self._in_platform_order(result['alternatives'])
+        return result
+
+    @staticmethod
+    def is_complete(search_results: Dict[str, Result]) -> bool:
+        """Whether search results are worth caching: every platform found a track, found
+        nothing, or is switched off (none failed, timed out, was throttled or skipped)"""
+        return all(outcome(result) in CACHEABLE_OUTCOMES for result in search_results.values())
+
+    @staticmethod
+    def _in_platform_order(results: Dict[str, Any]) -> Dict[str, Any]:
+        """Return ``results`` ordered like PLATFORM_NAMES"""
+        return {name: results[name] for name in PLATFORM_NAMES if name in results}
+
+    def _search_targets(self, song_info: Dict[str, Any], targets: Optional[Iterable[str]]) -> List[str]:
+        """Platforms to search for a source track: the targets (default: all) except the source itself"""
+        return [name for name in self._searches(targets if targets is not None else "all")
+                if name != song_info['platform']]
+
+    def iter_convert(self, url: str,
+                     targets: Optional[Iterable[str]] = None) -> Iterator[Tuple[str, Dict[str, Any]]]:
+        """Yield ``('original', song_info)`` followed by ``(platform, result)`` pairs as they resolve.
 
-    def handle_deezer(self, url: str) -> Dict[str, Any]:
+        If the song info lookup fails, only ``('original', {'error': ...})`` is
+        yielded. Cached results are replayed immediately, and only target
+        platforms missing from the cache are searched.
+        """
+        key = self.canonical_track_key(url)
+        cached = self._cached_conversion(key)
+        if cached is not None:
+            song_info, known = cached['original'], cached['alternatives']
+        else:
+            song_info, known = self.get_song_info(url), {}
+        yield 'original', song_info
+        if 'error' in song_info:
+            return
+
+        wanted = self._search_targets(song_info, targets)
+        for name in wanted:
+            if name in known:
+                yield name, known[name]
+        missing = [name for name in wanted if name not in known]
+        if not missing:
+            return
+
+        search_results = {}
+        for name, result in self.iter_search_track(song_info.title, song_info.artist, missing,
+                                                   isrc=song_info.isrc):
+            search_results[name] = result
+            yield name, result
+
+        if key is not None and self.is_complete(search_results):
+            alternatives = self._in_platform_order({**known, **search_results})
+            self.cache.set(*key, {'original': song_info, 'alternatives': alternatives})
+
+    def _cached_conversion(self, key: Optional[Tuple[str, str]]) -> Optional[Dict[str, Any]]:
+        """Return the cached conversion of a track, recording the lookup in the metrics"""
+        if key is None:
+            return None
+        cached = self.cache.get(*key)
+        # Entries stored before results were Track records are treated as misses
+        if cached is not None and not isinstance(cached['original'], Track):
+            cached = None
+        record_cache_lookup('conversion', cached is not None)
+        return cached
+
+    def _index_song_info(self, song_info: Track) -> None:
+        """Record a resolved source track in the catalog and the ISRC index"""
+        self.catalog.add(song_info.title, song_info.artist, song_info.platform, song_info, song_info.album)
+        if song_info.isrc:
+            self.isrc_index.add(song_info.isrc, song_info.platform, song_info)
+
+    def _index_result(self, name: str, song_name: str, artist_name: str,
+                      isrc: Optional[str], result: Track, exact: bool = False) -> None:
+        """Record a search result under the query that found it and under its own title.
+
+        The result is filed under the source ``isrc`` only when it is known to
+        be the same recording: it came from an ISRC lookup (``exact``), or it
+        carries that ISRC or none at all. A text-search match with a different
+        ISRC is another recording and is filed under its own ISRC only.
+        """
+        self.catalog.add(song_name, artist_name, name, result)
+        self.catalog.add(result.title, result.artist, name, result, result.album)
+        isrc = ISRCIndex.normalize(isrc) if isrc else None
+        own_isrc = ISRCIndex.normalize(result.isrc) if result.isrc else None
+        if isrc and (exact or own_isrc is None or own_isrc == isrc):
+            self.isrc_index.add(isrc, name, result)
+        if own_isrc and own_isrc != isrc:
+            self.isrc_index.add(own_isrc, name, result)
+
+    def handle_deezer(self, url: str) -> Result:
         """Handle Deezer links"""
-        try:
-            response = requests.get(url, allow_redirects=True)
-            final_url = response.url
-            
-            track_id = final_url.split('track/')[1].split('?')[0]
-            api_url = f"https://api.deezer.com/track/{track_id}"
-            
-            response = requests.get(api_url)
-            data = response.json()
-            
-            return {
-                'platform': 'deezer',
-                'song': data['title'],
-                'artist': data['artist']['name'],
-                'album': data['album']['title'],
-                'url': data['link']
-            }
-        except Exception as e:
-            return {"error": f"Deezer processing failed: {str(e)}"}
+        return self._adapter_call('deezer', 'get_track', "Deezer processing failed", url)
 
-    def handle_spotify(self, url: str) -> Dict[str, Any]:
+    def handle_spotify(self, url: str) -> Result:
         """Handle Spotify links"""
-        if not self.spotify:
-            return {"error": "Spotify API credentials not configured"}
-        
-        try:
-            track_id = url.split('track/')[1].split('?')[0]
-            track = self.spotify.track(track_id)
-            
-            return {
-                'platform': 'spotify',
-                'song': track['name'],
-                'artist': track['artists'][0]['name'],
-                'album': track['album']['name'],
-                'url': track['external_urls']['spotify']
-            }
-        except Exception as e:
-            return {"error": f"Spotify processing failed: {str(e)}"}
+        return self._adapter_call('spotify', 'get_track', "Spotify processing failed", url)
 
-    def handle_apple_music(self, url: str) -> Dict[str, Any]:
+    def handle_apple_music(self, url: str) -> Result:
         """Handle Apple Music links"""
-        if not self.apple_music:
-            return {"error": "Apple Music API credentials not configured"}
-        
-        try:
-            # Extract song ID from URL (format: https://music.apple.com/us/album/song-name/id)
-            song_id = url.split('/')[-1]
-            result = self.apple_music.song(song_id)
-            
-            return {
-                'platform': 'apple_music',
-                'song': result['data'][0]['attributes']['name'],
-                'artist': result['data'][0]['attributes']['artistName'],
-                'album': result['data'][0]['attributes']['albumName'],
-                'url': result['data'][0]['attributes']['url']
-            }
-        except Exception as e:
-            return {"error": f"Apple Music processing failed: {str(e)}"}
+        return self._adapter_call('apple_music', 'get_track', "Apple Music processing failed", url)
 
-    def handle_youtube_music(self, url: str) -> Dict[str, Any]:
+    def handle_youtube_music(self, url: str) -> Result:
         """Handle YouTube Music links"""
-        if not self.ytmusic:
-            return {"error": "YouTube Music API not initialized"}
-        
-        try:
-            # Extract video ID from URL
-            video_id = url.split('watch?v=')[1].split('&')[0]
-            result = self.ytmusic.get_song(video_id)
-            
-            return {
-                'platform': 'youtube_music',
-                'song': result['title'],
-                'artist': result['artists'][0]['name'],
-                'album': result.get('album', {}).get('name', 'N/A'),
-                'url': f"https://music.youtube.com/watch?v={video_id}"
-            }
-        except Exception as e:
-            return {"error": f"YouTube Music processing failed: {str(e)}"}
+        return self._adapter_call('youtube_music', 'get_track', "YouTube Music processing failed", url)
 
-    def handle_yandex_music(self, url: str) -> Dict[str, Any]:
+    def handle_yandex_music(self, url: str) -> Result:
         """Handle Yandex Music links"""
-        if not self.yandex:
-            return {"error": "Yandex Music API credentials not configured"}
-        
+        return self._adapter_call('yandex_music', 'get_track', "Yandex Music processing failed", url)
+
+    def _get_tracks(self, platform: str, ids: List[str]) -> List[Result]:
+        """Look many tracks up with one multi-ID call, reporting errors per track"""
+        name = PLATFORM_NAMES[platform]
+        error = self._client_error(platform)
+        if error is None and not self._breakers[platform].allow():
+            CIRCUIT_REJECTED.inc(platform=platform)
+            error = self._unavailable(platform)
+        if error is None and not self._acquire(platform):
+            error = self._throttled(platform)
+        if error is not None:
+            return [error] * len(ids)
+
+        start = time.perf_counter()
         try:
-            # Extract track and album IDs from URL
-            # Format: https://music.yandex.ru/album/{album_id}/track/{track_id}
-            album_id = url.split('album/')[1].split('/')[0]
-            track_id = url.split('track/')[1].split('?')[0]
-            
-            track = self.yandex.tracks([f"{track_id}:{album_id}"])[0]
-            
-            return {
-                'platform': 'yandex_music',
-                'song': track.title,
-                'artist': track.artists[0].name,
-                'album': track.albums[0].title,
-                'url': f"https://music.yandex.ru/album/{album_id}/track/{track_id}"
-            }
+            infos = self._adapter(platform).get_tracks(self._platform_client(platform), ids)
         except Exception as e:
-            return {"error": f"Yandex Music processing failed: {str(e)}"}
+            error = self._upstream_error(platform, f"{name} processing failed", e)
+            self._record_call(platform, 'batch_lookup', outcome(error), time.perf_counter() - start)
+            return [error] * len(ids)
+        self._record_call(platform, 'batch_lookup', 'ok', time.perf_counter() - start)
+        return [info or {"error": f"{name} processing failed: track not found"} for info in infos]
 
-    def search_track(self, song_name: str, artist_name: str, platform: str = "all") -> Dict[str, Any]:
-        """Search for a track across all platforms or a specific platform"""
-        results = {}
-        
-        if platform == "all" or platform == "deezer":
-            results['deezer'] = self._search_deezer(song_name, artist_name)
-            
-        if platform == "all" or platform == "spotify":
-            results['spotify'] = self._search_spotify(song_name, artist_name)
-            
-        if platform == "all" or platform == "apple_music":
-            results['apple_music'] = self._search_apple_music(song_name, artist_name)
-            
-        if platform == "all" or platform == "youtube_music":
-            results['youtube_music'] = self._search_youtube_music(song_name, artist_name)
-            
-        if platform == "all" or platform == "yandex_music":
-            results['yandex_music'] = self._search_yandex_music(song_name, artist_name)
-            
+    def get_song_info_many(self, urls: List[str]) -> List[Result]:
+        """Extract song information for many URLs, in input order.
+
+        URLs are grouped by platform so Spotify and Yandex Music tracks are
+        fetched with their multi-ID endpoints; everything else is looked up
+        individually with bounded concurrency. Errors are reported per item.
+        """
+        results: List[Optional[Dict[str, Any]]] = [None] * len(urls)
+        by_platform: Dict[str, Dict[str, List[int]]] = {'spotify': {}, 'yandex_music': {}}
+        singles: List[int] = []
+
+        for index, url in enumerate(urls):
+            key = self.canonical_track_key(url)
+            if key is not None and key[0] in by_platform:
+                by_platform[key[0]].setdefault(key[1], []).append(index)
+            else:
+                singles.append(index)
+
+        def fill(indexes: List[int], info: Dict[str, Any]) -> None:
+            for index in indexes:
+                results[index] = info
+
+        spotify_ids = list(by_platform['spotify'])
+        for start in range(0, len(spotify_ids), SPOTIFY_BATCH_SIZE):
+            chunk = spotify_ids[start:start + SPOTIFY_BATCH_SIZE]
+            for track_id, info in zip(chunk, self._get_tracks('spotify', chunk)):
+                fill(by_platform['spotify'][track_id], info)
+
+        yandex_ids = list(by_platform['yandex_music'])
+        if yandex_ids:
+            for track_id, info in zip(yandex_ids, self._get_tracks('yandex_music', yandex_ids)):
+                fill(by_platform['yandex_music'][track_id], info)
+
+        for index, info in zip(singles, self._batch_executor.map(self.get_song_info, [urls[i] for i in singles])):
+            results[index] = info
+        # Singles were indexed by get_song_info; batch-fetched tracks are indexed here
+        for index in set(range(len(urls))) - set(singles):
+            if 'error' not in results[index]:
+                self._index_song_info(results[index])
         return results
 
-    def _search_deezer(self, song_name: str, artist_name: str) -> Dict[str, Any]:
-        """Search on Deezer"""
-        try:
-            # Create a more specific search query for tracks
-            query = quote(f'track:"{song_name}" artist:"{artist_name}"')
-            search_url = "https://api.deezer.com/search/track"  # Use track-specific endpoint
-            response = requests.get(search_url, params={
-                'q': query,
-                'strict': 'on'  # Enable strict mode for more accurate results
-            })
-            data = response.json()
-            
-            if not data.get('data'):
-                return {"error": "No results found"}
-                
-            track = data['data'][0]
-            return {
-                'title': track['title'],
-                'artist': track['artist']['name'],
-                'album': track['album']['title'],
-                'url': track['link']
+    def convert_many(self, urls: List[str], targets: Optional[Iterable[str]] = None) -> List[Dict[str, Any]]:
+        """Convert many track URLs, returning results (or per-item errors) in input order.
+
+        Only the ``targets`` platforms (default: all) are searched, never an
+        item's own source platform.
+        """
+        targets = list(targets) if targets is not None else None
+        results: List[Optional[Dict[str, Any]]] = [None] * len(urls)
+        keys = [self.canonical_track_key(url) for url in urls]
+
+        song_infos: Dict[int, Dict[str, Any]] = {}
+        known: Dict[int, Dict[str, Any]] = {}
+        lookups: List[int] = []
+        for index, key in enumerate(keys):
+            cached = self._cached_conversion(key)
+            if cached is not None:
+                song_infos[index], known[index] = cached['original'], cached['alternatives']
+            else:
+                lookups.append(index)
+
+        for index, song_info in zip(lookups, self.get_song_info_many([urls[i] for i in lookups])):
+            song_infos[index] = song_info
+
+        # Search each distinct recording once, bounded by the batch pool
+        searches = {}
+        queries: Dict[int, Tuple] = {}
+        for index in range(len(urls)):
+            song_info = song_infos[index]
+            if 'error' in song_info:
+                results[index] = song_info
+                continue
+            missing = tuple(name for name in self._search_targets(song_info, targets)
+                            if name not in known.get(index, {}))
+            queries[index] = query = (song_info.title, song_info.artist, song_info.isrc, missing)
+            if missing and query not in searches:
+                searches[query] = self._batch_executor.submit(
+                    self.search_track, query[0], query[1], missing, isrc=query[2]
+                )
+
+        for index, query in queries.items():
+            song_info = song_infos[index]
+            search_results = searches[query].result() if query in searches else {}
+            alternatives = {**known.get(index, {}), **search_results}
+            wanted = self._search_targets(song_info, targets)
+            results[index] = {
+                'original': song_info,
+                'alternatives': {name: alternatives[name] for name in wanted if name in alternatives},
             }
-        except Exception as e:
-            return {"error": f"Search failed: {str(e)}"}
+            if search_results and keys[index] is not None and self.is_complete(search_results):
+                self.cache.set(*keys[index], {'original': song_info,
+                                              'alternatives': self._in_platform_order(alternatives)})
+        return results
 
-    def _search_spotify(self, song_name: str, artist_name: str) -> Dict[str, Any]:
-        """Search on Spotify"""
-        if not self.spotify:
-            return {"error": "Spotify API credentials not configured"}
-        
+    def is_collection(self, url: str) -> bool:
+        """Whether a URL points at an album or a playlist (no network access)"""
         try:
-            query = f"track:{song_name} artist:{artist_name}"
-            results = self.spotify.search(q=query, type='track', limit=1)
-            
-            if not results['tracks']['items']:
-                return {"error": "No results found"}
-            
-            track = results['tracks']['items'][0]
-            return {
-                'title': track['name'],
-                'artist': track['artists'][0]['name'],
-                'album': track['album']['name'],
-                'url': track['external_urls']['spotify']
-            }
-        except Exception as e:
-            return {"error": f"Search failed: {str(e)}"}
+            return parse_url(url).kind in ('album', 'playlist')
+        except UnsupportedUrlError:
+            return False
 
-    def _search_apple_music(self, song_name: str, artist_name: str) -> Dict[str, Any]:
-        """Search on Apple Music"""
-        if not self.apple_music:
-            return {"error": "Apple Music API credentials not configured"}
-        
+    def get_collection(self, url: str) -> Dict[str, Any]:
+        """Fetch an album or playlist with song info for every track.
+
+        The whole tracklist is fetched with one paged call to the source
+        platform, and every track is recorded in the catalog.
+        """
         try:
-            query = f"{song_name} {artist_name}"
-            results = self.apple_music.search(query, types=['songs'], limit=1)
-            
-            if not results['songs']['data']:
-                return {"error": "No results found"}
-            
-            track = results['songs']['data'][0]['attributes']
-            return {
-                'title': track['name'],
-                'artist': track['artistName'],
-                'album': track['albumName'],
-                'url': track['url']
-            }
-        except Exception as e:
-            return {"error": f"Search failed: {str(e)}"}
+            parsed = parse_url(url)
+        except UnsupportedUrlError as e:
+            return {"error": str(e)}
+        name = PLATFORM_NAMES[parsed.platform]
+        if parsed.kind not in platforms.COLLECTION_KINDS.get(parsed.platform, ()):
+            return {"error": f"{name} {parsed.kind} links are not supported"}
 
-    def _search_youtube_music(self, song_name: str, artist_name: str) -> Dict[str, Any]:
-        """Search on YouTube Music"""
-        if not self.ytmusic:
-            print("YouTube Music API not initialized, returning error")
-            return {"error": "YouTube Music API not initialized"}
-        
         try:
-            print(f"Searching YouTube Music for: {song_name} by {artist_name}")
-            query = f"{song_name} {artist_name}"
-            results = self.ytmusic.search(query, filter="songs", limit=1)
-            
-            if not results:
-                print("No results found on YouTube Music")
-                return {"error": "No results found"}
-            
-            track = results[0]
-            print(f"Found track on YouTube Music: {track['title']}")
-            return {
-                'title': track['title'],
-                'artist': track['artists'][0]['name'],
-                'album': track.get('album', {}).get('name', 'N/A'),
-                'url': f"https://music.youtube.com/watch?v={track['videoId']}"
-            }
+            collection = self._call_platform(parsed.platform, (parsed.kind, parsed.id), self._adapter_call,
+                                             parsed.platform, 'get_collection',
+                                             f"{name} {parsed.kind} processing failed", parsed.kind, parsed.id)
         except Exception as e:
-            print(f"Error searching YouTube Music: {str(e)}")
-            return {"error": f"Search failed: {str(e)}"}
+            return {"error": f"Failed to process URL: {str(e)}"}
+        if 'error' not in collection:
+            for song_info in collection['tracks']:
+                self._index_song_info(song_info)
+        return collection
 
-    def _search_yandex_music(self, song_name: str, artist_name: str) -> Dict[str, Any]:
-        """Search on Yandex Music"""
-        if not self.yandex:
-            return {"error": "Yandex Music API credentials not configured"}
-        
+    def convert_collection(self, url: str, targets: Optional[Iterable[str]] = None) -> Dict[str, Any]:
+        """Convert an album or playlist link; see iter_convert_collection.
+
+        Returns ``{'original': collection_info, 'albums': {platform: album},
+        'tracks': [{'original': song_info, 'alternatives': {...}}, ...]}`` or
+        an error dict. Prefer the iterator for long playlists.
+        """
+        result: Dict[str, Any] = {'albums': {}, 'tracks': []}
+        for kind, info in self.iter_convert_collection(url, targets):
+            if kind == 'collection':
+                if 'error' in info:
+                    return info
+                result['original'] = info
+            elif kind == 'album':
+                album = dict(info)
+                result['albums'][album.pop('platform')] = album
+            else:
+                result['tracks'].append({'original': info['original'], 'alternatives': info['alternatives']})
+        return result
+
+    def iter_convert_collection(self, url: str, targets: Optional[Iterable[str]] = None
+                                ) -> Iterator[Tuple[str, Dict[str, Any]]]:
+        """Yield an album or playlist conversion piece by piece.
+
+        Yields ``('collection', info)`` first (the collection without its
+        tracks, plus a ``total`` track count, or an error), then for albums one
+        ``('album', {'platform': ..., ...})`` per target platform, then one
+        ``('track', {'index', 'original', 'alternatives'})`` per track in
+        tracklist order. Album links are matched album-first: each target
+        platform's matching album is searched once and its tracks stand in
+        for the source tracks, so only tracks without a match are searched
+        individually. Those searches run on the batch pool, at most
+        ``collection_window`` tracks ahead of the one yielded next.
+        """
+        collection = self.get_collection(url)
+        if 'error' in collection:
+            yield 'collection', collection
+            return
+        tracks = collection['tracks']
+        info = {k: v for k, v in collection.items() if k != 'tracks'}
+        yield 'collection', {**info, 'total': len(tracks)}
+
+        wanted = self._search_targets(collection, targets)
+        known: Dict[int, Dict[str, Track]] = {}
+        if collection['kind'] == 'album':
+            for name, album in self._iter_album_matches(collection, wanted):
+                matches = self._match_album_tracks(tracks, album) if 'error' not in album else {}
+                for index, match in matches.items():
+                    known.setdefault(index, {})[name] = match
+                    self._index_result(name, tracks[index].title, tracks[index].artist, tracks[index].isrc, match)
+                summary = {k: v for k, v in album.items() if k != 'tracks'}
+                if 'error' not in album:
+                    summary['matched'] = len(matches)
+                yield 'album', {'platform': name, **summary}
+
+        def resolve(index: int) -> Dict[str, Any]:
+            song_info = tracks[index]
+            missing = [name for name in wanted if name not in known.get(index, {})]
+            search_results = self.search_track(song_info.title, song_info.artist, missing,
+                                               isrc=song_info.isrc) if missing else {}
+            alternatives = {**known.get(index, {}), **search_results}
+            return {'index': index, 'original': song_info,
+                    'alternatives': {name: alternatives[name] for name in wanted if name in alternatives}}
+
+        # Keep a bounded window of tracks resolving ahead of the one yielded next
+        pending = deque()
         try:
-            query = f"{song_name} {artist_name}"
-            results = self.yandex.search(query, type_='track')
-            
-            if not results.tracks or not results.tracks.results:
-                return {"error": "No results found"}
-            
-            track = results.tracks.results[0]
-            return {
-                'title': track.title,
-                'artist': track.artists[0].name,
-                'album': track.albums[0].title,
-                'url': f"https://music.yandex.ru/album/{track.albums[0].id}/track/{track.id}"
-            }
-        except Exception as e:
-            return {"error": f"Search failed: {str(e)}"}
+            for index in range(len(tracks)):
+                pending.append(self._batch_executor.submit(resolve, index))
+                if len(pending) >= self.collection_window:
+                    yield 'track', pending.popleft().result()
+            while pending:
+                yield 'track', pending.popleft().result()
+        finally:
+            # The consumer went away (e.g. a closed stream): drop work not yet started
+            for future in pending:
+                future.cancel()
+
+    def _iter_album_matches(self, collection: Dict[str, Any],
+                            names: List[str]) -> Iterator[Tuple[str, Dict[str, Any]]]:
+        """Search each target platform for the source album, yielding results as they finish"""
+        searchable = [name for name in names if name in platforms.ALBUM_SEARCH]
+        for name in list(searchable):
+            skipped = self._skip_reason(name)
+            if skipped is not None:
+                searchable.remove(name)
+                yield name, skipped
+        futures = {
+            self._search_executor.submit(self._search_album, name, collection['title'], collection['artist']): name
+            for name in searchable
+        }
+        pending = set(futures)
+        try:
+            for future in as_completed(futures, timeout=self.search_timeout):
+                pending.discard(future)
+                yield futures[future], future.result()
+        except FuturesTimeoutError:
+            # Tracks of platforms that missed the deadline are searched one by one instead
+            for future in pending:
+                future.cancel()
+                yield futures[future], {"error": f"Album search timed out after {self.search_timeout}s",
+                                        "status": "timeout"}
+
+    def _search_album(self, name: str, album_title: str, artist_name: str) -> Dict[str, Any]:
+        """Find an album on one platform, with its tracks as search results"""
+        album = self._call_platform(name, ('album_search', album_title, artist_name), self._adapter_call,
+                                    name, 'search_album', "Album search failed", album_title, artist_name)
+        # Another artist's album of the same name must not stand in for this one
+        if 'error' not in album and \
+                similarity(set(tokens(album['artist'])), set(tokens(artist_name))) < ALBUM_MATCH_MIN_SCORE:
+            return {"error": "No results found"}
+        return album
+
+    @staticmethod
+    def _match_album_tracks(tracks: List[Dict[str, Any]], album: Dict[str, Any]) -> Dict[int, Dict[str, Any]]:
+        """Map source track indexes to the target album's tracks, by ISRC or by title"""
+        by_isrc = {track.isrc: track for track in album['tracks'] if track.isrc}
+        titles = [(set(tokens(track.title)), track) for track in album['tracks']]
+        matches = {}
+        for index, song_info in enumerate(tracks):
+            match = by_isrc.get(song_info.isrc)
+            if match is None:
+                title = set(tokens(song_info.title))
+                score, candidate = max(((similarity(title, words), track) for words, track in titles),
+                                       key=lambda scored: scored[0], default=(0.0, None))
+                match = candidate if score >= ALBUM_MATCH_MIN_SCORE else None
+            if match is not None:
+                matches[index] = match
+        return matches
+
+    def _searches(self, platform: Union[str, Iterable[str]] = "all") -> Dict[str, Callable[[str, str], Dict[str, Any]]]:
+        """Return the search functions of the enabled platforms selected by ``platform``.
+
+        ``platform`` is ``"all"``, one platform name, or a collection of names.
+        """
+        searches = {
+            'deezer': self._search_deezer,
+            'spotify': self._search_spotify,
+            'apple_music': self._search_apple_music,
+            'youtube_music': self._search_youtube_music,
+            'yandex_music': self._search_yandex_music,
+        }
+        searches = {name: search for name, search in searches.items() if name in self.enabled_platforms}
+        if isinstance(platform, str):
+            selected = set(searches) if platform == "all" else {platform}
+        else:
+            selected = set(platform)
+        return {name: search for name, search in searches.items() if name in selected}
+
+    def _isrc_lookups(self) -> Dict[str, Callable[[str], Dict[str, Any]]]:
+        """Return the platforms that can look a track up directly by ISRC"""
+        return {
+            'deezer': self._lookup_isrc_deezer,
+            'spotify': self._lookup_isrc_spotify,
+            'apple_music': self._lookup_isrc_apple_music,
+        }
+
+    def _search_platform(self, name: str, song_name: str, artist_name: str,
+                         isrc: Optional[str] = None, use_catalog: bool = True) -> Result:
+        """Find a track on one platform.
+
+        Tries the ISRC index, the local catalog and ISRC lookups before a text search.
+        """
+        if isrc:
+            known = self.isrc_index.get(isrc, name)
+            record_cache_lookup('isrc_index', known is not None)
+            if known is not None:
+                return known
+        if use_catalog:
+            local = self.catalog.get(song_name, artist_name, name)
+            record_cache_lookup('catalog', local is not None)
+            if local is not None:
+                return local
+        skipped = self._skip_reason(name)
+        if skipped is not None:
+            return skipped
+        if isrc:
+            lookup = self._isrc_lookups().get(name)
+            if lookup is not None:
+                result = self._call_platform(name, ('isrc', isrc), lookup, isrc)
+                if 'error' not in result:
+                    self._index_result(name, song_name, artist_name, isrc, result, exact=True)
+                    return result
+
+        result = self._call_platform(name, ('search', song_name, artist_name),
+                                     self._searches()[name], song_name, artist_name)
+        if 'error' not in result:
+            self._index_result(name, song_name, artist_name, isrc, result)
+        return result
+
+    def search_track(self, song_name: str, artist_name: str, platform: Union[str, Iterable[str]] = "all",
+                     timeout: Optional[float] = None, concurrent: bool = True,
+                     isrc: Optional[str] = None) -> Dict[str, Result]:
+        """Search for a track across all platforms, one platform or a collection of platforms.
+
+        Only the selected platforms are queried. Platforms that are disabled,
+        lack credentials or whose circuit breaker is open come back as errors
+        immediately, without a call.
+
+        With ``concurrent`` set, the per-platform searches (even a single one)
+        run in parallel on a bounded thread pool. Platforms that have not
+        answered within ``timeout`` seconds (default: ``search_timeout``) come
+        back as ``{"error": ..., "status": "timeout"}`` instead of delaying the
+        rest.
+
+        When the recording's ``isrc`` is known, tracks already in the ISRC
+        index are returned without any call, and platforms that support it are
+        queried by ISRC before falling back to a text search. Confident matches
+        from the local catalog are also returned without any call.
+        """
+        searches = self._searches(platform)
+        if isrc:
+            isrc = ISRCIndex.normalize(isrc)
+        if not concurrent:
+            return {name: self._search_platform(name, song_name, artist_name, isrc) for name in searches}
+
+        results = dict(self.iter_search_track(song_name, artist_name, platform, timeout, isrc))
+        return {name: results[name] for name in searches}
+
+    def iter_search_track(self, song_name: str, artist_name: str, platform: Union[str, Iterable[str]] = "all",
+                          timeout: Optional[float] = None,
+                          isrc: Optional[str] = None) -> Iterator[Tuple[str, Result]]:
+        """Yield ``(platform, result)`` pairs in the order the searches finish.
+
+        Searches still running after ``timeout`` seconds are yielded last as
+        ``{"error": ..., "status": "timeout"}`` entries.
+        """
+        if timeout is None:
+            timeout = self.search_timeout
+        names = list(self._searches(platform))
+        if isrc:
+            isrc = ISRCIndex.normalize(isrc)
+            # Recordings already in the index need no search at all
+            known = self.isrc_index.lookup(isrc, names)
+            for name in [n for n in names if n in known]:
+                names.remove(name)
+                record_cache_lookup('isrc_index', True)
+                yield name, known[name]
+        # Neither do confident matches from the local catalog
+        local = self.catalog.lookup(song_name, artist_name) if names else {}
+        for name in list(names):
+            record_cache_lookup('catalog', name in local)
+            if name in local:
+                names.remove(name)
+                yield name, local[name]
+        # Platforms that cannot answer now are reported without using a worker
+        for name in list(names):
+            skipped = self._skip_reason(name)
+            if skipped is not None:
+                names.remove(name)
+                yield name, skipped
+        futures = {
+            self._search_executor.submit(self._search_platform, name, song_name, artist_name, isrc, False): name
+            for name in names
+        }
+        pending = set(futures)
+        try:
+            for future in as_completed(futures, timeout=timeout):
+                pending.discard(future)
+                yield futures[future], future.result()
+        except FuturesTimeoutError:
+            for future in pending:
+                SEARCH_TIMEOUTS.inc(platform=futures[future])
+                # A search still queued for a worker never reached the platform, so only
+                # one that could not be cancelled counts against the platform's breaker
+                if not future.cancel():
+                    self._record_outcome(futures[future], 'timeout', timeout)
+                yield futures[future], {"error": f"Search timed out after {timeout}s", "status": "timeout"}
+
+    def _search_deezer(self, song_name: str, artist_name: str) -> Result:
+        """Search on Deezer"""
+        return self._adapter_call('deezer', 'search', "Search failed", song_name, artist_name)
+
+    def _search_spotify(self, song_name: str, artist_name: str) -> Result:
+        """Search on Spotify"""
+        return self._adapter_call('spotify', 'search', "Search failed", song_name, artist_name)
+
+    def _search_apple_music(self, song_name: str, artist_name: str) -> Result:
+        """Search on Apple Music"""
+        return self._adapter_call('apple_music', 'search', "Search failed", song_name, artist_name)
+
+    def _search_youtube_music(self, song_name: str, artist_name: str) -> Result:
+        """Search on YouTube Music"""
+        return self._adapter_call('youtube_music', 'search', "Search failed", song_name, artist_name)
+
+    def _search_yandex_music(self, song_name: str, artist_name: str) -> Result:
+        """Search on Yandex Music"""
+        return self._adapter_call('yandex_music', 'search', "Search failed", song_name, artist_name)
+
+    def _lookup_isrc_deezer(self, isrc: str) -> Result:
+        """Find the Deezer track for an ISRC"""
+        return self._adapter_call('deezer', 'lookup_isrc', "ISRC lookup failed", isrc)
+
+    def _lookup_isrc_spotify(self, isrc: str) -> Result:
+        """Find the Spotify track for an ISRC"""
+        return self._adapter_call('spotify', 'lookup_isrc', "ISRC lookup failed", isrc)
+
+    def _lookup_isrc_apple_music(self, isrc: str) -> Result:
+        """Find the Apple Music song for an ISRC"""
+        return self._adapter_call('apple_music', 'lookup_isrc', "ISRC lookup failed", isrc)
+
+
+_shared_platform: Optional[MusicPlatform] = None
+_shared_platform_lock = threading.Lock()
+
+
+def get_music_platform() -> MusicPlatform:
+    """Return the process-wide MusicPlatform, creating it on first use"""
+    global _shared_platform
+    if _shared_platform is None:
+        with _shared_platform_lock:
+            if _shared_platform is None:
+                _shared_platform = MusicPlatform()
+    return _shared_platform
 
 # Example usage
 if __name__ == "__main__":
+    from dotenv import load_dotenv
+    load_dotenv()
     music = MusicPlatform()
     
     # Example 1: Get song info from different platform URLs
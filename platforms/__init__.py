@@ -0,0 +1,67 @@
+"""Platform adapters, one module per streaming service.
+
+Each adapter wraps one platform's SDK or HTTP API and is imported on first
+use, so a process only pays for the SDKs of the platforms it actually calls.
+Adapters expose plain functions that return ``track.Track`` records and raise
+on upstream failures:
+
+- ``create_client()``: build the API client, or None (not needed for Deezer)
+- ``get_track(client, url)``: the track for a track link
+- ``search(client, song_name, artist_name)``: best search result, or None
+- ``lookup_isrc(client, isrc)``: the track for an ISRC, or None (where supported)
+- ``get_tracks(client, ids)``: the track per ID, None when missing (where supported)
+- ``get_collection(client, kind, id)``: an album or playlist with every track,
+  following pagination (platforms in COLLECTION_KINDS)
+- ``search_album(client, album_title, artist_name)``: best album match with its
+  tracks, or None (platforms in ALBUM_SEARCH)
+- ``warm_up(client)``: fetch what the first request would otherwise wait for,
+  such as an access token (optional)
+"""
+import importlib
+import os
+from types import ModuleType
+from typing import Dict, Tuple
+
+PLATFORM_NAMES = {
+    'deezer': 'Deezer',
+    'spotify': 'Spotify',
+    'apple_music': 'Apple Music',
+    'youtube_music': 'YouTube Music',
+    'yandex_music': 'Yandex Music',
+}
+
+# Environment variables that must be set before a platform's client can be built
+REQUIRED_ENV: Dict[str, Tuple[str, ...]] = {
+    'spotify': ('SPOTIFY_CLIENT_ID', 'SPOTIFY_CLIENT_SECRET'),
+    'apple_music': ('APPLE_KEY_ID', 'APPLE_TEAM_ID', 'APPLE_SECRET_KEY'),
+    'yandex_music': ('YANDEX_MUSIC_TOKEN',),
+}
+
+# Collection link kinds each platform can list, and platforms that can search for albums
+COLLECTION_KINDS: Dict[str, Tuple[str, ...]] = {
+    'deezer': ('album', 'playlist'),
+    'spotify': ('album', 'playlist'),
+    'youtube_music': ('album', 'playlist'),
+}
+ALBUM_SEARCH = ('deezer', 'spotify', 'youtube_music')
+
+
+def load(platform: str) -> ModuleType:
+    """Import (once) and return the adapter module for a platform"""
+    if platform not in PLATFORM_NAMES:
+        raise ValueError(f"Unknown platform: {platform}")
+    return importlib.import_module(f'{__name__}.{platform}')
+
+
+def is_configured(platform: str) -> bool:
+    """Whether the credentials a platform needs are present, without importing its SDK"""
+    return all(os.getenv(name) for name in REQUIRED_ENV.get(platform, ()))
+
+
+def enabled_from_env() -> Tuple[str, ...]:
+    """Return the platforms listed in MUSIC_PLATFORMS (default: all of them)"""
+    names = [name.strip() for name in os.getenv('MUSIC_PLATFORMS', '').split(',') if name.strip()]
+    for name in names:
+        if name not in PLATFORM_NAMES:
+            raise ValueError(f"Unknown platform in MUSIC_PLATFORMS: {name}")
+    return tuple(names) if names else tuple(PLATFORM_NAMES)
@@ -0,0 +1,76 @@
+"""Apple Music adapter, built on applemusicpy"""
+import os
+from typing import Any, Dict, Optional
+
+import applemusicpy
+from requests.exceptions import HTTPError
+
+from http_client import default_timeout, get_session
+from throttle import ThrottledError
+from track import Track
+from url_router import parse_url
+
+
+class AppleMusic(applemusicpy.AppleMusic):
+    """applemusicpy client that makes each GET once.
+
+    The library's own retry loop retries 429s and any exception, sleeps
+    between attempts and returns None when it gives up. Here 5xx retries are
+    left to the pooled session, and a 429 fails at once as ThrottledError.
+    """
+
+    def _get(self, url, **kwargs):
+        try:
+            return self._call('GET', url, kwargs)
+        except HTTPError as e:
+            if e.response is not None and e.response.status_code == 429:
+                raise ThrottledError("Apple Music rate limit exceeded") from e
+            raise
+
+
+def create_client() -> Optional[AppleMusic]:
+    key_id = os.getenv('APPLE_KEY_ID')
+    team_id = os.getenv('APPLE_TEAM_ID')
+    secret_key = os.getenv('APPLE_SECRET_KEY')
+    if not all([key_id, team_id, secret_key]):
+        return None
+    client = AppleMusic(
+        secret_key, key_id, team_id,
+        max_retries=0,
+        requests_timeout=default_timeout()
+    )
+    client._session = get_session('apple_music')
+    return client
+
+
+def get_track(client: AppleMusic, url: str) -> Track:
+    # Song ID comes from /song/<id> or the ?i=<id> parameter of album links
+    return search_result(client.song(parse_url(url).id)['data'][0])
+
+
+def search(client: AppleMusic, song_name: str, artist_name: str) -> Optional[Track]:
+    results = client.search(f"{song_name} {artist_name}", types=['songs'], limit=1)
+    if not results['songs']['data']:
+        return None
+    return search_result(results['songs']['data'][0])
+
+
+def lookup_isrc(client: AppleMusic, isrc: str) -> Optional[Track]:
+    results = client.songs_by_isrc([isrc])
+    if not results.get('data'):
+        return None
+    return search_result(results['data'][0])
+
+
+def search_result(song: Dict[str, Any]) -> Track:
+    """Build a track from an Apple Music song resource"""
+    track = song['attributes']
+    return Track(
+        platform='apple_music',
+        title=track['name'],
+        artist=track['artistName'],
+        album=track['albumName'],
+        url=track['url'],
+        id=song['id'],
+        isrc=track.get('isrc')
+    )
@@ -0,0 +1,129 @@
+"""Deezer adapter, using the public REST API through the shared HTTP session"""
+import os
+from typing import Any, Dict, Iterator, Optional
+from urllib.parse import quote
+
+from http_client import get_session
+from throttle import ThrottledError
+from track import Track
+from url_router import UnsupportedUrlError, parse_url
+
+API_URL = os.getenv('DEEZER_API_URL', 'https://api.deezer.com').rstrip('/')
+# Deezer reports an exhausted request quota as error code 4 in a 200 response
+QUOTA_EXCEEDED = 4
+
+
+def create_client() -> None:
+    """Deezer's public API needs no client; requests go through the 'deezer' session"""
+    return None
+
+
+def _json(response: Any) -> Dict[str, Any]:
+    """Decode a Deezer API response, raising ThrottledError when over quota"""
+    if response.status_code == 429:
+        raise ThrottledError("Deezer rate limit exceeded")
+    # Server errors left over after the session's retries must not read as "no results"
+    response.raise_for_status()
+    data = response.json()
+    error = data.get('error') if isinstance(data, dict) else None
+    if isinstance(error, dict) and error.get('code') == QUOTA_EXCEEDED:
+        raise ThrottledError(error.get('message', "Quota limit exceeded"))
+    return data
+
+
+def get_track(client: None, url: str) -> Track:
+    session = get_session('deezer')
+    parsed = parse_url(url)
+    if parsed.kind == 'shortlink':
+        # Short links only reveal the track ID after following the redirect
+        response = session.get(url, allow_redirects=True)
+        parsed = parse_url(response.url)
+    if parsed.kind != 'track':
+        raise UnsupportedUrlError("Not a Deezer track link")
+
+    return search_result(_json(session.get(f"{API_URL}/track/{parsed.id}")))
+
+
+def search(client: None, song_name: str, artist_name: str) -> Optional[Track]:
+    # Use the track-specific endpoint with a fielded query in strict mode for more accurate results
+    query = quote(f'track:"{song_name}" artist:"{artist_name}"')
+    data = _json(get_session('deezer').get(f"{API_URL}/search/track", params={
+        'q': query,
+        'strict': 'on'
+    }))
+    if not data.get('data'):
+        return None
+    return search_result(data['data'][0])
+
+
+def lookup_isrc(client: None, isrc: str) -> Optional[Track]:
+    data = _json(get_session('deezer').get(f"{API_URL}/track/isrc:{isrc}"))
+    if 'error' in data or 'id' not in data:
+        return None
+    return search_result(data)
+
+
+def _paged(session: Any, page: Dict[str, Any]) -> Iterator[Dict[str, Any]]:
+    """Yield the items of a Deezer list and of every page after it"""
+    while True:
+        yield from page.get('data', [])
+        if not page.get('next'):
+            return
+        page = _json(session.get(page['next']))
+
+
+def get_collection(client: None, kind: str, collection_id: str) -> Optional[Dict[str, Any]]:
+    """Song info for every track of an album or playlist"""
+    session = get_session('deezer')
+    collection = _json(session.get(f"{API_URL}/{kind}/{collection_id}"))
+    if 'error' in collection:
+        return None
+    owner = collection['artist'] if kind == 'album' else collection['creator']
+    # Album listings leave out the album; playlist listings include it
+    tracks = [album_track(track, track['album']['title'] if 'album' in track else collection['title'])
+              for track in _paged(session, collection['tracks'])]
+    return {
+        'platform': 'deezer',
+        'kind': kind,
+        'id': str(collection['id']),
+        'title': collection['title'],
+        'artist': owner['name'],
+        'url': collection['link'],
+        'tracks': tracks
+    }
+
+
+def search_album(client: None, album_title: str, artist_name: str) -> Optional[Dict[str, Any]]:
+    session = get_session('deezer')
+    query = quote(f'artist:"{artist_name}" album:"{album_title}"')
+    data = _json(session.get(f"{API_URL}/search/album", params={'q': query, 'strict': 'on'}))
+    if not data.get('data'):
+        return None
+    album = _json(session.get(f"{API_URL}/album/{data['data'][0]['id']}"))
+    if 'error' in album:
+        return None
+    return {
+        'title': album['title'],
+        'artist': album['artist']['name'],
+        'url': album['link'],
+        'id': str(album['id']),
+        'tracks': [album_track(track, album['title']) for track in _paged(session, album['tracks'])]
+    }
+
+
+def album_track(track: Dict[str, Any], album_title: str) -> Track:
+    """Build a track from one listed on an album or playlist"""
+    return Track(
+        platform='deezer',
+        title=track['title'],
+        artist=track['artist']['name'],
+        album=album_title,
+        url=track['link'],
+        id=str(track['id']),
+        isrc=track.get('isrc')
+    )
+
+
+def search_result(track: Dict[str, Any]) -> Track:
+    """Build a track from a Deezer track object"""
+    return album_track(track, track['album']['title'])
@@ -0,0 +1,182 @@
+"""Spotify adapter, built on spotipy with client-credentials auth"""
+import os
+import time
+from typing import Any, Dict, Iterator, List, Optional
+
+import spotipy
+from spotipy.cache_handler import CacheHandler, MemoryCacheHandler
+from spotipy.oauth2 import SpotifyClientCredentials
+
+from http_client import default_timeout, get_session
+from token_store import TokenStore
+from track import Track
+from url_router import parse_url
+
+# API endpoints, overridable to point the client at a proxy or local stand-in server
+API_URL = os.getenv('SPOTIFY_API_URL')
+TOKEN_URL = os.getenv('SPOTIFY_TOKEN_URL')
+# Most IDs the multi-track endpoint accepts per call
+TRACKS_PER_REQUEST = 50
+# SQLite file the access token is shared through by every worker on the host
+TOKEN_DB = os.getenv('MUSIC_TOKEN_DB')
+# spotipy renews a token this many seconds before it expires
+TOKEN_MARGIN = 60
+
+
+class SharedTokenCache(CacheHandler):
+    """Keeps the access token in a TokenStore, with an in-memory copy for each process"""
+
+    def __init__(self, store: TokenStore, name: str):
+        self.store = store
+        self.name = name
+        self._token: Optional[Dict[str, Any]] = None
+
+    def get_cached_token(self) -> Optional[Dict[str, Any]]:
+        token = self._token
+        if token is None or token['expires_at'] - time.time() < TOKEN_MARGIN:
+            token = self._token = self.store.get(self.name)
+        return token
+
+    def save_token_to_cache(self, token_info: Dict[str, Any]) -> None:
+        self._token = token_info
+        self.store.set(self.name, token_info)
+
+
+class SharedClientCredentials(SpotifyClientCredentials):
+    """Client-credentials auth that renews the shared token once for all workers"""
+
+    def get_access_token(self, as_dict=True, check_cache=True):
+        token_info = self.cache_handler.get_cached_token()
+        if not check_cache or not token_info or self.is_token_expired(token_info):
+            # Whoever waited here behind another worker's renewal finds the new token
+            with self.cache_handler.store.refreshing():
+                return super().get_access_token(as_dict=as_dict, check_cache=check_cache)
+        return super().get_access_token(as_dict=as_dict, check_cache=check_cache)
+
+
+def create_client() -> Optional[spotipy.Spotify]:
+    client_id = os.getenv('SPOTIFY_CLIENT_ID')
+    client_secret = os.getenv('SPOTIFY_CLIENT_SECRET')
+    if not (client_id and client_secret):
+        return None
+    session = get_session('spotify')
+    if TOKEN_DB:
+        auth, cache_handler = SharedClientCredentials, SharedTokenCache(TokenStore(TOKEN_DB), f'spotify:{client_id}')
+    else:
+        # Keep the token in memory; spotipy would otherwise write a .cache file to the working directory
+        auth, cache_handler = SpotifyClientCredentials, MemoryCacheHandler()
+    credentials = auth(
+        client_id=client_id,
+        client_secret=client_secret,
+        requests_session=session,
+        requests_timeout=default_timeout(),
+        cache_handler=cache_handler
+    )
+    if TOKEN_URL:
+        credentials.OAUTH_TOKEN_URL = TOKEN_URL
+    client = spotipy.Spotify(
+        client_credentials_manager=credentials,
+        requests_session=session,
+        requests_timeout=default_timeout()
+    )
+    if API_URL:
+        client.prefix = API_URL.rstrip('/') + '/'
+    return client
+
+
+def warm_up(client: spotipy.Spotify) -> None:
+    """Fetch the access token now, so workers forked afterwards start with it"""
+    client.auth_manager.get_access_token(as_dict=False)
+
+
+def get_track(client: spotipy.Spotify, url: str) -> Track:
+    return track_info(client.track(parse_url(url).id))
+
+
+def get_tracks(client: spotipy.Spotify, ids: List[str]) -> List[Optional[Track]]:
+    """Fetch up to 50 tracks with one call to the multi-track endpoint"""
+    return [track_info(track) if track else None for track in client.tracks(ids)['tracks']]
+
+
+def search(client: spotipy.Spotify, song_name: str, artist_name: str) -> Optional[Track]:
+    results = client.search(q=f"track:{song_name} artist:{artist_name}", type='track', limit=1)
+    if not results['tracks']['items']:
+        return None
+    return track_info(results['tracks']['items'][0])
+
+
+def lookup_isrc(client: spotipy.Spotify, isrc: str) -> Optional[Track]:
+    results = client.search(q=f"isrc:{isrc}", type='track', limit=1)
+    if not results['tracks']['items']:
+        return None
+    return track_info(results['tracks']['items'][0])
+
+
+def _paged(client: spotipy.Spotify, page: Optional[Dict[str, Any]]) -> Iterator[Dict[str, Any]]:
+    """Yield the items of a paging object and of every page after it"""
+    while page:
+        yield from page['items']
+        page = client.next(page) if page.get('next') else None
+
+
+def get_collection(client: spotipy.Spotify, kind: str, collection_id: str) -> Dict[str, Any]:
+    """Song info for every track of an album or playlist"""
+    if kind == 'album':
+        collection = client.album(collection_id)
+        artist = collection['artists'][0]['name']
+        ids = [track['id'] for track in _paged(client, collection['tracks']) if track.get('id')]
+        # Album listings carry no ISRCs, so the full tracks are fetched in bulk
+        tracks = []
+        for start in range(0, len(ids), TRACKS_PER_REQUEST):
+            tracks.extend(info for info in get_tracks(client, ids[start:start + TRACKS_PER_REQUEST]) if info)
+    else:
+        collection = client.playlist(collection_id)
+        artist = collection['owner'].get('display_name') or collection['owner']['id']
+        # Skip removed tracks, podcast episodes and local files
+        tracks = [track_info(item['track']) for item in _paged(client, collection['tracks'])
+                  if item.get('track') and item['track'].get('type') == 'track' and item['track'].get('id')]
+    return {
+        'platform': 'spotify',
+        'kind': kind,
+        'id': collection['id'],
+        'title': collection['name'],
+        'artist': artist,
+        'url': collection['external_urls']['spotify'],
+        'tracks': tracks
+    }
+
+
+def search_album(client: spotipy.Spotify, album_title: str, artist_name: str) -> Optional[Dict[str, Any]]:
+    results = client.search(q=f"album:{album_title} artist:{artist_name}", type='album', limit=1)
+    if not results['albums']['items']:
+        return None
+    album = results['albums']['items'][0]
+    # Album track listings carry no album and no ISRC
+    tracks = [Track(
+        platform='spotify',
+        title=track['name'],
+        artist=track['artists'][0]['name'],
+        album=album['name'],
+        url=track['external_urls']['spotify'],
+        id=track['id']
+    ) for track in _paged(client, client.album_tracks(album['id'], limit=TRACKS_PER_REQUEST))]
+    return {
+        'title': album['name'],
+        'artist': album['artists'][0]['name'],
+        'url': album['external_urls']['spotify'],
+        'id': album['id'],
+        'tracks': tracks
+    }
+
+
+def track_info(track: Dict[str, Any]) -> Track:
+    """Build a track from a Spotify track object"""
+    return Track(
+        platform='spotify',
+        title=track['name'],
+        artist=track['artists'][0]['name'],
+        album=track['album']['name'],
+        url=track['external_urls']['spotify'],
+        id=track['id'],
+        isrc=track.get('external_ids', {}).get('isrc')
+    )
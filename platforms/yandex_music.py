@@ -0,0 +1,48 @@
+"""Yandex Music adapter, built on yandex-music"""
+import os
+from typing import Any, List, Optional
+
+from yandex_music import Client
+
+from track import Track
+from url_router import parse_url
+
+# API endpoint, overridable to point the client at a proxy or local stand-in server
+API_URL = os.getenv('YANDEX_MUSIC_API_URL')
+
+
+def create_client() -> Optional[Client]:
+    token = os.getenv('YANDEX_MUSIC_TOKEN')
+    if not token:
+        return None
+    return Client(token, base_url=API_URL).init()
+
+
+def get_track(client: Client, url: str) -> Track:
+    return track_info(client.tracks([parse_url(url).id])[0])
+
+
+def get_tracks(client: Client, ids: List[str]) -> List[Optional[Track]]:
+    """Fetch many tracks with one call to the multi-track endpoint"""
+    tracks = {str(track.id): track for track in client.tracks(ids)}
+    return [track_info(tracks[track_id]) if track_id in tracks else None for track_id in ids]
+
+
+def search(client: Client, song_name: str, artist_name: str) -> Optional[Track]:
+    results = client.search(f"{song_name} {artist_name}", type_='track')
+    if not results.tracks or not results.tracks.results:
+        return None
+    return track_info(results.tracks.results[0])
+
+
+def track_info(track: Any) -> Track:
+    """Build a track from a Yandex Music track object"""
+    return Track(
+        platform='yandex_music',
+        title=track.title,
+        artist=track.artists[0].name,
+        album=track.albums[0].title,
+        url=f"https://music.yandex.ru/album/{track.albums[0].id}/track/{track.id}",
+        id=str(track.id),
+        isrc=getattr(track, 'isrc', None)
+    )
@@ -0,0 +1,98 @@
+"""YouTube Music adapter, built on ytmusicapi (no credentials needed)"""
+from typing import Any, Dict, Optional
+
+from ytmusicapi import YTMusic
+
+from http_client import get_session
+from track import Track
+from url_router import parse_url
+
+
+def create_client() -> YTMusic:
+    return YTMusic(requests_session=get_session('youtube_music'))
+
+
+def get_track(client: YTMusic, url: str) -> Track:
+    video_id = parse_url(url).id
+    result = client.get_song(video_id)
+    return Track(
+        platform='youtube_music',
+        title=result['title'],
+        artist=result['artists'][0]['name'],
+        album=result.get('album', {}).get('name', 'N/A'),
+        url=f"https://music.youtube.com/watch?v={video_id}",
+        id=video_id
+    )
+
+
+def get_collection(client: YTMusic, kind: str, collection_id: str) -> Dict[str, Any]:
+    """Song info for every track of an album or playlist"""
+    if kind == 'album':
+        collection = client.get_album(collection_id)
+        artist = collection['artists'][0]['name']
+        url = f"https://music.youtube.com/browse/{collection_id}"
+    else:
+        # limit=None makes ytmusicapi follow the continuations for the whole playlist
+        collection = client.get_playlist(collection_id, limit=None)
+        author = collection.get('author') or {}
+        artist = author.get('name', 'N/A') if isinstance(author, dict) else author
+        url = f"https://music.youtube.com/playlist?list={collection_id}"
+    # Unavailable items have no video to link to
+    tracks = [album_track(track, collection['title'] if kind == 'album' else 'N/A', artist)
+              for track in collection['tracks'] if track.get('videoId')]
+    return {
+        'platform': 'youtube_music',
+        'kind': kind,
+        'id': collection_id,
+        'title': collection['title'],
+        'artist': artist,
+        'url': url,
+        'tracks': tracks
+    }
+
+
+def search_album(client: YTMusic, album_title: str, artist_name: str) -> Optional[Dict[str, Any]]:
+    results = client.search(f"{album_title} {artist_name}", filter="albums", limit=1)
+    if not results:
+        return None
+    browse_id = results[0]['browseId']
+    album = client.get_album(browse_id)
+    artist = album['artists'][0]['name']
+    return {
+        'title': album['title'],
+        'artist': artist,
+        'url': f"https://music.youtube.com/browse/{browse_id}",
+        'id': browse_id,
+        'tracks': [album_track(track, album['title'], artist) for track in album['tracks'] if track.get('videoId')]
+    }
+
+
+def album_track(track: Dict[str, Any], album_title: str, artist_name: str) -> Track:
+    """Build a track from one listed on an album or playlist"""
+    # Album listings name the album as a string, playlists as a dict (or None)
+    album = track.get('album')
+    if isinstance(album, dict):
+        album = album.get('name')
+    return Track(
+        platform='youtube_music',
+        title=track['title'],
+        artist=track['artists'][0]['name'] if track.get('artists') else artist_name,
+        album=album or album_title,
+        url=f"https://music.youtube.com/watch?v={track['videoId']}",
+        id=track['videoId']
+    )
+
+
+def search(client: YTMusic, song_name: str, artist_name: str) -> Optional[Track]:
+    results = client.search(f"{song_name} {artist_name}", filter="songs", limit=1)
+    if not results:
+        return None
+    track = results[0]
+    return Track(
+        platform='youtube_music',
+        title=track['title'],
+        artist=track['artists'][0]['name'],
+        album=track.get('album', {}).get('name', 'N/A'),
+        url=f"https://music.youtube.com/watch?v={track['videoId']}",
+        id=track['videoId']
+    )
@@ -0,0 +1,27 @@
+"""Thread-local SQLite connections to a database file in WAL mode.
+
+SQLite connections must not be shared between threads, or carried into a
+forked worker process. ``LocalConnection`` opens one connection per thread
+and a new one after a fork, so the caches and indexes built on it can be used
+from any thread of a pre-forking server.
+"""
+import os
+import sqlite3
+import threading
+
+
+class LocalConnection:
+    def __init__(self, db_path: str, timeout: float = 5):
+        self.db_path = db_path
+        self.timeout = timeout
+        self._local = threading.local()
+
+    def get(self) -> sqlite3.Connection:
+        """Return this thread's SQLite connection (a new one in a forked worker)"""
+        conn = getattr(self._local, 'conn', None)
+        if conn is None or self._local.pid != os.getpid():
+            conn = sqlite3.connect(self.db_path, timeout=self.timeout, isolation_level=None)
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute('PRAGMA synchronous=NORMAL')
+            self._local.conn, self._local.pid = conn, os.getpid()
+        return conn
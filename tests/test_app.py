@@ -0,0 +1,99 @@
+from urllib.parse import parse_qs, quote, urlsplit
+
+import pytest
+
+import music_search
+from app import API_CACHE_CONTROL, app
+from music_search import MusicPlatform
+from track import Track
+
+SPOTIFY_ID = '2Fxmhks0bxGSBdJ92vM42m'
+CANONICAL = f'https://open.spotify.com/track/{SPOTIFY_ID}'
+ORIGINAL = Track(platform='spotify', title='Bad Guy', artist='Billie Eilish', album='When We All Fall Asleep',
+                 url=CANONICAL, id=SPOTIFY_ID, isrc='USUM71900764')
+DEEZER = Track(platform='deezer', title='Bad Guy', artist='Billie Eilish', album='When We All Fall Asleep',
+               url='https://www.deezer.com/track/655095912', id='655095912', isrc='USUM71900764')
+
+
+class StubPlatform(MusicPlatform):
+    """MusicPlatform whose conversions are given up front instead of searched"""
+
+    def __init__(self, alternatives):
+        super().__init__(enabled_platforms=[])
+        self.alternatives = alternatives
+        self.conversions = 0
+
+    def convert(self, url, targets=None):
+        self.conversions += 1
+        return {'original': ORIGINAL, 'alternatives': self.alternatives}
+
+
+@pytest.fixture
+def client():
+    return app.test_client()
+
+
+@pytest.fixture
+def use_platform(monkeypatch):
+    def use(alternatives):
+        platform = StubPlatform(alternatives)
+        monkeypatch.setattr(music_search, '_shared_platform', platform)
+        return platform
+    return use
+
+
+def get(client, url, **kwargs):
+    return client.get(f'/api/convert?url={quote(url, safe="")}', **kwargs)
+
+
+def test_other_links_redirect_to_the_canonical_url(client, use_platform):
+    platform = use_platform({})
+    response = get(client, f'https://open.spotify.com/intl-de/track/{SPOTIFY_ID}?si=abc')
+    assert response.status_code == 308
+    location = urlsplit(response.headers['Location'])
+    assert location.path == '/api/convert' and parse_qs(location.query) == {'url': [CANONICAL]}
+    assert response.headers['Cache-Control'] == API_CACHE_CONTROL
+    assert platform.conversions == 0
+
+
+def test_complete_results_carry_an_etag_and_answer_304(client, use_platform):
+    use_platform({'deezer': DEEZER, 'youtube_music': {'error': 'No results found'}})
+    response = get(client, CANONICAL)
+    assert response.status_code == 200
+    assert response.headers['Cache-Control'] == API_CACHE_CONTROL
+    assert response.json['alternatives'] == {'deezer': DEEZER.to_dict()}
+    etag = response.headers['ETag']
+
+    again = get(client, CANONICAL, headers={'If-None-Match': etag})
+    assert again.status_code == 304
+    assert again.get_data() == b''
+    assert again.headers['ETag'] == etag
+
+
+@pytest.mark.parametrize('failure', [
+    {'error': 'Search failed: 500 Server Error', 'status': 'error'},
+    {'error': 'Search timed out after 8s', 'status': 'timeout'},
+    {'error': 'Deezer is being rate limited, try again later', 'status': 'throttled'},
+    {'error': 'Deezer is temporarily unavailable, try again later', 'status': 'unavailable'},
+])
+def test_results_with_a_failed_platform_are_not_cached(client, use_platform, failure):
+    use_platform({'deezer': failure, 'youtube_music': {'error': 'No results found'}})
+    response = get(client, CANONICAL)
+    assert response.status_code == 200
+    assert response.headers['Cache-Control'] == 'no-store'
+    assert 'ETag' not in response.headers
+
+
+def test_short_links_are_not_cached(client, use_platform):
+    use_platform({'deezer': DEEZER})
+    response = get(client, 'https://deezer.page.link/AbCd123')
+    assert response.status_code == 200
+    assert response.headers['Cache-Control'] == 'no-store'
+    assert 'ETag' not in response.headers
+
+
+def test_errors_are_not_cached(client, use_platform):
+    use_platform({})
+    response = client.get('/api/convert')
+    assert response.status_code == 400
+    assert response.headers['Cache-Control'] == 'no-store'
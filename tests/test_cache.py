@@ -0,0 +1,89 @@
+import cache
+from cache import ConversionCache
+from music_search import MusicPlatform
+from track import Track
+
+TRACK = Track(platform='deezer', title='Bad Guy', artist='Billie Eilish', album='When We All Fall Asleep',
+              url='https://www.deezer.com/track/655095912', id='655095912', isrc='USUM71900764')
+
+
+def test_memory_tier_hits_and_misses():
+    conversions = ConversionCache()
+    assert conversions.get('spotify', 'a') is None
+    conversions.set('spotify', 'a', {'deezer': TRACK})
+    assert conversions.get('spotify', 'a') == {'deezer': TRACK}
+    assert conversions.stats() == {'memory_hits': 1, 'disk_hits': 0, 'misses': 1, 'hits': 1, 'size': 1}
+
+
+def test_memory_tier_evicts_least_recently_used():
+    conversions = ConversionCache(maxsize=2)
+    conversions.set('spotify', 'a', 1)
+    conversions.set('spotify', 'b', 2)
+    conversions.get('spotify', 'a')
+    conversions.set('spotify', 'c', 3)
+    assert conversions.get('spotify', 'b') is None
+    assert conversions.get('spotify', 'a') == 1
+    assert conversions.get('spotify', 'c') == 3
+
+
+def test_memory_tier_expires_entries(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(cache.time, 'monotonic', lambda: now[0])
+    conversions = ConversionCache(ttl=60)
+    conversions.set('spotify', 'a', 1)
+    now[0] += 59
+    assert conversions.get('spotify', 'a') == 1
+    now[0] += 2
+    assert conversions.get('spotify', 'a') is None
+    assert conversions.stats()['size'] == 0
+
+
+def test_disk_tier_is_shared_and_revives_tracks(tmp_path):
+    db_path = str(tmp_path / 'cache.db')
+    ConversionCache(db_path=db_path).set('spotify', 'a', {'deezer': TRACK, 'yandex_music': {'error': 'No results found'}})
+
+    other = ConversionCache(db_path=db_path)
+    value = other.get('spotify', 'a')
+    assert value == {'deezer': TRACK, 'yandex_music': {'error': 'No results found'}}
+    assert isinstance(value['deezer'], Track)
+    # The disk hit is kept in memory for the next lookup
+    other.get('spotify', 'a')
+    assert other.stats()['disk_hits'] == 1 and other.stats()['memory_hits'] == 1
+
+
+def test_disk_tier_expires_rows(tmp_path):
+    conversions = ConversionCache(maxsize=0, db_path=str(tmp_path / 'cache.db'), db_ttl=-1)
+    conversions.set('spotify', 'a', 1)
+    assert conversions.get('spotify', 'a') is None
+    conversions.purge_expired()
+    assert conversions._db.get().execute('SELECT COUNT(*) FROM conversions').fetchone()[0] == 0
+
+
+def test_invalidate_and_clear_both_tiers(tmp_path):
+    db_path = str(tmp_path / 'cache.db')
+    conversions = ConversionCache(db_path=db_path)
+    conversions.set('spotify', 'a', 1)
+    conversions.set('spotify', 'b', 2)
+    conversions.set('deezer', 'c', 3)
+
+    conversions.invalidate('spotify', 'a')
+    assert conversions.get('spotify', 'a') is None
+    conversions.invalidate('spotify')
+    assert ConversionCache(db_path=db_path).get('spotify', 'b') is None
+    assert conversions.get('deezer', 'c') == 3
+
+    conversions.clear()
+    assert ConversionCache(db_path=db_path).get('deezer', 'c') is None
+
+
+def test_only_complete_conversions_are_cacheable():
+    assert MusicPlatform.is_complete({
+        'deezer': TRACK,
+        'spotify': {'error': 'No results found'},
+        'apple_music': {'error': 'Apple Music is disabled', 'status': 'disabled'},
+        'yandex_music': {'error': 'Yandex Music is not configured', 'status': 'unconfigured'},
+    })
+    for status in ('error', 'timeout', 'throttled', 'unavailable'):
+        assert not MusicPlatform.is_complete({'deezer': TRACK, 'spotify': {'error': 'Search failed', 'status': status}})
+    # An upstream error without a status is not a miss either
+    assert not MusicPlatform.is_complete({'deezer': {'error': 'Search failed: 500 Server Error'}})
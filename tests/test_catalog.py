@@ -0,0 +1,72 @@
+import pytest
+
+from catalog import TrackCatalog, similarity, tokens
+from track import Track
+
+
+def make_track(platform: str, title: str = 'Smells Like Teen Spirit', artist: str = 'Nirvana') -> Track:
+    return Track(platform=platform, title=title, artist=artist, album='Nevermind',
+                 url=f'https://{platform}/1', id='1')
+
+
+@pytest.fixture
+def catalog():
+    catalog = TrackCatalog()
+    catalog.add('Smells Like Teen Spirit', 'Nirvana', 'deezer', make_track('deezer'))
+    catalog.add('Smells Like Teen Spirit', 'Nirvana', 'spotify', make_track('spotify'))
+    return catalog
+
+
+def test_tokens_ignore_case_accents_and_punctuation():
+    assert tokens("Beyoncé & JAY-Z") == ['beyonce', 'and', 'jay', 'z']
+    assert similarity({'a', 'b'}, {'b', 'c'}) == pytest.approx(1 / 3)
+
+
+def test_lookup_matches_normalized_title_and_artist(catalog):
+    assert set(catalog.lookup('smells like teen spirit!', 'NIRVANA')) == {'deezer', 'spotify'}
+    assert catalog.get('Smells Like Teen Spirit', 'Nirvana', 'deezer') == make_track('deezer')
+    assert catalog.get('Smells Like Teen Spirit', 'Nirvana', 'apple_music') is None
+    assert len(catalog) == 1
+
+
+def test_full_text_lookup_finds_similar_records(catalog):
+    # Different word order and one extra word still reach the min_score
+    assert set(catalog.lookup('Teen Spirit Smells Like', 'Nirvana')) == {'deezer', 'spotify'}
+    assert set(catalog.lookup('Smells Like Teen Spirit Remastered', 'Nirvana')) == {'deezer', 'spotify'}
+    # Too different to be the same recording
+    assert catalog.lookup('Smells Like Teen Spirit Live At Reading', 'Nirvana') == {}
+    assert catalog.lookup('Smells Like Teen Spirit', 'Patti Smith') == {}
+
+
+def test_expired_links_are_not_returned():
+    catalog = TrackCatalog(ttl=-1)
+    catalog.add('Smells Like Teen Spirit', 'Nirvana', 'deezer', make_track('deezer'))
+    assert catalog.lookup('Smells Like Teen Spirit', 'Nirvana') == {}
+    catalog.prune()
+    assert len(catalog) == 0
+
+
+def test_prune_keeps_the_most_recent_records():
+    catalog = TrackCatalog(maxsize=2)
+    for title in ('One', 'Two', 'Three'):
+        catalog.add(title, 'Metallica', 'deezer', make_track('deezer', title, 'Metallica'))
+    catalog.prune()
+    assert len(catalog) == 2
+    assert catalog.lookup('One', 'Metallica') == {}
+    assert set(catalog.lookup('Three', 'Metallica')) == {'deezer'}
+
+
+def test_disabled_catalog_records_nothing():
+    catalog = TrackCatalog(maxsize=0)
+    catalog.add('Smells Like Teen Spirit', 'Nirvana', 'deezer', make_track('deezer'))
+    assert catalog.lookup('Smells Like Teen Spirit', 'Nirvana') == {}
+    assert len(catalog) == 0
+
+
+def test_file_catalog_is_shared(tmp_path):
+    db_path = str(tmp_path / 'catalog.db')
+    TrackCatalog(db_path=db_path).add('Smells Like Teen Spirit', 'Nirvana', 'deezer', make_track('deezer'))
+    other = TrackCatalog(db_path=db_path)
+    assert other.lookup('Teen Spirit Smells Like', 'Nirvana') == {'deezer': make_track('deezer')}
+    other.clear()
+    assert len(TrackCatalog(db_path=db_path)) == 0
@@ -0,0 +1,58 @@
+from isrc_index import ISRCIndex
+from track import Track
+
+
+def make_track(platform: str, track_id: str = '1') -> Track:
+    return Track(platform=platform, title='Bad Guy', artist='Billie Eilish', album='When We All Fall Asleep',
+                 url=f'https://{platform}/{track_id}', id=track_id, isrc='USUM71900764')
+
+
+def test_lookup_normalizes_isrcs():
+    index = ISRCIndex()
+    index.add('us-um7-19-00764', 'deezer', make_track('deezer'))
+    assert index.lookup('USUM71900764') == {'deezer': make_track('deezer')}
+    assert index.get('USUM7 1900764', 'deezer') == make_track('deezer')
+    assert index.get('USUM71900764', 'spotify') is None
+
+
+def test_evicts_least_recently_used_recordings():
+    index = ISRCIndex(maxsize=2)
+    index.add('A', 'deezer', make_track('deezer'))
+    index.add('B', 'deezer', make_track('deezer'))
+    index.lookup('A')
+    index.add('C', 'deezer', make_track('deezer'))
+    assert len(index) == 2
+    assert index.lookup('B') == {}
+    assert set(index.lookup('A')) == {'deezer'}
+
+
+def test_remove_forgets_tracks(tmp_path):
+    index = ISRCIndex(db_path=str(tmp_path / 'isrc.db'))
+    index.add('A', 'deezer', make_track('deezer'))
+    index.add('A', 'spotify', make_track('spotify'))
+    index.remove('A', 'deezer')
+    assert set(index.lookup('A')) == {'spotify'}
+    index.remove('A')
+    assert index.lookup('A') == {}
+
+
+def test_workers_see_each_others_tracks_through_the_database(tmp_path):
+    db_path = str(tmp_path / 'isrc.db')
+    worker_a, worker_b = ISRCIndex(db_path=db_path), ISRCIndex(db_path=db_path)
+
+    worker_a.add('USUM71900764', 'spotify', make_track('spotify'))
+    assert set(worker_a.lookup('USUM71900764')) == {'spotify'}
+
+    # Another worker indexes the same recording on a second platform
+    worker_b.add('USUM71900764', 'deezer', make_track('deezer'))
+
+    assert set(worker_a.lookup('USUM71900764')) == {'deezer', 'spotify'}
+    assert worker_a.get('USUM71900764', 'deezer') == make_track('deezer')
+    # The rows were merged into worker A's in-memory entry
+    assert set(worker_a._entries['USUM71900764']) == {'deezer', 'spotify'}
+
+
+def test_index_survives_restarts(tmp_path):
+    db_path = str(tmp_path / 'isrc.db')
+    ISRCIndex(db_path=db_path).add('USUM71900764', 'deezer', make_track('deezer'))
+    assert ISRCIndex(db_path=db_path).get('USUM71900764', 'deezer') == make_track('deezer')
@@ -0,0 +1,37 @@
+import threading
+import time
+
+from metrics import CIRCUIT_OPENED
+from music_search import MusicPlatform
+from track import Track
+
+
+class SlowDeezer(MusicPlatform):
+    """MusicPlatform whose Deezer search answers after 50 ms without any network call"""
+
+    def _search_deezer(self, song_name, artist_name):
+        time.sleep(0.05)
+        return Track.from_dict({'id': song_name, 'title': song_name, 'artist': artist_name, 'url': 'u'}, 'deezer')
+
+
+def test_searches_timing_out_in_the_queue_do_not_trip_the_breaker():
+    music = SlowDeezer(max_workers=1, search_timeout=0.2, enabled_platforms=['deezer'],
+                       rate_limits={}, breaker_failures=3)
+    opened = CIRCUIT_OPENED.value(platform='deezer')
+    results = []
+
+    def search(i):
+        results.append(music.search_track(f'song {i}', 'artist')['deezer'])
+
+    threads = [threading.Thread(target=search, args=(i,)) for i in range(12)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join(5)
+
+    # The single worker cannot finish every search in time ...
+    timeouts = [result for result in results if 'error' in result]
+    assert timeouts and all(result['status'] == 'timeout' for result in timeouts)
+    # ... but the platform itself answered every call it got
+    assert CIRCUIT_OPENED.value(platform='deezer') == opened
+    assert not music._breakers['deezer'].is_open
@@ -0,0 +1,191 @@
+import threading
+
+import pytest
+
+import throttle
+from throttle import CircuitBreaker, Hedger, SingleFlight, TokenBucket, parse_rate_limits
+
+
+class FakeClock:
+    """Stand-in for time.monotonic that only moves when told to"""
+
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self) -> float:
+        return self.now
+
+    def advance(self, seconds: float) -> None:
+        self.now += seconds
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    fake = FakeClock()
+    monkeypatch.setattr(throttle.time, 'monotonic', fake)
+    return fake
+
+
+def test_parse_rate_limits():
+    assert parse_rate_limits('spotify=10:20, deezer=2.5') == {'spotify': (10.0, 20), 'deezer': (2.5, 3)}
+    assert parse_rate_limits('') == {}
+
+
+def test_token_bucket_allows_burst_then_refills(clock):
+    bucket = TokenBucket(rate=2.0, burst=3)
+    assert [bucket.acquire() for _ in range(4)] == [True, True, True, False]
+
+    clock.advance(0.5)
+    assert bucket.acquire()
+    assert not bucket.acquire()
+
+    # Refilling stops at the burst size
+    clock.advance(60)
+    assert [bucket.acquire() for _ in range(4)] == [True, True, True, False]
+
+
+def test_single_flight_coalesces_concurrent_calls():
+    flight = SingleFlight()
+    started, release = threading.Event(), threading.Event()
+    calls = []
+
+    def call():
+        calls.append(1)
+        started.set()
+        release.wait(5)
+        return object()
+
+    results = []
+
+    def run():
+        results.append(flight.do('key', call))
+
+    leader = threading.Thread(target=run)
+    leader.start()
+    assert started.wait(5)
+    # Every later caller finds the leader's call in flight and waits for its result
+    followers = [threading.Thread(target=run) for _ in range(7)]
+    for thread in followers:
+        thread.start()
+    release.wait(0.1)
+    release.set()
+    for thread in [leader] + followers:
+        thread.join(5)
+
+    assert len(calls) == 1
+    assert len(results) == 8 and all(result is results[0] for result in results)
+
+
+def test_single_flight_runs_again_once_finished():
+    flight = SingleFlight()
+    assert flight.do('key', lambda: 1) == 1
+    assert flight.do('key', lambda: 2) == 2
+
+
+def test_single_flight_shares_errors():
+    flight = SingleFlight()
+    started, release = threading.Event(), threading.Event()
+    errors = []
+
+    def call():
+        started.set()
+        release.wait(5)
+        raise RuntimeError('upstream failed')
+
+    def run():
+        try:
+            flight.do('key', call)
+        except RuntimeError as e:
+            errors.append(e)
+
+    threads = [threading.Thread(target=run)]
+    threads[0].start()
+    assert started.wait(5)
+    threads += [threading.Thread(target=run) for _ in range(3)]
+    for thread in threads[1:]:
+        thread.start()
+    release.wait(0.1)
+    release.set()
+    for thread in threads:
+        thread.join(5)
+
+    assert len(errors) == 4 and all(error is errors[0] for error in errors)
+    assert flight.do('key', lambda: 'recovered') == 'recovered'
+
+
+def test_circuit_breaker_opens_after_threshold(clock):
+    breaker = CircuitBreaker(threshold=3, cooldown=30)
+    assert not breaker.record_failure()
+    assert not breaker.record_failure()
+    assert breaker.record_failure()
+    assert breaker.is_open
+    assert not breaker.allow()
+
+    # A success before the threshold resets the count
+    breaker = CircuitBreaker(threshold=2, cooldown=30)
+    breaker.record_failure()
+    breaker.record_success()
+    assert not breaker.record_failure()
+    assert breaker.allow()
+
+
+def test_circuit_breaker_half_open_admits_one_probe(clock):
+    breaker = CircuitBreaker(threshold=1, cooldown=30)
+    breaker.record_failure()
+
+    clock.advance(29)
+    assert not breaker.allow()
+    clock.advance(1)
+    assert breaker.allow()
+    # Only the first call after the cool-down probes the platform
+    assert not breaker.allow()
+
+    # The probe failed: the breaker stays open for another cool-down
+    assert not breaker.record_failure()
+    assert not breaker.allow()
+    clock.advance(30)
+    assert breaker.allow()
+
+    breaker.record_success()
+    assert not breaker.is_open
+    assert all(breaker.allow() for _ in range(3))
+
+
+def test_hedger_waits_for_enough_samples():
+    hedger = Hedger(min_samples=20)
+    for _ in range(19):
+        hedger.record(0.1)
+        assert hedger.start() is None
+    hedger.record(0.1)
+    assert hedger.start() == pytest.approx(0.1)
+
+
+def test_hedger_delay_is_the_percentile():
+    hedger = Hedger(percentile=0.95, min_samples=1)
+    for ms in range(1, 101):
+        hedger.record(ms / 1000)
+    assert hedger.start() == pytest.approx(0.096)
+
+    # Only the latest ``window`` latencies count
+    hedger = Hedger(percentile=0.5, window=10, min_samples=1)
+    for _ in range(10):
+        hedger.record(5.0)
+    for _ in range(10):
+        hedger.record(0.2)
+    assert hedger.start() == pytest.approx(0.2)
+
+
+def test_hedger_budget_caps_hedges():
+    hedger = Hedger(budget=0.25, burst=2.0)
+    assert not hedger.take()
+
+    hedges = 0
+    for _ in range(100):
+        hedger.start()
+        hedges += hedger.take()
+    assert hedges == 25
+
+    # Unused credit accumulates only up to the burst
+    for _ in range(100):
+        hedger.start()
+    assert [hedger.take() for _ in range(3)] == [True, True, False]
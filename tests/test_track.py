@@ -0,0 +1,65 @@
+import dataclasses
+import json
+
+import pytest
+
+import track as track_module
+from catalog import TrackCatalog
+from track import Track, dumps, loads
+
+TRACK = Track(platform='spotify', title='Bad Guy', artist='Billie Eilish', album='When We All Fall Asleep',
+              url='https://open.spotify.com/track/2Fxmhks0bxGSBdJ92vM42m', id='2Fxmhks0bxGSBdJ92vM42m',
+              isrc='USUM71900764')
+
+
+def test_from_dict_accepts_older_dict_results():
+    legacy = {'song': 'Bad Guy', 'artist': 'Billie Eilish', 'album': 'When We All Fall Asleep',
+              'url': TRACK.url, 'id': TRACK.id, 'isrc': 'USUM71900764'}
+    assert Track.from_dict(legacy, 'spotify') == TRACK
+    assert Track.from_dict(TRACK.to_dict()) == TRACK
+    assert Track.from_dict({**TRACK.to_dict(), 'id': 42}).id == '42'
+
+
+def test_tracks_read_like_the_older_dicts():
+    assert TRACK['song'] == TRACK['title'] == 'Bad Guy'
+    assert TRACK.get('isrc') == 'USUM71900764'
+    assert TRACK.get('preview') is None
+    assert 'song' in TRACK and 'preview' not in TRACK
+    assert dict(TRACK) == TRACK.to_dict()
+    with pytest.raises(KeyError):
+        TRACK['preview']
+    with pytest.raises(dataclasses.FrozenInstanceError):
+        TRACK.title = 'Other'
+
+
+@pytest.mark.parametrize('use_orjson', [True, False])
+def test_dumps_and_loads_round_trip(monkeypatch, use_orjson):
+    if not use_orjson:
+        monkeypatch.setattr(track_module, 'orjson', None)
+    elif track_module.orjson is None:
+        pytest.skip('orjson is not installed')
+    value = {'source': TRACK, 'alternatives': {'deezer': {'error': 'No results found'}}, 'tracks': [TRACK]}
+
+    text = dumps(value)
+    assert json.loads(text)['source'] == TRACK.to_dict()
+    revived = loads(text)
+    assert revived == value
+    assert isinstance(revived['source'], Track) and isinstance(revived['tracks'][0], Track)
+    # Dicts that merely share some track fields stay dicts
+    assert loads(dumps({'title': 'x', 'url': 'y'})) == {'title': 'x', 'url': 'y'}
+
+
+def test_dumps_rejects_unknown_objects():
+    with pytest.raises(TypeError):
+        dumps({'value': object()})
+
+
+def test_catalog_revives_rows_written_before_tracks_had_a_platform(tmp_path):
+    db_path = str(tmp_path / 'catalog.db')
+    catalog = TrackCatalog(db_path=db_path)
+    catalog.add('Bad Guy', 'Billie Eilish', 'spotify', TRACK)
+    legacy = {key: value for key, value in TRACK.to_dict().items() if key != 'platform'}
+    with catalog._transaction() as conn:
+        conn.execute('UPDATE catalog_links SET track = ?', (json.dumps(legacy),))
+
+    assert TrackCatalog(db_path=db_path).lookup('Bad Guy', 'Billie Eilish') == {'spotify': TRACK}
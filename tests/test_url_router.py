@@ -0,0 +1,79 @@
+import pytest
+
+from url_router import ParsedUrl, UnsupportedUrlError, canonical_key, canonical_url, parse_url
+
+SPOTIFY_ID = '4uLU6hMCjMI75M1A2tKUQC'
+
+
+@pytest.mark.parametrize('url, expected', [
+    # Deezer, with and without a locale prefix
+    ('https://www.deezer.com/track/3135556', ('deezer', 'track', '3135556')),
+    ('https://www.deezer.com/fr/track/3135556', ('deezer', 'track', '3135556')),
+    ('https://www.deezer.com/en-gb/album/302127/', ('deezer', 'album', '302127')),
+    ('https://deezer.page.link/AbCd123', ('deezer', 'shortlink', 'AbCd123')),
+    ('https://link.deezer.com/s/30aBcD', ('deezer', 'shortlink', '30aBcD')),
+    # Spotify, with intl- locales, embeds, tracking parameters and URIs
+    (f'https://open.spotify.com/track/{SPOTIFY_ID}', ('spotify', 'track', SPOTIFY_ID)),
+    (f'https://open.spotify.com/intl-de/track/{SPOTIFY_ID}?si=abc', ('spotify', 'track', SPOTIFY_ID)),
+    (f'https://open.spotify.com/intl-pt-br/album/{SPOTIFY_ID}', ('spotify', 'album', SPOTIFY_ID)),
+    (f'https://open.spotify.com/embed/playlist/{SPOTIFY_ID}', ('spotify', 'playlist', SPOTIFY_ID)),
+    (f'spotify:track:{SPOTIFY_ID}', ('spotify', 'track', SPOTIFY_ID)),
+    # Apple Music: ?i= on an album link points at one song
+    ('https://music.apple.com/us/album/bad-guy/1450695723?i=1450695739', ('apple_music', 'track', '1450695739')),
+    ('https://music.apple.com/gb/album/bad-guy/1450695723', ('apple_music', 'album', '1450695723')),
+    ('https://music.apple.com/us/album/1450695723?i=', ('apple_music', 'album', '1450695723')),
+    ('https://music.apple.com/de/song/bad-guy/1450695739', ('apple_music', 'track', '1450695739')),
+    ('https://music.apple.com/us/playlist/top-100/pl.d25f5d1181894928af76c85c967f8f31',
+     ('apple_music', 'playlist', 'pl.d25f5d1181894928af76c85c967f8f31')),
+    # YouTube Music and Yandex Music
+    ('https://music.youtube.com/watch?v=DyDfgMOUjCI&list=RDAMVM', ('youtube_music', 'track', 'DyDfgMOUjCI')),
+    ('https://music.youtube.com/playlist?list=PL4fGSI1pDJn6', ('youtube_music', 'playlist', 'PL4fGSI1pDJn6')),
+    ('https://music.youtube.com/browse/MPREb_abc123', ('youtube_music', 'album', 'MPREb_abc123')),
+    ('https://music.yandex.ru/album/7019257/track/50685701', ('yandex_music', 'track', '50685701')),
+    ('https://music.yandex.com/track/50685701', ('yandex_music', 'track', '50685701')),
+    ('https://music.yandex.ru/users/music-blog/playlists/2211', ('yandex_music', 'playlist', 'music-blog:2211')),
+    # Case and surrounding whitespace do not matter
+    ('  HTTPS://WWW.Deezer.com/US/Track/3135556  ', ('deezer', 'track', '3135556')),
+])
+def test_parse_url(url, expected):
+    assert parse_url(url) == ParsedUrl(*expected)
+
+
+@pytest.mark.parametrize('url', [
+    'ftp://www.deezer.com/track/3135556',
+    'https://example.com/track/3135556',
+    'https://www.deezer.com/track/not-a-number',
+    'https://open.spotify.com/track/tooshort',
+    'https://open.spotify.com/artist/4uLU6hMCjMI75M1A2tKUQC',
+    'https://music.apple.com/album/bad-guy/1450695723',
+    'https://music.youtube.com/watch?list=RDAMVM',
+    'https://music.youtube.com/watch?v=bad%20id',
+    None,
+])
+def test_parse_url_rejects_unsupported_links(url):
+    with pytest.raises(UnsupportedUrlError):
+        parse_url(url)
+
+
+def test_canonical_url_merges_variants_of_a_track():
+    variants = [
+        f'https://open.spotify.com/track/{SPOTIFY_ID}',
+        f'https://open.spotify.com/intl-fr/track/{SPOTIFY_ID}?si=123',
+        f'https://open.spotify.com/embed/track/{SPOTIFY_ID}',
+        f'spotify:track:{SPOTIFY_ID}',
+    ]
+    assert {canonical_url(url) for url in variants} == {f'https://open.spotify.com/track/{SPOTIFY_ID}'}
+    assert canonical_url('https://music.apple.com/gb/album/bad-guy/1450695723?i=1450695739') == \
+        'https://music.apple.com/us/song/1450695739'
+    assert canonical_url('https://www.deezer.com/fr/track/3135556') == 'https://www.deezer.com/track/3135556'
+
+
+@pytest.mark.parametrize('url', [
+    'https://music.apple.com/us/album/bad-guy/1450695723',
+    'https://deezer.page.link/AbCd123',
+    'https://music.youtube.com/playlist?list=PL4fGSI1pDJn6',
+    'https://example.com/track/1',
+])
+def test_links_without_a_track_id_have_no_canonical_form(url):
+    assert canonical_key(url) is None
+    assert canonical_url(url) is None
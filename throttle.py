@@ -0,0 +1,205 @@
+"""Rate limiting, request coalescing and circuit breaking for upstream platform calls.
+
+``TokenBucket`` caps the request rate per platform, ``SingleFlight`` lets
+concurrent identical calls share one upstream request and its result,
+``CircuitBreaker`` stops calling a platform that keeps failing for a while,
+and ``Hedger`` decides when a slow call gets a duplicate request.
+"""
+import os
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future
+from typing import Any, Callable, Dict, Hashable, Optional, Tuple
+
+# Platform -> (requests per second, burst size)
+DEFAULT_RATE_LIMITS: Dict[str, Tuple[float, int]] = {
+    'deezer': (10.0, 50),       # Deezer allows 50 requests per 5 seconds
+    'spotify': (10.0, 20),
+    'apple_music': (20.0, 20),
+    'youtube_music': (5.0, 10),
+    'yandex_music': (5.0, 10),
+}
+
+
+class ThrottledError(Exception):
+    """Raised when an upstream platform reports that we are being rate limited"""
+    http_status = 429
+
+
+def parse_rate_limits(spec: Optional[str]) -> Dict[str, Tuple[float, int]]:
+    """Parse ``"spotify=10:20,deezer=5"`` into ``{platform: (rate, burst)}``.
+
+    The burst defaults to the rate (rounded up) when omitted.
+    """
+    limits = {}
+    for item in (spec or '').split(','):
+        if not item.strip():
+            continue
+        platform, _, value = item.partition('=')
+        rate, _, burst = value.partition(':')
+        rate = float(rate)
+        limits[platform.strip()] = (rate, int(burst) if burst else max(1, int(-(-rate // 1))))
+    return limits
+
+
+def rate_limits_from_env() -> Dict[str, Tuple[float, int]]:
+    """Return the default rate limits with MUSIC_RATE_LIMITS overrides applied"""
+    limits = dict(DEFAULT_RATE_LIMITS)
+    limits.update(parse_rate_limits(os.getenv('MUSIC_RATE_LIMITS')))
+    return limits
+
+
+class TokenBucket:
+    """Thread-safe token bucket allowing ``rate`` calls per second with bursts of ``burst``"""
+
+    def __init__(self, rate: float, burst: int):
+        self.rate = rate
+        self.burst = burst
+        self._tokens = float(burst)
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self, timeout: float = 0.0) -> bool:
+        """Take one token, waiting up to ``timeout`` seconds; return False if none came free"""
+        deadline = time.monotonic() + timeout
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return True
+                wait = (1 - self._tokens) / self.rate
+            if now + wait > deadline:
+                return False
+            time.sleep(wait)
+
+
+class SingleFlight:
+    """Coalesce concurrent calls with the same key into a single execution"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._calls: Dict[Hashable, Future] = {}
+
+    def do(self, key: Hashable, call: Callable[[], Any]) -> Any:
+        """Run ``call`` unless an identical call is in flight, in which case share its result"""
+        with self._lock:
+            future = self._calls.get(key)
+            leader = future is None
+            if leader:
+                future = self._calls[key] = Future()
+        if not leader:
+            return future.result()
+
+        try:
+            result = call()
+        except BaseException as e:
+            future.set_exception(e)
+            raise
+        else:
+            future.set_result(result)
+            return result
+        finally:
+            with self._lock:
+                del self._calls[key]
+
+
+class CircuitBreaker:
+    """Skip a platform for ``cooldown`` seconds after ``threshold`` consecutive failures.
+
+    Once the cool-down has passed, calls are let through again one cool-down
+    at a time: a success closes the breaker, another failure reopens it.
+    """
+
+    def __init__(self, threshold: int = 5, cooldown: float = 30.0):
+        self.threshold = threshold
+        self.cooldown = cooldown
+        self._failures = 0
+        self._opened_at: Optional[float] = None
+        self._lock = threading.Lock()
+
+    @property
+    def is_open(self) -> bool:
+        """Whether calls are currently being skipped"""
+        opened_at = self._opened_at
+        return opened_at is not None and time.monotonic() - opened_at < self.cooldown
+
+    def allow(self) -> bool:
+        """Return True if a call may go ahead; after the cool-down this admits one trial call"""
+        with self._lock:
+            if self._opened_at is None:
+                return True
+            now = time.monotonic()
+            if now - self._opened_at < self.cooldown:
+                return False
+            # Restart the cool-down so only this call probes the platform
+            self._opened_at = now
+            return True
+
+    def record_success(self) -> None:
+        with self._lock:
+            self._failures = 0
+            self._opened_at = None
+
+    def record_failure(self) -> bool:
+        """Count a failed call; return True if it opened the breaker"""
+        with self._lock:
+            self._failures += 1
+            if self._failures < self.threshold:
+                return False
+            opened = self._opened_at is None
+            self._opened_at = time.monotonic()
+            return opened
+
+
+class Hedger:
+    """Decide when a slow call to one platform gets a duplicate ("hedged") request.
+
+    The latencies of the platform's recent calls are kept in a sliding window.
+    A call that has not answered after their ``percentile`` may be hedged once.
+    Hedges are capped by a budget: every call earns ``budget`` credit (up to
+    ``burst``) and every hedge spends one, so at most a ``budget`` fraction of
+    calls are duplicated over time.
+    """
+
+    def __init__(self, budget: float = 0.1, percentile: float = 0.95, window: int = 200,
+                 min_samples: int = 20, burst: float = 10.0):
+        self.budget = budget
+        self.percentile = percentile
+        self.min_samples = min_samples
+        self.burst = burst
+        self._samples: deque = deque(maxlen=window)
+        self._delay: Optional[float] = None
+        self._stale = False
+        self._credit = 0.0
+        self._lock = threading.Lock()
+
+    def record(self, seconds: float) -> None:
+        """Add the latency of an answered call"""
+        with self._lock:
+            self._samples.append(seconds)
+            self._stale = True
+
+    def start(self) -> Optional[float]:
+        """Count a new call; return how long it may run before it is hedged, or None
+        while too few latencies have been seen"""
+        with self._lock:
+            self._credit = min(self.burst, self._credit + self.budget)
+            if len(self._samples) < self.min_samples:
+                return None
+            if self._stale:
+                ordered = sorted(self._samples)
+                self._delay = ordered[min(len(ordered) - 1, int(len(ordered) * self.percentile))]
+                self._stale = False
+            return self._delay
+
+    def take(self) -> bool:
+        """Spend budget on one hedge; False when the budget is used up"""
+        with self._lock:
+            if self._credit < 1:
+                return False
+            self._credit -= 1
+            return True
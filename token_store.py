@@ -0,0 +1,82 @@
+"""Access tokens shared by every worker process on a host.
+
+Tokens are kept in a small SQLite file, so a pre-forking server fetches a
+platform token once instead of once per worker. ``refreshing()`` holds the
+database's write lock while a token is renewed: a worker that finds the token
+expired waits for the one already renewing it and then reads the new token,
+so each expiry costs a single upstream auth request.
+
+Connections are opened per operation. Tokens are read from the store only
+when a worker's in-memory copy runs out, and short-lived connections are
+never carried across a fork.
+"""
+import json
+import os
+import sqlite3
+import threading
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, Optional
+
+
+class TokenStore:
+    def __init__(self, db_path: str, timeout: float = 30):
+        self.db_path = db_path
+        # Long enough to wait out another worker's token request
+        self.timeout = timeout
+        # The connection a thread holds the refresh lock on
+        self._local = threading.local()
+
+        # Tokens are credentials: keep the file private to the service user
+        os.close(os.open(db_path, os.O_CREAT | os.O_RDWR, 0o600))
+        with self._connection() as conn:
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute(
+                'CREATE TABLE IF NOT EXISTS tokens ('
+                ' name TEXT PRIMARY KEY,'
+                ' token TEXT NOT NULL'
+                ') WITHOUT ROWID'
+            )
+
+    @contextmanager
+    def _connection(self) -> Iterator[sqlite3.Connection]:
+        """Use the connection holding the refresh lock, or a new one"""
+        locked = getattr(self._local, 'conn', None)
+        if locked is not None:
+            yield locked
+            return
+        conn = sqlite3.connect(self.db_path, timeout=self.timeout, isolation_level=None)
+        try:
+            yield conn
+        finally:
+            conn.close()
+
+    def get(self, name: str) -> Optional[Dict[str, Any]]:
+        """Return the stored token, or None"""
+        with self._connection() as conn:
+            row = conn.execute('SELECT token FROM tokens WHERE name = ?', (name,)).fetchone()
+        return json.loads(row[0]) if row is not None else None
+
+    def set(self, name: str, token: Dict[str, Any]) -> None:
+        with self._connection() as conn:
+            conn.execute('INSERT OR REPLACE INTO tokens (name, token) VALUES (?, ?)',
+                         (name, json.dumps(token)))
+
+    @contextmanager
+    def refreshing(self) -> Iterator[None]:
+        """Hold the store's write lock while a token is renewed.
+
+        Other processes (and threads) that want to renew a token wait until
+        the block exits. Calls to ``get`` and ``set`` inside the block use the
+        locked connection.
+        """
+        with self._connection() as conn:
+            conn.execute('BEGIN IMMEDIATE')
+            self._local.conn = conn
+            try:
+                yield
+            except BaseException:
+                conn.execute('ROLLBACK')
+                raise
+            finally:
+                self._local.conn = None
+            conn.execute('COMMIT')
@@ -0,0 +1,100 @@
+"""Track records returned by the platform adapters.
+
+A ``Track`` is one platform's track, whether it came from a link or from a
+search. Tracks are frozen, slotted dataclasses: they are small, can be shared
+between threads, caches and batch outputs without copying, and serialize
+straight to JSON. Code written against the older dict results can keep using
+read-only mapping access (``track['artist']``, ``track.get('isrc')``), where
+``'song'`` is an alias of ``'title'``.
+
+``dumps`` and ``loads`` serialize results that contain tracks, using orjson
+when it is installed.
+"""
+import json
+from dataclasses import dataclass
+from typing import Any, Dict, Optional, Tuple, Union
+
+try:
+    import orjson
+except ImportError:  # optional speed-up, see the "fast" extra
+    orjson = None
+
+FIELDS: Tuple[str, ...] = ('platform', 'title', 'artist', 'album', 'url', 'id', 'isrc')
+_FIELD_SET = frozenset(FIELDS)
+
+
+@dataclass(frozen=True, slots=True)
+class Track:
+    platform: str
+    title: str
+    artist: str
+    album: Optional[str]
+    url: str
+    id: str
+    isrc: Optional[str] = None
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any], platform: Optional[str] = None) -> 'Track':
+        """Build a track from a dict with ``title`` (or ``song``) and the other fields.
+
+        ``platform`` fills in for dicts that do not name their platform.
+        """
+        return cls(
+            platform=data.get('platform') or platform,
+            title=data['title'] if 'title' in data else data['song'],
+            artist=data['artist'],
+            album=data.get('album'),
+            url=data['url'],
+            id=str(data['id']),
+            isrc=data.get('isrc'),
+        )
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {'platform': self.platform, 'title': self.title, 'artist': self.artist, 'album': self.album,
+                'url': self.url, 'id': self.id, 'isrc': self.isrc}
+
+    def __getitem__(self, key: str) -> Any:
+        if key == 'song':
+            return self.title
+        if key not in _FIELD_SET:
+            raise KeyError(key)
+        return getattr(self, key)
+
+    def get(self, key: str, default: Any = None) -> Any:
+        try:
+            return self[key]
+        except KeyError:
+            return default
+
+    def __contains__(self, key: object) -> bool:
+        return key in _FIELD_SET or key == 'song'
+
+    def keys(self) -> Tuple[str, ...]:
+        return FIELDS
+
+
+# What lookups and searches return: a track, or an error dict
+Result = Union[Track, Dict[str, Any]]
+
+
+def _default(value: Any) -> Any:
+    if isinstance(value, Track):
+        return value.to_dict()
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+def _revive(data: Dict[str, Any]) -> Any:
+    return Track(**data) if data.keys() == _FIELD_SET else data
+
+
+def dumps(value: Any) -> str:
+    """Serialize a value that may contain tracks to JSON"""
+    if orjson is not None:
+        # orjson serializes dataclasses natively, in field order
+        return orjson.dumps(value, default=_default).decode('utf-8')
+    return json.dumps(value, default=_default)
+
+
+def loads(text: Union[str, bytes]) -> Any:
+    """Parse JSON written by ``dumps``, turning track objects back into tracks"""
+    return json.loads(text, object_hook=_revive)
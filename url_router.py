@@ -0,0 +1,156 @@
+"""Table-driven parser for music platform URLs.
+
+``parse_url`` turns a link into a ``ParsedUrl(platform, kind, id)`` record using
+precompiled patterns only, so it never touches the network. Malformed or
+unsupported links raise ``UnsupportedUrlError`` before any outbound call.
+"""
+import re
+from typing import Callable, Dict, List, NamedTuple, Optional, Tuple
+from urllib.parse import parse_qs, urlsplit
+
+
+class UnsupportedUrlError(ValueError):
+    """Raised when a URL does not point at a supported track, album or playlist"""
+
+
+class ParsedUrl(NamedTuple):
+    platform: str  # 'deezer', 'spotify', 'apple_music', 'youtube_music', 'yandex_music'
+    kind: str      # 'track', 'album', 'playlist' or 'shortlink'
+    id: str        # canonical ID on that platform (the link code for short links)
+
+
+# A rule maps a path regex to a kind; ``extract`` turns the match and the query
+# string into the ID, or None when the URL does not carry one.
+Extract = Callable[['re.Match[str]', Dict[str, List[str]]], Optional[str]]
+Rule = Tuple['re.Pattern[str]', str, Extract]
+
+
+def _group(match, query):
+    return match.group('id')
+
+
+def _query(name: str) -> Extract:
+    def extract(match, query):
+        values = query.get(name)
+        return values[0] if values and values[0] else None
+    return extract
+
+
+def _yandex_playlist(match, query):
+    return f"{match.group('owner')}:{match.group('id')}"
+
+
+_DEEZER_LOCALE = r'(?:[a-z]{2}(?:-[a-z]{2})?/)?'
+_SPOTIFY_LOCALE = r'(?:intl-[a-z]{2}(?:-[a-z]{2})?/)?(?:embed/)?'
+_APPLE_STOREFRONT = r'[a-z]{2}/'
+
+_DEEZER_RULES: List[Rule] = [
+    (re.compile(rf'/{_DEEZER_LOCALE}(?P<kind>track|album|playlist)/(?P<id>\d+)/?$', re.I), '', _group),
+]
+_DEEZER_SHORT_RULES: List[Rule] = [
+    (re.compile(r'/(?:s/)?(?P<id>[A-Za-z0-9_-]+)/?$'), 'shortlink', _group),
+]
+_SPOTIFY_RULES: List[Rule] = [
+    (re.compile(rf'/{_SPOTIFY_LOCALE}(?P<kind>track|album|playlist)/(?P<id>[A-Za-z0-9]{{22}})/?$', re.I), '', _group),
+]
+_APPLE_RULES: List[Rule] = [
+    (re.compile(rf'/{_APPLE_STOREFRONT}song/(?:[^/]+/)?(?P<id>\d+)/?$', re.I), 'track', _group),
+    # An album link with ?i=<song id> points at a single song on that album
+    (re.compile(rf'/{_APPLE_STOREFRONT}album/(?:[^/]+/)?(?P<id>\d+)/?$', re.I), 'track', _query('i')),
+    (re.compile(rf'/{_APPLE_STOREFRONT}album/(?:[^/]+/)?(?P<id>\d+)/?$', re.I), 'album', _group),
+    (re.compile(rf'/{_APPLE_STOREFRONT}playlist/(?:[^/]+/)?(?P<id>pl\.[A-Za-z0-9.-]+)/?$', re.I), 'playlist', _group),
+]
+_YOUTUBE_MUSIC_RULES: List[Rule] = [
+    (re.compile(r'/watch/?$'), 'track', _query('v')),
+    (re.compile(r'/playlist/?$'), 'playlist', _query('list')),
+    (re.compile(r'/browse/(?P<id>MPREb_[A-Za-z0-9_-]+)/?$'), 'album', _group),
+]
+_YANDEX_RULES: List[Rule] = [
+    (re.compile(r'/album/\d+/track/(?P<id>\d+)/?$'), 'track', _group),
+    (re.compile(r'/track/(?P<id>\d+)/?$'), 'track', _group),
+    (re.compile(r'/album/(?P<id>\d+)/?$'), 'album', _group),
+    (re.compile(r'/users/(?P<owner>[^/]+)/playlists/(?P<id>\d+)/?$'), 'playlist', _yandex_playlist),
+]
+
+# Host (lower-case, without "www.") -> (platform, rules)
+_HOSTS: Dict[str, Tuple[str, List[Rule]]] = {
+    'deezer.com': ('deezer', _DEEZER_RULES),
+    'deezer.page.link': ('deezer', _DEEZER_SHORT_RULES),
+    'link.deezer.com': ('deezer', _DEEZER_SHORT_RULES),
+    'open.spotify.com': ('spotify', _SPOTIFY_RULES),
+    'music.apple.com': ('apple_music', _APPLE_RULES),
+    'music.youtube.com': ('youtube_music', _YOUTUBE_MUSIC_RULES),
+    'music.yandex.ru': ('yandex_music', _YANDEX_RULES),
+    'music.yandex.com': ('yandex_music', _YANDEX_RULES),
+    'music.yandex.by': ('yandex_music', _YANDEX_RULES),
+    'music.yandex.kz': ('yandex_music', _YANDEX_RULES),
+}
+
+# Canonical link of a track on each platform, by track ID
+_TRACK_URLS: Dict[str, str] = {
+    'deezer': 'https://www.deezer.com/track/{}',
+    'spotify': 'https://open.spotify.com/track/{}',
+    'apple_music': 'https://music.apple.com/us/song/{}',
+    'youtube_music': 'https://music.youtube.com/watch?v={}',
+    'yandex_music': 'https://music.yandex.ru/track/{}',
+}
+
+_SPOTIFY_URI = re.compile(r'spotify:(?P<kind>track|album|playlist):(?P<id>[A-Za-z0-9]{22})$')
+_VALID_ID = re.compile(r'[A-Za-z0-9_.:-]+$')
+
+
+def parse_url(url: str) -> ParsedUrl:
+    """Parse a music link into ``(platform, kind, id)`` without network access"""
+    if not isinstance(url, str):
+        raise UnsupportedUrlError("URL must be a string")
+    url = url.strip()
+
+    uri = _SPOTIFY_URI.match(url)
+    if uri:
+        return ParsedUrl('spotify', uri.group('kind'), uri.group('id'))
+
+    parts = urlsplit(url)
+    if parts.scheme not in ('http', 'https'):
+        raise UnsupportedUrlError("URL must start with http:// or https://")
+
+    host = (parts.hostname or '').lower()
+    if host.startswith('www.'):
+        host = host[4:]
+    entry = _HOSTS.get(host)
+    if entry is None:
+        raise UnsupportedUrlError("Unsupported platform")
+
+    platform, rules = entry
+    query = parse_qs(parts.query) if parts.query else {}
+    for pattern, kind, extract in rules:
+        match = pattern.match(parts.path)
+        if match is None:
+            continue
+        item_id = extract(match, query)
+        if item_id is None or not _VALID_ID.match(item_id):
+            continue
+        return ParsedUrl(platform, kind or match.group('kind').lower(), item_id)
+
+    raise UnsupportedUrlError(f"Unrecognized {platform} link")
+
+
+def canonical_key(url: str) -> Optional[Tuple[str, str]]:
+    """Return ``(platform, track id)`` for a track link, or None if it has no direct track ID"""
+    try:
+        parsed = parse_url(url)
+    except UnsupportedUrlError:
+        return None
+    if parsed.kind != 'track':
+        return None
+    return (parsed.platform, parsed.id)
+
+
+def canonical_url(url: str) -> Optional[str]:
+    """Return the one canonical link shared by every variant of a track link, or None.
+
+    Locale prefixes, tracking parameters, album context and the like are
+    dropped, so the result can serve as a cache key. Links without a direct
+    track ID (albums, playlists, short links) have no canonical form.
+    """
+    key = canonical_key(url)
+    return _TRACK_URLS[key[0]].format(key[1]) if key is not None else None
@@ -0,0 +1,13 @@
+"""WSGI entry point for production servers:
+
+    gunicorn -c gunicorn.conf.py wsgi:app
+
+Importing this module warms up the platform clients. A server that preloads
+the app (gunicorn.conf.py does) imports it once in its parent process, so
+every worker is forked with the SDKs imported, the clients built and their
+access tokens fetched.
+"""
+from app import app  # noqa: F401
+from music_search import get_music_platform
+
+get_music_platform().warm_up()